@@ -1,21 +1,39 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request
+from fastapi.responses import Response, JSONResponse, FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_, and_
+import threading
+import asyncio
+import base64
+import time
+from urllib.parse import urldefrag
 import sys
 import os
 sys.path.append('..')
 
-from scrapers.toyota_center_scraper import ToyotaCenterScraper
-from scrapers.axs_scraper import AXSScraper
-from models.database import SessionLocal, Event, TicketPrice, PriceDrop
-from utils.scheduler import start_monitoring
+from models.database import SessionLocal, Event, TicketPrice, PriceDrop, PriceRollup
+from models.migrations import init_db
+from utils.lifecycle import subsystem, readiness
+from utils.ingestion import ingest_snapshot
+from utils.jobs import jobs, QueueFull
+from utils.discovery import DiscoveryCache, parse_event_date
+from utils.rollups import bucket_start, GRANULARITIES
+from utils.polling import schedule_snapshot
+from utils.section_stats import section_analytics
+from utils.broadcast import broadcaster
+from utils.response_cache import response_cache, event_tag, MISS
+from utils.metrics import registry, http_request_seconds, instrument_sessions
+from utils.profiling import profiler
 import json
 
 app = FastAPI(title="Toyota Center Ticket Tracker API", version="1.0.0")
+# Commit timings for the API's own sessions, with or without the scheduler loaded
+instrument_sessions(SessionLocal)
 
 # Add CORS middleware for dashboard
 app.add_middleware(
@@ -24,14 +42,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    """Request latency by route template, so path parameters don't add series"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get('route')
+        http_request_seconds.observe(time.perf_counter() - start, method=request.method,
+                                     route=getattr(route, 'path', 'unmatched'), status=status)
+
 # Mount static files for dashboard
 if os.path.exists("dashboard"):
     app.mount("/dashboard", StaticFiles(directory="dashboard", html=True), name="dashboard")
 
-scraper = ToyotaCenterScraper()
+# Selenium, the scrapers and APScheduler are imported on first use so
+# read-only replicas never load them and cold starts stay short
+
+def load_scraper():
+    from scrapers.toyota_center_scraper import ToyotaCenterScraper
+    from scrapers.driver_pool import get_default_pool
+    return ToyotaCenterScraper(driver_pool=get_default_pool())
+
+def load_scheduler():
+    from utils.scheduler import start_monitoring, poller
+    start_monitoring()
+    return poller
+
+database = subsystem('database', init_db)
+scheduler = subsystem('scheduler', load_scheduler)
+scrapers = subsystem('scrapers', load_scraper, required=False)
+
+def get_scraper():
+    """Shared Toyota Center scraper, loaded by the first request that scrapes"""
+    return scrapers.get()
+
 axs_scraper = None  # Initialize only when needed
+axs_pool = None
+axs_scraper_lock = threading.Lock()
+# Seconds a finished /axs/check result is reused for the same URL
+AXS_CHECK_TTL = int(os.getenv("AXS_CHECK_TTL", "60"))
 
 class EventResponse(BaseModel):
     name: str
@@ -40,6 +97,7 @@ class EventResponse(BaseModel):
     
 class TicketResponse(BaseModel):
     section: str
+    row: Optional[str] = None
     price: float
     available: bool
     source: str
@@ -52,19 +110,34 @@ class PriceDropResponse(BaseModel):
     drop_percentage: float
     detected_at: datetime
 
+def start_scheduler():
+    try:
+        scheduler.get()
+    except Exception as e:
+        print(f"Failed to start monitoring: {e}")
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize background monitoring on startup"""
-    # Delay monitoring start to avoid initialization issues
-    import asyncio
-    async def delayed_start():
-        await asyncio.sleep(60)  # Wait 1 minute before starting monitoring
-        try:
-            start_monitoring()
-        except Exception as e:
-            print(f"Failed to start monitoring: {e}")
+    """Migrate the database, then start monitoring without holding up requests"""
+    database.get()
     
-    asyncio.create_task(delayed_start())
+    if os.getenv("SCRAPE_IN_API", "1") == "0":
+        scheduler.disable("SCRAPE_IN_API=0")
+        print("SCRAPE_IN_API=0: leaving scraping to standalone workers")
+        return
+
+    # Loading the scraper stack takes a while; /ready reports when it is up
+    asyncio.get_running_loop().run_in_executor(None, start_scheduler)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Quit pooled browsers so no Chrome processes outlive the API"""
+    # Only look up the pool if the scraper stack was loaded at all
+    driver_pool = sys.modules.get('scrapers.driver_pool')
+    if driver_pool is not None:
+        driver_pool.get_default_pool().close()
+    if axs_pool is not None:
+        axs_pool.close()
 
 @app.get("/")
 async def root():
@@ -73,88 +146,248 @@ async def root():
         return FileResponse("dashboard/index.html")
     return {"message": "Toyota Center Ticket Tracker API", "version": "1.0.0"}
 
-@app.get("/events", response_model=List[EventResponse])
-async def get_events():
-    """Get all upcoming events at Toyota Center"""
+@app.get("/ready")
+async def ready():
+    """503 until the database is migrated and the scheduler is running
+    (or disabled); includes each subsystem's state and load time"""
+    status = readiness()
+    return JSONResponse(status_code=200 if status['ready'] else 503, content=jsonable_encoder(status))
+
+@app.get("/health")
+async def health():
+    fetcher = sys.modules.get('scrapers.fetcher')
+    return {"status": "healthy", "timestamp": datetime.now(), "jobs": jobs.stats(), "stream": broadcaster.stats(),
+            "cache": response_cache.stats(), "fetchers": fetcher.fetcher_stats() if fetcher else {}}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of this process's metrics"""
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
+
+STREAM_KEEPALIVE_SECONDS = 15
+
+@app.get("/stream")
+async def stream_updates(request: Request):
+    """Server-Sent Events feed of committed changes.
+
+    Events: 'prices' (every listing of each changed (section, row) of one
+    event, replacing the ones shown before), 'drop' (one price drop
+    in the /price-drops shape), 'event' (newly discovered event) and 'resync'
+    (the client missed messages and should reload its lists).
+    """
+    last_event_id = request.headers.get("Last-Event-ID")
+    subscriber = broadcaster.subscribe(int(last_event_id) if last_event_id and last_event_id.isdigit() else None)
+
+    async def generate():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {message['id']}\nevent: {message['kind']}\ndata: {json.dumps(message['data'])}\n\n"
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(generate(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/scheduler")
+async def scheduler_decisions(recent: int = Query(20, ge=1, le=200)):
+    """Per-event polling schedule, scrape budget and the latest scheduler ticks"""
+    if scheduler.loaded:
+        return scheduler.value.snapshot(recent)
+    # No poller in this process: the schedule, budget and leases are all in the database
+    return dict(schedule_snapshot(), worker_id=None, lease_stats={}, recent_ticks=[])
+
+def cached_json(key, compute):
+    """Serve ``key`` from the response cache, or render ``compute()``'s
+    (result, tags) and cache it under those tags"""
+    cached = response_cache.get(key)
+    if cached is not MISS:
+        body, headers = cached
+        return Response(body, media_type="application/json", headers=headers)
+    token = response_cache.token()
+    result, tags = compute()
+    response = JSONResponse(jsonable_encoder(result))
+    response_cache.set(key, response.body, tags, token)
+    return response
+
+async def run_job(name, fn, *args, key=None, reuse_for=0):
+    """Run blocking work on the job pool and map failures to HTTP errors.
+    
+    Calls with the same ``key`` share one in-flight job (see JobManager.submit_once).
+    """
     try:
-        events = scraper.get_upcoming_events()
-        
-        db = SessionLocal()
-        for event in events:
-            existing = db.query(Event).filter(Event.event_name == event['name']).first()
-            if not existing:
-                db_event = Event(
-                    event_name=event['name'],
-                    event_date=datetime.now(),
-                    url=event['url']
-                )
-                db.add(db_event)
-        db.commit()
-        db.close()
-        
-        return events
+        if key is not None:
+            return await jobs.run_once(key, name, fn, *args, reuse_for=reuse_for)
+        return await jobs.run(name, fn, *args)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+discovery = DiscoveryCache(get_scraper)
+discovery_job = None
+
+def refresh_events_in_background():
+    global discovery_job
+    if discovery_job is not None and discovery_job.finished_at is None:
+        return
+    try:
+        discovery_job = jobs.submit('discover_events', discovery.refresh)
+    except QueueFull:
+        pass
+
+@app.get("/events", response_model=List[EventResponse])
+async def get_events():
+    """Get all upcoming events at Toyota Center
+    
+    Served from the discovery cache; a stale cache is returned as-is while
+    it is revalidated in the background.
+    """
+    events = discovery.cached()
+    if events is not None:
+        return events
+    if discovery.events is not None:
+        refresh_events_in_background()
+        return discovery.events
+    return await run_job('events', discovery.refresh)
+
+def scrape_event_tickets(event_name):
+    db = SessionLocal()
+    event = db.query(Event).filter(Event.event_name == event_name).first()
+    db.close()
+    
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+    
+    tickets = get_scraper().get_ticket_prices(event.url)
+    
+    db = SessionLocal()
+    ingest_snapshot(db, event.id, tickets)
+    db.close()
+    
+    return tickets.to_dicts()
+
 @app.get("/events/{event_name}/tickets", response_model=List[TicketResponse])
 async def get_ticket_prices(event_name: str):
     """Get current ticket prices for a specific event"""
-    try:
-        db = SessionLocal()
-        event = db.query(Event).filter(Event.event_name == event_name).first()
-        db.close()
-        
-        if not event:
-            raise HTTPException(status_code=404, detail="Event not found")
-        
-        tickets = scraper.get_ticket_prices(event.url)
-        
-        db = SessionLocal()
-        for ticket in tickets:
-            db_ticket = TicketPrice(
-                event_id=event.id,
-                section=ticket['section'],
-                price=ticket['price'],
-                availability=ticket['available'],
-                source=ticket['source']
-            )
-            db.add(db_ticket)
-        db.commit()
-        db.close()
-        
-        return tickets
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_job('tickets', scrape_event_tickets, event_name)
+
+MAX_PRICE_DROPS_PAGE = 1000
+DEFAULT_PRICE_DROPS_PAGE = 500
 
-@app.get("/price-drops", response_model=List[PriceDropResponse])
-async def get_price_drops(hours: int = 24):
-    """Get recent price drops within specified hours"""
+def encode_cursor(detected_at, drop_id):
+    raw = f"{detected_at.isoformat()}|{drop_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
     try:
-        db = SessionLocal()
-        from datetime import timedelta
-        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-        
-        drops = db.query(PriceDrop).filter(PriceDrop.detected_at >= cutoff_time).all()
-        db.close()
-        
-        response = []
-        for drop in drops:
+        detected_at, drop_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(detected_at), int(drop_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def price_drops_query(db, cutoff_time, event=None, section=None, min_percentage=None, after=None):
+    """Drops joined to their event name, newest first, starting after a keyset cursor"""
+    query = db.query(
+        PriceDrop.id,
+        func.coalesce(Event.event_name, 'Unknown').label('event'),
+        PriceDrop.section,
+        PriceDrop.old_price,
+        PriceDrop.new_price,
+        PriceDrop.drop_percentage,
+        PriceDrop.detected_at
+    ).outerjoin(Event, Event.id == PriceDrop.event_id).filter(PriceDrop.detected_at >= cutoff_time)
+    
+    if event:
+        query = query.filter(Event.event_name == event)
+    if section:
+        query = query.filter(PriceDrop.section == section)
+    if min_percentage is not None:
+        query = query.filter(PriceDrop.drop_percentage >= min_percentage)
+    if after:
+        after_at, after_id = after
+        query = query.filter(or_(
+            PriceDrop.detected_at < after_at,
+            and_(PriceDrop.detected_at == after_at, PriceDrop.id < after_id)
+        ))
+    
+    return query.order_by(PriceDrop.detected_at.desc(), PriceDrop.id.desc())
+
+@app.get("/price-drops", responses={200: {"model": List[PriceDropResponse]}})
+async def get_price_drops(hours: int = 24, event: Optional[str] = None, section: Optional[str] = None,
+                          min_percentage: Optional[float] = None,
+                          limit: Optional[int] = Query(None, ge=1, le=MAX_PRICE_DROPS_PAGE),
+                          cursor: Optional[str] = None):
+    """Get recent price drops within specified hours.
+    
+    Without ``limit`` or ``cursor`` every matching drop is returned, as before
+    paging existed. With either, drops come one keyset page at a time (``limit``
+    defaults to 500) and, when more match, the X-Next-Cursor header holds the
+    cursor for the next page.
+    """
+    key = ('price-drops', hours, event, section, min_percentage, limit, cursor)
+    cached = response_cache.get(key)
+    if cached is not MISS:
+        body, headers = cached
+        return Response(body, media_type="application/json", headers=headers)
+    token = response_cache.token()
+    
+    paged = limit is not None or cursor is not None
+    limit = limit or DEFAULT_PRICE_DROPS_PAGE
+    after = decode_cursor(cursor) if cursor else None
+    cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+    filters = dict(event=event, section=section, min_percentage=min_percentage, after=after)
+    
+    headers = {}
+    if paged:
+        try:
             db = SessionLocal()
-            event = db.query(Event).filter(Event.id == drop.event_id).first()
+            # Rows limit-1 and limit tell us the next cursor and whether there is another page
+            boundary = price_drops_query(db, cutoff_time, **filters).offset(limit - 1).limit(2).all()
             db.close()
-            
-            response.append({
-                'event': event.event_name if event else 'Unknown',
-                'section': drop.section,
-                'old_price': drop.old_price,
-                'new_price': drop.new_price,
-                'drop_percentage': drop.drop_percentage,
-                'detected_at': drop.detected_at
-            })
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
         
-        return response
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        if len(boundary) == 2:
+            headers['X-Next-Cursor'] = encode_cursor(boundary[0].detected_at, boundary[0].id)
+    
+    def stream():
+        # Chunks are kept so the finished page can be cached
+        chunks = []
+        db = SessionLocal()
+        try:
+            chunks.append('[')
+            yield chunks[-1]
+            rows = price_drops_query(db, cutoff_time, **filters)
+            if paged:
+                rows = rows.limit(limit)
+            rows = rows.yield_per(500)
+            for i, drop in enumerate(rows):
+                chunks.append((',' if i else '') + json.dumps({
+                    'event': drop.event,
+                    'section': drop.section,
+                    'old_price': drop.old_price,
+                    'new_price': drop.new_price,
+                    'drop_percentage': drop.drop_percentage,
+                    'detected_at': drop.detected_at.isoformat()
+                }))
+                yield chunks[-1]
+            chunks.append(']')
+            yield chunks[-1]
+        finally:
+            db.close()
+        response_cache.set(key, ''.join(chunks).encode(), ['drops'], token, headers)
+    
+    return StreamingResponse(stream(), media_type="application/json", headers=headers)
 
 @app.post("/monitor/{event_name}")
 async def start_monitoring_event(event_name: str, background_tasks: BackgroundTasks):
@@ -176,122 +409,231 @@ async def start_monitoring_event(event_name: str, background_tasks: BackgroundTa
 def monitor_event_prices(event):
     """Background task to monitor event prices"""
     try:
-        current_prices = scraper.get_ticket_prices(event.url)
+        current_prices = get_scraper().get_ticket_prices(event.url)
         
         db = SessionLocal()
-        for ticket in current_prices:
-            last_price = db.query(TicketPrice).filter(
-                TicketPrice.event_id == event.id,
-                TicketPrice.section == ticket['section']
-            ).order_by(TicketPrice.tracked_at.desc()).first()
-            
-            if last_price and ticket['price'] < last_price.price:
-                drop_percentage = ((last_price.price - ticket['price']) / last_price.price) * 100
-                
-                price_drop = PriceDrop(
-                    event_id=event.id,
-                    section=ticket['section'],
-                    old_price=last_price.price,
-                    new_price=ticket['price'],
-                    drop_percentage=drop_percentage
-                )
-                db.add(price_drop)
-            
-            new_price = TicketPrice(
-                event_id=event.id,
-                section=ticket['section'],
-                price=ticket['price'],
-                availability=ticket['available'],
-                source=ticket['source']
-            )
-            db.add(new_price)
-        
-        db.commit()
+        ingest_snapshot(db, event.id, current_prices)
         db.close()
     except Exception as e:
         print(f"Error monitoring prices: {e}")
 
-@app.get("/events/{event_name}/history")
-async def get_price_history(event_name: str, section: Optional[str] = None):
-    """Get historical price data for an event"""
+# Ranges up to RAW_HISTORY_HOURS are served from ticket_prices, up to
+# HOURLY_HISTORY_HOURS from hourly rollups, and anything longer from daily ones
+RAW_HISTORY_HOURS = 48
+HOURLY_HISTORY_HOURS = 24 * 31
+MAX_HISTORY_ROWS = 5000
+
+def history_resolution(hours):
+    if hours <= RAW_HISTORY_HOURS:
+        return 'raw'
+    if hours <= HOURLY_HISTORY_HOURS:
+        return 'hour'
+    return 'day'
+
+def load_price_history(event_name, section, hours, resolution):
+    """History points for an event and the cache tags they depend on"""
+    db = SessionLocal()
     try:
-        db = SessionLocal()
         event = db.query(Event).filter(Event.event_name == event_name).first()
         
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
         
-        query = db.query(TicketPrice).filter(TicketPrice.event_id == event.id)
-        
+        if hours is not None:
+            resolution = resolution or history_resolution(hours)
+        resolution = resolution or 'raw'
+        cutoff = datetime.utcnow() - timedelta(hours=hours) if hours else None
+        tags = [event_tag(event.id)]
+
+        if resolution == 'raw':
+            query = db.query(TicketPrice).filter(TicketPrice.event_id == event.id)
+            if section:
+                query = query.filter(TicketPrice.section == section)
+            if cutoff:
+                query = query.filter(func.coalesce(TicketPrice.last_seen_at, TicketPrice.tracked_at) >= cutoff)
+            limit = MAX_HISTORY_ROWS if hours else 100
+            history = query.order_by(TicketPrice.tracked_at.desc()).limit(limit).all()
+
+            return [{
+                'section': h.section,
+                'price': h.price,
+                'available': h.availability,
+                'tracked_at': h.tracked_at,
+                'last_seen_at': h.last_seen_at or h.tracked_at,
+                'resolution': 'raw'
+            } for h in history], tags
+
+        query = db.query(PriceRollup).filter(
+            PriceRollup.event_id == event.id,
+            PriceRollup.granularity == resolution
+        )
         if section:
-            query = query.filter(TicketPrice.section == section)
-        
-        history = query.order_by(TicketPrice.tracked_at.desc()).limit(100).all()
-        db.close()
-        
+            query = query.filter(PriceRollup.section == section)
+        if cutoff:
+            query = query.filter(PriceRollup.bucket_start >= bucket_start(cutoff, resolution))
+        buckets = query.order_by(PriceRollup.bucket_start.desc()).limit(MAX_HISTORY_ROWS).all()
+
+        step = GRANULARITIES[resolution]
         return [{
-            'section': h.section,
-            'price': h.price,
-            'available': h.availability,
-            'tracked_at': h.tracked_at
-        } for h in history]
+            'section': b.section,
+            'price': b.close_price,
+            'open': b.open_price,
+            'min': b.min_price,
+            'max': b.max_price,
+            'count': b.count,
+            'tracked_at': b.bucket_start,
+            'last_seen_at': b.bucket_start + step,
+            'resolution': resolution
+        } for b in buckets], tags
+    finally:
+        db.close()
+
+@app.get("/events/{event_name}/history")
+def get_price_history(
+    event_name: str,
+    section: Optional[str] = None,
+    hours: Optional[int] = Query(None, ge=1),
+    resolution: Optional[str] = Query(None, pattern="^(raw|hour|day)$")
+):
+    """Get historical price data for an event.
+
+    Without ``hours`` this is the newest 100 raw rows. With it, rows covering
+    the last ``hours`` hours at a resolution picked from the range unless
+    ``resolution`` overrides it; rollup points report the bucket's close as
+    ``price`` alongside open, min, max and count.
+    """
+    try:
+        return cached_json(('history', event_name, section, hours, resolution),
+                           lambda: load_price_history(event_name, section, hours, resolution))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/axs/check")
-async def check_axs_event(url: str):
-    """Check ticket prices for an AXS event URL"""
+def load_section_analytics(event_name, section, hours):
+    """Per-section analytics for an event and the cache tags they depend on"""
+    db = SessionLocal()
     try:
-        global axs_scraper
-        if axs_scraper is None:
-            from scrapers.axs_scraper import AXSScraper
-            axs_scraper = AXSScraper()
-        
-        ticket_data = axs_scraper.get_ticket_info(url)
+        event = db.query(Event).filter(Event.event_name == event_name).first()
         
-        # Store event if it has valid data
-        if ticket_data.get('event_info') and ticket_data.get('event_info').get('name'):
-            db = SessionLocal()
-            event_name = ticket_data['event_info']['name']
-            
-            existing = db.query(Event).filter(Event.event_name == event_name).first()
-            if not existing:
-                db_event = Event(
-                    event_name=event_name,
-                    event_date=datetime.now(),  # Parse actual date if available
-                    url=url,
-                    venue="Toyota Center"
-                )
-                db.add(db_event)
-                db.commit()
-                event_id = db_event.id
-            else:
-                event_id = existing.id
-            
-            # Store ticket prices
-            for ticket in ticket_data.get('tickets', []):
-                db_ticket = TicketPrice(
-                    event_id=event_id,
-                    section=ticket.get('section', 'General'),
-                    row=ticket.get('row', ''),
-                    price=ticket['price'],
-                    availability=ticket['available'],
-                    source='AXS'
-                )
-                db.add(db_ticket)
-            
-            db.commit()
-            db.close()
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
         
-        return ticket_data
+        return {
+            'event': event.event_name,
+            'hours': hours,
+            'sections': section_analytics(db, event.id, hours, section)
+        }, [event_tag(event.id)]
+    finally:
+        db.close()
+
+@app.get("/events/{event_name}/analytics")
+def get_section_analytics(
+    event_name: str,
+    section: Optional[str] = None,
+    hours: Optional[int] = Query(None, ge=1)
+):
+    """Per-section p10, median and p90 of available prices, the cheapest
+    available price and listings per scrape, over scrapes in the last
+    ``hours`` hours (all history without it)
+    """
+    try:
+        return cached_json(('analytics', event_name, section, hours),
+                           lambda: load_section_analytics(event_name, section, hours))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/axs/monitor/{event_name}")
-async def get_axs_monitoring_status(event_name: str):
-    """Get the current monitoring status and recent prices for an AXS event"""
-    try:
+def get_axs_scraper():
+    """Shared AXS scraper; each page leases one of AXS_BROWSERS pooled browsers"""
+    global axs_scraper, axs_pool
+    with axs_scraper_lock:
+        if axs_scraper is None:
+            from scrapers.axs_scraper import AXSScraper, undetected_chrome
+            from scrapers.driver_pool import DriverPool
+            axs_pool = DriverPool(
+                factory=undetected_chrome,
+                name='axs',
+                max_size=int(os.getenv("AXS_BROWSERS", "1")),
+                max_pages=int(os.getenv("DRIVER_MAX_PAGES", "50")),
+                max_age=int(os.getenv("DRIVER_MAX_AGE", "1800")),
+            )
+            axs_scraper = AXSScraper(driver_pool=axs_pool)
+        return axs_scraper
+
+def axs_check_key(url):
+    """Requests for the same page, ignoring whitespace and #fragments, share one scrape"""
+    return ('axs_check', urldefrag(url.strip())[0])
+
+def check_axs_url(url):
+    ticket_data = get_axs_scraper().get_ticket_info(url)
+    
+    # Store event if it has valid data
+    if ticket_data.get('event_info') and ticket_data.get('event_info').get('name'):
         db = SessionLocal()
+        event_name = ticket_data['event_info']['name']
+        
+        existing = db.query(Event).filter(Event.event_name == event_name).first()
+        if not existing:
+            db_event = Event(
+                event_name=event_name,
+                event_date=parse_event_date(ticket_data['event_info'].get('date')),
+                url=url,
+                venue="Toyota Center"
+            )
+            db.add(db_event)
+            db.commit()
+            event_id = db_event.id
+        else:
+            event_id = existing.id
+        
+        # Store ticket prices
+        ingest_snapshot(db, event_id, ticket_data.get('tickets', []), source='AXS')
+        db.close()
+    
+    return dict(ticket_data, tickets=ticket_data['tickets'].to_dicts())
+
+@app.post("/axs/check")
+async def check_axs_event(url: str, background: bool = False):
+    """Check ticket prices for an AXS event URL
+    
+    With background=true the scrape is queued and a job id is returned
+    immediately; poll /jobs/{job_id} or wait on /jobs/{job_id}/wait.
+    Concurrent checks of one URL share a single scrape, whose result is
+    reused for AXS_CHECK_TTL seconds.
+    """
+    if not background:
+        return await run_job('axs_check', check_axs_url, url, key=axs_check_key(url), reuse_for=AXS_CHECK_TTL)
+    
+    try:
+        job = jobs.submit_once(axs_check_key(url), 'axs_check', check_axs_url, url, reuse_for=AXS_CHECK_TTL)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    return JSONResponse(status_code=202, content=jsonable_encoder(job.to_dict()))
+
+def find_job(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Current status of a scrape job, with its result once done"""
+    return find_job(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/wait")
+async def wait_for_job(job_id: str, timeout: float = Query(30, ge=0, le=120)):
+    """Wait up to timeout seconds for a job; 202 if it is still running"""
+    job = find_job(job_id)
+    if not await jobs.wait(job, timeout):
+        return JSONResponse(status_code=202, content=jsonable_encoder(job.to_dict()))
+    return job.to_dict()
+
+def load_axs_monitoring_status(event_name):
+    db = SessionLocal()
+    try:
         event = db.query(Event).filter(Event.event_name == event_name).first()
         
         if not event:
@@ -303,8 +645,6 @@ async def get_axs_monitoring_status(event_name: str):
             TicketPrice.source == 'AXS'
         ).order_by(TicketPrice.tracked_at.desc()).limit(10).all()
         
-        db.close()
-        
         return {
             "event": event_name,
             "url": event.url,
@@ -315,10 +655,74 @@ async def get_axs_monitoring_status(event_name: str):
                 "available": p.availability,
                 "checked_at": p.tracked_at
             } for p in recent_prices]
-        }
+        }, [event_tag(event.id)]
+    finally:
+        db.close()
+
+@app.get("/axs/monitor/{event_name}")
+async def get_axs_monitoring_status(event_name: str):
+    """Get the current monitoring status and recent prices for an AXS event"""
+    try:
+        return cached_json(('axs-monitor', event_name), lambda: load_axs_monitoring_status(event_name))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/profiles")
+async def list_profiles(limit: int = Query(50, ge=1, le=500)):
+    """Stored profiling captures, newest first, and what is being captured"""
+    return {"config": profiler.config(), "captures": profiler.list(limit)}
+
+def profile_target(event, target):
+    """Scrape captures are keyed by event URL; 'sweep' and 'tick' select sweeps"""
+    if target:
+        return target
+    if not event:
+        raise HTTPException(status_code=400, detail="Pass event or target")
+    db = SessionLocal()
+    try:
+        found = db.query(Event).filter(Event.event_name == event).first()
+        if not found:
+            raise HTTPException(status_code=404, detail="Event not found")
+        return found.url
+    finally:
+        db.close()
+
+@app.post("/profiles/targets")
+async def enable_profiling(event: Optional[str] = None, target: Optional[str] = None):
+    """Capture every run of an event (by name) or target (URL, 'sweep' or 'tick') in this process"""
+    profiler.enable(profile_target(event, target))
+    return profiler.config()
+
+@app.delete("/profiles/targets")
+async def disable_profiling(event: Optional[str] = None, target: Optional[str] = None):
+    profiler.disable(profile_target(event, target))
+    return profiler.config()
+
+@app.put("/profiles/sample-rate")
+async def set_profile_sample_rate(rate: float = Query(..., ge=0, le=1)):
+    """Fraction of scrapes and sweeps captured at random in this process"""
+    profiler.sample_rate = rate
+    return profiler.config()
+
+@app.get("/profiles/{run_id}")
+async def get_profile(run_id: str):
+    """One capture's timeline and top functions by cumulative time"""
+    capture = profiler.load(run_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return capture
+
+@app.get("/profiles/{run_id}/download")
+async def download_profile(run_id: str, format: str = Query("prof", pattern="^(prof|json)$")):
+    """The raw pstats dump (format=prof) or the capture JSON"""
+    path = profiler.path(run_id, format)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=os.path.basename(path),
+                        media_type="application/octet-stream" if format == "prof" else "application/json")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Section analytics on a large history: the section_stats aggregate table
+against scanning ticket_prices
+
+Seeds a scratch SQLite database with ``--rows`` ticket_prices rows spread
+over the scrapes of ``--days`` days for one event, stored in full (one row
+per listing per scrape), builds section_stats from them, then
+times /events/{name}/analytics's query for each window. The baseline reads
+the window's raw rows and computes the same statistics in Python, which is
+what analysts paging through /history ended up doing.
+
+    python -m benchmarks.bench_analytics --rows 2000000 --days 30
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def seed(engine, rows, days, sections, now, seed_value, price_points):
+    from models.database import Event, TicketPrice
+    rng = random.Random(seed_value)
+    # Arena inventories repeat a few price levels per section
+    levels = {section: [round(rng.uniform(40, 900), 2) for _ in range(price_points)] for section in sections}
+    start = now - timedelta(days=days)
+    span = days * 86400
+    scrapes = [start + timedelta(seconds=rng.random() * span) for _ in range(max(1, rows // 500))]
+    with engine.begin() as conn:
+        conn.execute(Event.__table__.insert(), [{'event_name': 'Benchmark', 'url': 'bench', 'venue': 'Toyota Center'}])
+        batch = []
+        for i in range(rows):
+            section = sections[i % len(sections)]
+            batch.append({
+                'event_id': 1,
+                'section': section,
+                'row': chr(65 + rng.randrange(26)),
+                'price': rng.choice(levels[section]),
+                'availability': rng.random() > 0.1,
+                'source': 'Toyota Center',
+                'tracked_at': rng.choice(scrapes),
+            })
+            if len(batch) == 50000:
+                conn.execute(TicketPrice.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(TicketPrice.__table__.insert(), batch)
+
+
+def scan_history(db, cutoff):
+    """Per-section listings per scrape and percentiles straight from the
+    window's ticket_prices rows"""
+    from sqlalchemy import select
+    from models.database import TicketPrice
+    from utils.section_stats import _percentiles
+    from collections import Counter
+    prices = TicketPrice.__table__
+    query = select(prices.c.section, prices.c.price, prices.c.availability, prices.c.tracked_at).where(
+        prices.c.event_id == 1)
+    if cutoff is not None:
+        query = query.where(prices.c.tracked_at >= cutoff)
+    sections = {}
+    for section, price, available, tracked_at in db.execute(query):
+        s = sections.setdefault(section, {'listings': 0, 'available': 0, 'cheapest': None, 'prices': Counter(),
+                                          'scrapes': set()})
+        s['listings'] += 1
+        s['scrapes'].add(tracked_at)
+        if available is not False:
+            s['available'] += 1
+            s['prices'][int(round(price * 100))] += 1
+            if s['cheapest'] is None or price < s['cheapest']:
+                s['cheapest'] = price
+    return {name: dict(_percentiles(s['prices']), listings=round(s['listings'] / len(s['scrapes']), 1))
+            for name, s in sections.items()}
+
+
+def median_time(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--sections", type=int, default=60)
+    parser.add_argument("--price-points", type=int, default=50,
+                        help="distinct prices per section; histogram size grows with this")
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 24, 24 * 7, 0],
+                        help="window sizes in hours; 0 means all history")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    scratch = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch.name, 'analytics.db')}"
+    sys.path.insert(0, os.getcwd())
+    from models.database import engine, SessionLocal
+    from models.migrations import init_db
+    from utils.section_stats import section_analytics, rebuild
+
+    init_db()
+    now = datetime.utcnow()
+    sections = [str(101 + i) for i in range(args.sections)]
+    start = time.perf_counter()
+    seed(engine, args.rows, args.days, sections, now, args.seed, args.price_points)
+    print(f"Seeded {args.rows} rows in {time.perf_counter() - start:.1f}s")
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        buckets = rebuild(conn, now)
+    print(f"Built {buckets} section_stats rows in {time.perf_counter() - start:.1f}s\n")
+
+    db = SessionLocal()
+    print(f"{'window':>8} {'scan rows':>10} {'section_stats':>14}")
+    for hours in args.windows:
+        cutoff = now - timedelta(hours=hours) if hours else None
+        stats = section_analytics(db, 1, hours or None, now=now)
+        if hours == 0:
+            scanned = scan_history(db, None)
+            assert {s['section']: {k: s[k] for k in ('p10', 'median', 'p90', 'listings')} for s in stats} == scanned, \
+                "section_stats disagrees with a full scan"
+        a = median_time(lambda: scan_history(db, cutoff), args.repeats)
+        b = median_time(lambda: section_analytics(db, 1, hours or None, now=now), args.repeats)
+        label = f"{hours}h" if hours else "all"
+        print(f"{label:>8} {a * 1000:8.1f}ms {b * 1000:12.1f}ms  {a / b:6.1f}x")
+    db.close()
+    scratch.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Price-change detection: diff_snapshots against the per-ticket dict loop the
+detection sites used before
+
+Builds a synthetic previous/current pair of arena inventories in which a
+share of keys drop, rise, sell out, appear or disappear. Both sides start
+from TicketSnapshots and must produce the same drops and changed keys. The
+loop keeps one listing per key, so sections that list several tickets under
+one key are checked separately against known drops.
+
+    python -m benchmarks.bench_diff --listings 1000 10000 100000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from scrapers.diff import diff_snapshots
+from scrapers.snapshot import TicketSnapshot
+from utils.current_prices import price_key
+
+SECTIONS = [str(s) for s in list(range(101, 129)) + list(range(301, 329))] + ['Floor A', 'Floor B']
+ROWS = [chr(c) for c in range(ord('A'), ord('Z') + 1)]
+
+
+def inventory_pair(count, seed):
+    """Previous and current snapshots with ``count`` listings each"""
+    rng = random.Random(seed)
+    seats = max(1, count // (len(SECTIONS) * len(ROWS)))
+    keys = [(section, f"{row}{seat}") for section in SECTIONS for row in ROWS for seat in range(seats)]
+    rng.shuffle(keys)
+    previous, current = TicketSnapshot('Toyota Center'), TicketSnapshot('Toyota Center')
+    for section, row in keys[:count]:
+        price, available = round(rng.uniform(40, 900), 2), rng.random() > 0.1
+        previous.append(section, price, available, row)
+        roll = rng.random()
+        if roll < 0.05:
+            continue                                 # removed
+        if roll < 0.15:
+            price = round(price * rng.uniform(0.6, 0.95), 2)
+        elif roll < 0.25:
+            price = round(price * rng.uniform(1.05, 1.4), 2)
+        elif roll < 0.30:
+            available = not available
+        current.append(section, price, available, row)
+    for section, row in keys[count:count + count // 20]:
+        current.append(section, round(rng.uniform(40, 900), 2), True, row)
+    return previous, current
+
+
+def loop_diff(previous, current):
+    """The old shape: index the previous scrape by key, then walk every ticket"""
+    last = {}
+    for section, row, price, available in previous.records():
+        last[price_key(section, row)] = (price, available)
+    drops, changed, seen = [], set(), set()
+    for section, row, price, available in current.records():
+        key = price_key(section, row)
+        seen.add(key)
+        before = last.get(key)
+        if before and before[0] and price < before[0]:
+            drops.append({'section': key[0], 'row': key[1], 'old_price': before[0], 'new_price': price,
+                          'drop_percentage': (before[0] - price) / before[0] * 100})
+        if before != (price, available):
+            changed.add(key)
+    return drops, changed | (set(last) - seen)
+
+
+# (previous prices, current prices, expected (old, new) drops) for one
+# section whose listings have no row, as on the Toyota Center pages
+MULTI_LISTING_CASES = [
+    ([50, 70], [40, 70], [(50, 40)]),
+    ([50, 70], [70, 40], [(50, 40)]),
+    ([50, 70], [45, 65], [(50, 45), (70, 65)]),
+    ([50, 50, 80], [50, 80], []),
+    ([50, 80], [50, 50, 80], []),
+    ([50, 70], [60, 70], []),
+]
+
+
+def check_multi_listing():
+    for before, after, expected in MULTI_LISTING_CASES:
+        previous, current = TicketSnapshot('Toyota Center'), TicketSnapshot('Toyota Center')
+        for price in before:
+            previous.append('101', price)
+        for price in after:
+            current.append('101', price)
+        drops = sorted((d['old_price'], d['new_price']) for d in diff_snapshots(previous, current).drops())
+        assert drops == expected, f"{before} -> {after}: drops {drops}, expected {expected}"
+
+
+def vector_diff(previous, current):
+    diff = diff_snapshots(previous, current)
+    return diff.drops(), diff.changed_keys()
+
+
+def median_time(fn, args, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    check_multi_listing()
+    print(f"{'listings':>9} {'drops':>7} {'loop':>10} {'vectorized':>11}")
+    for count in args.listings:
+        previous, current = inventory_pair(count, args.seed)
+        loop_drops, loop_changed = loop_diff(previous, current)
+        drops, changed = vector_diff(previous, current)
+        key = lambda d: (d['section'], d['row'])
+        assert sorted(loop_drops, key=key) == sorted(drops, key=key), "drops differ from the loop"
+        assert loop_changed == changed, "changed keys differ from the loop"
+        a = median_time(loop_diff, (previous, current), args.repeats)
+        b = median_time(vector_diff, (previous, current), args.repeats)
+        print(f"{count:>9} {len(drops):>7} {a * 1000:8.2f}ms {b * 1000:9.2f}ms  {a / b:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
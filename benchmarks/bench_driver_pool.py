@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Compare cold-start and pooled Chrome latency for ToyotaCenterScraper
+
+Run from the repository root:
+    python -m benchmarks.bench_driver_pool --urls 50
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks.fixture_server import serve_fixtures
+from scrapers.driver_pool import DriverPool
+from scrapers.toyota_center_scraper import ToyotaCenterScraper
+
+
+def run(pool, urls):
+    """Scrape every URL through the pool and return per-URL latencies"""
+    scraper = ToyotaCenterScraper(driver_pool=pool)
+    timings = []
+    for url in urls:
+        start = time.perf_counter()
+        scraper.get_ticket_prices_with_browser(url)
+        timings.append(time.perf_counter() - start)
+    pool.close()
+    return timings
+
+
+def report(label, timings):
+    ordered = sorted(timings)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(f"{label:8} total={sum(timings):8.2f}s  mean={statistics.mean(timings):6.3f}s  "
+          f"p50={statistics.median(timings):6.3f}s  p95={p95:6.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--urls", type=int, default=50, help="number of event URLs to scrape")
+    args = parser.parse_args()
+
+    with serve_fixtures() as base_url:
+        urls = [f"{base_url}/toyota_center_event.html?event={i}" for i in range(args.urls)]
+
+        # max_pages=1 recycles the browser after every page, which is exactly
+        # the old start-scrape-quit behaviour.
+        cold = run(DriverPool(max_size=1, max_pages=1), urls)
+        pooled = run(DriverPool(max_size=1), urls)
+
+    print(f"Scraped {len(urls)} fixture URLs")
+    report("cold", cold)
+    report("pooled", pooled)
+    print(f"Speedup: {sum(cold) / sum(pooled):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Per-element WebDriver extraction vs the single injected extraction script
+
+Loads a saved 800-listing inventory page in headless Chrome and times both
+ways of reading the listings, then checks they parse to the same tickets.
+
+    python -m benchmarks.bench_extraction --repeats 5
+"""
+
+import argparse
+import statistics
+import time
+
+from selenium.webdriver.common.by import By
+
+from benchmarks.fixture_server import serve_fixtures
+from scrapers.driver_pool import headless_chrome
+from scrapers.axs_scraper import AXSScraper, LISTING_SELECTOR
+from scrapers.extraction import extract_listing_records
+
+
+def per_element_records(driver):
+    """The old way: one round trip for .text and two for the parent, per node"""
+    records = []
+    for element in driver.find_elements(By.CSS_SELECTOR, LISTING_SELECTOR):
+        records.append({
+            'text': element.text,
+            'parent_text': element.find_element(By.XPATH, '..').text,
+            'attributes': {}
+        })
+    return records
+
+
+def timed(fn, driver, repeats):
+    timings, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(driver)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    scraper = AXSScraper()
+    driver = headless_chrome()
+    try:
+        with serve_fixtures() as base_url:
+            driver.get(f"{base_url}/axs_inventory_large.html")
+            old_time, old_records = timed(per_element_records, driver, args.repeats)
+            new_time, new_records = timed(lambda d: extract_listing_records(d, LISTING_SELECTOR), driver, args.repeats)
+    finally:
+        driver.quit()
+
+    old_tickets = scraper.parse_listing_records(old_records)
+    new_tickets = scraper.parse_listing_records(new_records)
+    assert old_tickets == new_tickets, "extraction methods disagree"
+
+    print(f"{len(new_records)} nodes, {len(new_tickets)} tickets")
+    print(f"per-element  p50={old_time * 1000:9.1f} ms")
+    print(f"one script   p50={new_time * 1000:9.1f} ms")
+    print(f"Speedup: {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Compare the HTTP structured-data tier with the browser tier on saved pages
+
+Checks that every saved page with embedded JSON is served by the HTTP tier
+with the expected listings, then times both tiers. The browser tier needs
+Chrome; pass --no-browser to time the HTTP tier only.
+
+    python -m benchmarks.bench_fetch_tiers --repeats 20
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks.fixture_server import serve_fixtures
+from scrapers.fetcher import TieredFetcher
+
+# page -> (expected tier, expected listings, expected sold out)
+PAGES = {
+    'axs_event_ldjson.html': ('http', 6, 1),
+    'axs_event_next_data.html': ('http', 8, 1),
+    'toyota_center_event_state.html': ('http', 4, 1),
+    'toyota_center_event.html': ('browser', None, None),
+}
+
+
+def check_extraction(base_url):
+    fetcher = TieredFetcher(enabled=True)
+    for page, (tier, listings, sold_out) in PAGES.items():
+        data, served_by = fetcher.fetch(f"{base_url}/{page}", lambda url: {'tickets': []})
+        assert served_by == tier, f"{page}: served by {served_by}, expected {tier}"
+        if listings is not None:
+            tickets = data['tickets']
+            assert len(tickets) == listings, f"{page}: {len(tickets)} listings, expected {listings}"
+            assert sum(not t['available'] for t in tickets) == sold_out, f"{page}: wrong sold-out count"
+            assert data['event_info'].get('name') or page.startswith('toyota'), f"{page}: no event name"
+        print(f"ok  {page:34} {served_by}")
+
+
+def time_tier(label, fetch, urls, repeats):
+    timings = []
+    for _ in range(repeats):
+        for url in urls:
+            start = time.perf_counter()
+            fetch(url)
+            timings.append((time.perf_counter() - start) * 1000)
+    print(f"{label:8} p50={statistics.median(timings):9.2f} ms  mean={statistics.mean(timings):9.2f} ms  "
+          f"({len(timings)} fetches)")
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--no-browser", action="store_true", help="skip the Selenium tier")
+    args = parser.parse_args()
+
+    with serve_fixtures() as base_url:
+        check_extraction(base_url)
+
+        urls = [f"{base_url}/{page}" for page, (tier, _, _) in PAGES.items() if tier == 'http']
+        fetcher = TieredFetcher(enabled=True)
+        http_p50 = time_tier("http", fetcher.fetch_structured, urls, args.repeats)
+
+        if not args.no_browser:
+            from scrapers.axs_scraper import AXSScraper
+            scraper = AXSScraper()
+            try:
+                browser_p50 = time_tier("browser", scraper.get_ticket_info_with_browser, urls, max(1, args.repeats // 5))
+            finally:
+                scraper.close()
+            print(f"HTTP tier is {browser_p50 / http_p50:.0f}x faster at p50")
+
+
+if __name__ == "__main__":
+    main()
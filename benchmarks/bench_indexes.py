@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Time the /events/{name}/history and /price-drops queries before and after
+the composite index migration on a seeded history table
+
+Run from the repository root (the database is created from scratch):
+    DATABASE_URL=sqlite:///./bench_indexes.db python -m benchmarks.bench_indexes --rows 10000000
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from models.database import engine, Base, Event, TicketPrice, PriceDrop
+from models.migrations import upgrade
+
+EVENTS = 200
+SECTIONS = [str(s) for s in list(range(101, 129)) + list(range(301, 329))]
+DAYS = 90
+BATCH = 50000
+# The only indexes the tables had before the composite index migration
+LEGACY_INDEXES = {'ix_ticket_prices_id', 'ix_ticket_prices_event_id', 'ix_price_drops_id', 'ix_price_drops_event_id'}
+
+
+def reset_schema():
+    """Old-style schema: base tables only, none of the composite indexes"""
+    Base.metadata.drop_all(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS schema_migrations")
+    upgrade(engine, target=1)
+    with engine.begin() as conn:
+        for model in (TicketPrice, PriceDrop):
+            for index in model.__table__.indexes:
+                if index.name not in LEGACY_INDEXES:
+                    index.drop(conn, checkfirst=True)
+
+
+def seed(rows):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    span = DAYS * 86400
+    with engine.begin() as conn:
+        conn.execute(Event.__table__.insert(), [
+            {'id': i, 'event_name': f'Event {i}', 'event_date': now, 'url': f'https://www.toyotacenter.com/events/{i}'}
+            for i in range(1, EVENTS + 1)
+        ])
+    written = 0
+    while written < rows:
+        count = min(BATCH, rows - written)
+        prices, drops = [], []
+        for _ in range(count):
+            event_id = rng.randint(1, EVENTS)
+            section = rng.choice(SECTIONS)
+            tracked_at = now - timedelta(seconds=rng.randint(0, span))
+            price = round(rng.uniform(30, 400), 2)
+            prices.append({
+                'event_id': event_id, 'section': section, 'price': price, 'availability': True,
+                'source': 'AXS' if rng.random() < 0.5 else 'Toyota Center', 'tracked_at': tracked_at
+            })
+            if rng.random() < 0.02:
+                drops.append({
+                    'event_id': event_id, 'section': section, 'old_price': price * 1.1, 'new_price': price,
+                    'drop_percentage': 9.09, 'detected_at': tracked_at
+                })
+        with engine.begin() as conn:
+            conn.execute(TicketPrice.__table__.insert(), prices)
+            if drops:
+                conn.execute(PriceDrop.__table__.insert(), drops)
+        written += count
+        print(f"  seeded {written:,}/{rows:,} rows", end="\r")
+    print()
+
+
+def history_query(conn, event_id, section):
+    query = select(TicketPrice).where(TicketPrice.event_id == event_id)
+    if section:
+        query = query.where(TicketPrice.section == section)
+    return conn.execute(query.order_by(TicketPrice.tracked_at.desc()).limit(100)).all()
+
+
+def drops_query(conn, hours=24):
+    cutoff = datetime.utcnow() - timedelta(hours=hours)
+    drops = conn.execute(select(PriceDrop).where(PriceDrop.detected_at >= cutoff)).all()
+    event_ids = {d.event_id for d in drops}
+    conn.execute(select(Event).where(Event.id.in_(event_ids))).all()
+    return drops
+
+
+def measure(label, repeats):
+    rng = random.Random(7)
+    results = {}
+    with engine.connect() as conn:
+        for name, run in (
+            ('history', lambda: history_query(conn, rng.randint(1, EVENTS), None)),
+            ('history?section', lambda: history_query(conn, rng.randint(1, EVENTS), rng.choice(SECTIONS))),
+            ('price-drops', lambda: drops_query(conn)),
+        ):
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = statistics.median(timings)
+            print(f"{label:7} {name:16} p50={results[name]:10.2f} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    if 'bench' not in (engine.url.database or ''):
+        raise SystemExit("Refusing to drop tables: point DATABASE_URL at a database with 'bench' in its name")
+
+    reset_schema()
+    print(f"Seeding {args.rows:,} ticket_prices rows into {engine.url}")
+    seed(args.rows)
+
+    before = measure("before", args.repeats)
+    start = time.perf_counter()
+    upgrade(engine, target=2)
+    print(f"Migration took {time.perf_counter() - start:.1f}s")
+    after = measure("after", args.repeats)
+
+    for name in before:
+        print(f"{name:16} {before[name] / max(after[name], 1e-6):8.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
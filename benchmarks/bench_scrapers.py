@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Offline scraper throughput benchmark
+
+Serves the recorded pages in benchmarks/fixtures from a local stand-in for
+the venue and AXS sites (with optional per-response delay) and measures
+pages/sec, p50/p99 latency, CPU time and memory for:
+
+    toyota_http     ToyotaCenterScraper.get_ticket_prices, embedded-JSON tier
+    toyota_browser  ToyotaCenterScraper.get_ticket_prices_with_browser
+    axs_http        AXSScraper.get_ticket_info, embedded-JSON tier
+    axs_browser     AXSScraper with pooled browsers on the 800-listing page
+    discovery       ToyotaCenterScraper.get_upcoming_events on /events
+    sweep           utils.scheduler.check_all_events into a scratch SQLite DB
+
+Browser scenarios need Chrome and are skipped with --no-browser; AXS pages
+use plain headless Chrome here since there is no bot check to get past.
+CPU and memory are for this Python process only, not the browsers.
+
+Results are written to benchmarks/results/ and compared with the previous
+run, flagging throughput or p99 changes beyond --tolerance.
+
+    python -m benchmarks.bench_scrapers --pages 50 --delay 0.05 --no-browser
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks.fixture_server import serve_fixtures
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+BROWSER_SCENARIOS = ('toyota_browser', 'axs_browser')
+
+
+def rss_mb():
+    """Current resident set size, falling back to the peak where /proc is missing"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+
+def timed_pages(fetch, urls, concurrency):
+    """Fetch every URL on ``concurrency`` threads; returns per-page latencies"""
+    def one(url):
+        start = time.perf_counter()
+        fetch(url)
+        return time.perf_counter() - start
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(one, urls))
+
+
+def measure(name, run):
+    """Run a scenario and summarize its latencies with CPU and memory use"""
+    rss_before = rss_mb()
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    latencies, extra = run()
+    cpu = time.process_time() - cpu_start
+    # Scenarios with their own setup report the wall time of the timed part
+    wall = extra.pop('wall_seconds', time.perf_counter() - start)
+    result = {
+        'pages': len(latencies),
+        'wall_seconds': round(wall, 3),
+        'pages_per_sec': round(len(latencies) / wall, 2) if wall else None,
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'cpu_seconds': round(cpu, 3),
+        'rss_mb': round(rss_mb(), 1),
+        'rss_delta_mb': round(rss_mb() - rss_before, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    result.update(extra)
+    print(f"{name:15} {result['pages']:5} pages  {result['pages_per_sec'] or 0:8.2f}/s  "
+          f"p50={result['p50_ms']:8.1f} ms  p99={result['p99_ms']:8.1f} ms  "
+          f"cpu={result['cpu_seconds']:6.2f}s  rss={result['rss_mb']:6.1f} MB")
+    return result
+
+
+def toyota_http(base_url, args):
+    from scrapers.toyota_center_scraper import ToyotaCenterScraper
+    scraper = ToyotaCenterScraper()
+    urls = [f"{base_url}/toyota_center_event_state.html?event={i}" for i in range(args.pages)]
+    return timed_pages(scraper.get_ticket_prices, urls, args.concurrency), {}
+
+
+def toyota_browser(base_url, args):
+    from scrapers.driver_pool import DriverPool
+    from scrapers.toyota_center_scraper import ToyotaCenterScraper
+    pool = DriverPool(max_size=args.concurrency)
+    scraper = ToyotaCenterScraper(driver_pool=pool)
+    urls = [f"{base_url}/toyota_center_event.html?event={i}" for i in range(args.pages)]
+    try:
+        return timed_pages(scraper.get_ticket_prices_with_browser, urls, args.concurrency), {}
+    finally:
+        pool.close()
+
+
+def axs_http(base_url, args):
+    from scrapers.axs_scraper import AXSScraper
+    scraper = AXSScraper()
+    pages = ('axs_event_ldjson.html', 'axs_event_next_data.html')
+    urls = [f"{base_url}/{pages[i % 2]}?event={i}" for i in range(args.pages)]
+    return timed_pages(scraper.get_ticket_info, urls, args.concurrency), {}
+
+
+def axs_browser(base_url, args):
+    from scrapers.driver_pool import DriverPool, headless_chrome
+    from scrapers.axs_scraper import AXSScraper
+    pool = DriverPool(factory=headless_chrome, max_size=args.concurrency)
+    scraper = AXSScraper(driver_pool=pool)
+    urls = [f"{base_url}/axs_inventory_large.html?event={i}" for i in range(args.pages)]
+    try:
+        return timed_pages(scraper.get_ticket_info_with_browser, urls, args.concurrency), {}
+    finally:
+        pool.close()
+
+
+def discovery(base_url, args):
+    from scrapers.toyota_center_scraper import ToyotaCenterScraper
+    scraper = ToyotaCenterScraper()
+    scraper.base_url = base_url
+    latencies, found = [], 0
+    for _ in range(args.pages):
+        start = time.perf_counter()
+        found = len(scraper.get_upcoming_events())
+        latencies.append(time.perf_counter() - start)
+    return latencies, {'events_per_page': found}
+
+
+def sweep(base_url, args):
+    # models.database reads DATABASE_URL on import, so main() points it at a
+    # scratch database before this runs
+    from models.database import SessionLocal, Event
+    from models.migrations import init_db
+    from utils.scheduler import check_all_events
+
+    init_db()
+    db = SessionLocal()
+    try:
+        db.query(Event).delete()
+        db.add_all([Event(event_name=f"Bench event {i}", url=f"{base_url}/{args.sweep_page}?event={i}")
+                    for i in range(args.pages)])
+        db.commit()
+    finally:
+        db.close()
+
+    latencies, walls, failed = [], [], 0
+    for _ in range(args.sweeps):
+        report = check_all_events(workers=args.workers)
+        latencies.extend(e['seconds'] for e in report['events'])
+        walls.append(report['wall_time'])
+        failed += report['failed']
+    return latencies, {'sweeps': args.sweeps, 'workers': args.workers, 'failed': failed,
+                       'sweep_wall_seconds': walls, 'wall_seconds': sum(walls)}
+
+
+SCENARIOS = {
+    'toyota_http': toyota_http,
+    'toyota_browser': toyota_browser,
+    'axs_http': axs_http,
+    'axs_browser': axs_browser,
+    'discovery': discovery,
+    'sweep': sweep,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def latest_result(exclude=None):
+    runs = sorted(p for p in glob.glob(os.path.join(RESULTS_DIR, "scrapers-*.json")) if p != exclude)
+    return runs[-1] if runs else None
+
+
+def compare(current, baseline_path, tolerance):
+    """Print changes against a previous run; returns the regressed scenarios"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {os.path.basename(baseline_path)} ({baseline.get('git_commit')}):")
+    regressions = []
+    for name, result in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if not before or not before.get('pages_per_sec') or not result.get('pages_per_sec'):
+            continue
+        throughput = (result['pages_per_sec'] - before['pages_per_sec']) / before['pages_per_sec'] * 100
+        p99 = (result['p99_ms'] - before['p99_ms']) / before['p99_ms'] * 100 if before['p99_ms'] else 0
+        regressed = throughput < -tolerance or p99 > tolerance
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:15} pages/s {throughput:+7.1f}%  p99 {p99:+7.1f}%{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50, help="pages (or events, for the sweep) per scenario")
+    parser.add_argument("--concurrency", type=int, default=1, help="threads for the page scenarios")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds the local server holds each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay, up to this many seconds")
+    parser.add_argument("--workers", type=int, default=2, help="sweep workers")
+    parser.add_argument("--sweeps", type=int, default=3, help="sweeps to run; later ones hit the change-only path")
+    parser.add_argument("--sweep-page", default="toyota_center_event_state.html",
+                        help="fixture every sweep event points at")
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="run just these scenarios")
+    parser.add_argument("--no-browser", action="store_true", help="skip scenarios that need Chrome")
+    parser.add_argument("--database", help="DATABASE_URL for the sweep (default: a scratch SQLite file)")
+    parser.add_argument("--output", help="where to write results (default: benchmarks/results/)")
+    parser.add_argument("--baseline", help="results file to compare with (default: the previous run)")
+    parser.add_argument("--tolerance", type=float, default=10.0, help="percent change reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 when a scenario regresses")
+    args = parser.parse_args()
+
+    scratch = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.database or f"sqlite:///{os.path.join(scratch.name, 'bench.db')}"
+
+    names = args.only or list(SCENARIOS)
+    if args.no_browser:
+        names = [n for n in names if n not in BROWSER_SCENARIOS]
+
+    results = {}
+    with serve_fixtures(delay=args.delay, jitter=args.jitter) as base_url:
+        for name in names:
+            results[name] = measure(name, lambda: SCENARIOS[name](base_url, args))
+
+    run = {
+        'run_at': datetime.utcnow().isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'args': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')},
+        'scenarios': results,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"scrapers-{datetime.utcnow():%Y%m%d-%H%M%S}.json")
+    with open(output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nSaved {output}")
+
+    baseline = args.baseline or latest_result(exclude=os.path.abspath(output))
+    regressions = compare(run, baseline, args.tolerance) if baseline else []
+    scratch.cleanup()
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
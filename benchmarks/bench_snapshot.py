@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Memory and speed of TicketSnapshot against the list of ticket dicts the
+scrapers used to return
+
+Builds synthetic arena inventories, then measures retained memory
+(tracemalloc) and the median time to build, sort by price, take min/max,
+group by section and serialize to the API's JSON shape.
+
+    python -m benchmarks.bench_snapshot --listings 20000 --snapshots 50
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from scrapers.snapshot import TicketSnapshot
+
+SECTIONS = [str(s) for s in list(range(101, 129)) + list(range(301, 329))] + ['Floor A', 'Floor B']
+ROWS = [chr(c) for c in range(ord('A'), ord('Z') + 1)]
+
+
+def raw_listings(count, seed):
+    """Parsed (section, row, price, available) tuples, as a scraper sees them"""
+    rng = random.Random(seed)
+    return [(rng.choice(SECTIONS), rng.choice(ROWS), round(rng.uniform(40, 900), 2), rng.random() > 0.1)
+            for _ in range(count)]
+
+
+def build_dicts(raw):
+    # Strings are copied as a parser would produce them, not shared constants
+    return [{'section': ''.join(section), 'row': ''.join(row), 'price': price, 'available': available,
+             'source': 'Toyota Center'} for section, row, price, available in raw]
+
+
+def build_snapshot(raw):
+    snapshot = TicketSnapshot('Toyota Center')
+    for section, row, price, available in raw:
+        snapshot.append(''.join(section), price, available, ''.join(row))
+    return snapshot
+
+
+def group_dicts(tickets):
+    groups = {}
+    for t in tickets:
+        g = groups.setdefault(t['section'], {'count': 0, 'available': 0, 'min': t['price'], 'max': t['price']})
+        g['count'] += 1
+        g['available'] += t['available']
+        g['min'] = min(g['min'], t['price'])
+        g['max'] = max(g['max'], t['price'])
+    return groups
+
+
+OPERATIONS = {
+    'build': (build_dicts, build_snapshot),
+    'sort': (lambda t: sorted(t, key=lambda x: x['price']), lambda s: s.sorted_by_price()),
+    'min/max': (lambda t: (min(x['price'] for x in t), max(x['price'] for x in t)),
+                lambda s: (s.min_price(), s.max_price())),
+    'by section': (group_dicts, lambda s: s.by_section()),
+    'to JSON': (json.dumps, lambda s: json.dumps(s.to_dicts())),
+}
+
+
+def retained_bytes(build, raws):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [build(raw) for raw in raws]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def median_time(fn, arg, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(arg)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=20000, help="listings per snapshot")
+    parser.add_argument("--snapshots", type=int, default=20, help="snapshots held at once for the memory test")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    raws = [raw_listings(args.listings, seed) for seed in range(args.snapshots)]
+    dict_bytes = retained_bytes(build_dicts, raws)
+    snapshot_bytes = retained_bytes(build_snapshot, raws)
+    print(f"{args.snapshots} snapshots x {args.listings} listings held in memory:")
+    print(f"  dicts     {dict_bytes / 1024 / 1024:8.1f} MB  ({dict_bytes / (args.snapshots * args.listings):6.0f} B/listing)")
+    print(f"  snapshot  {snapshot_bytes / 1024 / 1024:8.1f} MB  ({snapshot_bytes / (args.snapshots * args.listings):6.0f} B/listing)")
+    print(f"  {dict_bytes / snapshot_bytes:.1f}x smaller\n")
+
+    raw = raws[0]
+    tickets, snapshot = build_dicts(raw), build_snapshot(raw)
+    assert snapshot.to_dicts() == tickets, "snapshot does not round-trip to the dict shape"
+    print(f"{'operation':12} {'dicts':>10} {'snapshot':>10}")
+    for name, (with_dicts, with_snapshot) in OPERATIONS.items():
+        arg_dicts, arg_snapshot = (raw, raw) if name == 'build' else (tickets, snapshot)
+        a = median_time(with_dicts, arg_dicts, args.repeats)
+        b = median_time(with_snapshot, arg_snapshot, args.repeats)
+        print(f"{name:12} {a * 1000:8.2f}ms {b * 1000:8.2f}ms  {a / b:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+API cold-start benchmark: import time, and time from process start to the
+first served request and to /ready
+
+Each run starts a fresh uvicorn process against a database migrated once up
+front (or a new one per run with --fresh-db), so migrations are not counted
+unless asked for. Runs with SCRAPE_IN_API=1 (scheduler in the API) and
+SCRAPE_IN_API=0 (read-only replica) by default.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+HEAVY_MODULES = ('selenium', 'undetected_chromedriver', 'apscheduler', 'bs4', 'scrapers.toyota_center_scraper')
+
+IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import api.main
+print(json.dumps({{'seconds': time.perf_counter() - start,
+                  'heavy_modules': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, start, timeout, status=200):
+    """Seconds since ``start`` until ``url`` answers with ``status``"""
+    while time.perf_counter() - start < timeout:
+        try:
+            if requests.get(url, timeout=1).status_code == status:
+                return time.perf_counter() - start
+        except requests.RequestException:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} did not return {status} within {timeout}s")
+
+
+def import_time(env):
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_PROBE], env=env, text=True,
+                                     stderr=subprocess.DEVNULL)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def one_run(env, timeout):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        first_request = wait_for(f"{base}/health", start, timeout)
+        ready = wait_for(f"{base}/ready", start, timeout)
+        return {'first_request': first_request, 'ready': ready}
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def summarize(values):
+    return {'median': round(statistics.median(values), 3), 'min': round(min(values), 3),
+            'max': round(max(values), 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=["1", "0"], choices=["1", "0"],
+                        help="SCRAPE_IN_API values to measure")
+    parser.add_argument("--fresh-db", action="store_true", help="new database per run, so migrations are counted")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    scratch = tempfile.TemporaryDirectory()
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    database = f"sqlite:///{os.path.join(scratch.name, 'startup.db')}"
+    if not args.fresh_db:
+        env["DATABASE_URL"] = database
+        subprocess.check_call([sys.executable, "-m", "models.migrations", "upgrade"], env=env,
+                              stdout=subprocess.DEVNULL)
+
+    results = {}
+    for mode in args.modes:
+        runs = []
+        for i in range(args.runs):
+            run_env = dict(env, SCRAPE_IN_API=mode)
+            if args.fresh_db:
+                run_env["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch.name, f'startup-{mode}-{i}.db')}"
+            probe = import_time(run_env)
+            run = one_run(run_env, args.timeout)
+            run['import'] = probe['seconds']
+            run['heavy_modules'] = probe['heavy_modules']
+            runs.append(run)
+        results[f"SCRAPE_IN_API={mode}"] = {
+            'import': summarize([r['import'] for r in runs]),
+            'first_request': summarize([r['first_request'] for r in runs]),
+            'ready': summarize([r['ready'] for r in runs]),
+            'heavy_modules_after_import': runs[-1]['heavy_modules'],
+        }
+
+    for name, result in results.items():
+        print(f"{name}: import {result['import']['median']:.3f}s, "
+              f"first request {result['first_request']['median']:.3f}s, "
+              f"ready {result['ready']['median']:.3f}s (medians of {args.runs}); "
+              f"heavy modules after import: {', '.join(result['heavy_modules_after_import']) or 'none'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'runs': args.runs, 'fresh_db': args.fresh_db, 'results': results}, f, indent=2)
+    scratch.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Change-only history storage against full storage
+
+Ingests the same sequence of scrapes of one synthetic inventory twice into a
+scratch SQLite database, once per PRICE_STORAGE_MODE, and compares the rows
+stored and the time spent in ingest_snapshot. Some (section, row) keys carry
+several listings, as resale inventories do. After every scrape the listings
+the change-only runs cover at that scrape time must match the full rows, one
+for one. section_stats must match a rebuild from ticket_prices and add up to
+the same listing counts in both modes. Repeated identical scrapes of a key
+with several listings must only extend its runs.
+
+    python -m benchmarks.bench_storage --listings 2000 --scrapes 50
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+
+def scrapes(count, scrape_count, change_rate, multi_rate, seed):
+    """``scrape_count`` snapshots of one inventory in which ``change_rate`` of
+    the listings move each time and ``multi_rate`` of the keys list twice"""
+    from scrapers.snapshot import TicketSnapshot
+    rng = random.Random(seed)
+    sections = [str(s) for s in range(101, 129)]
+    listings = []
+    for i in range(count):
+        key = (rng.choice(sections), f"{chr(65 + i % 26)}{i // 26}")
+        listings.append([key, round(rng.uniform(40, 900), 2), True])
+        if rng.random() < multi_rate:
+            listings.append([key, round(rng.uniform(40, 900), 2), True])
+    for _ in range(scrape_count):
+        snapshot = TicketSnapshot('Toyota Center')
+        for (section, row), price, available in listings:
+            snapshot.append(section, price, available, row)
+        yield snapshot
+        for listing in listings:
+            if rng.random() < change_rate:
+                if rng.random() < 0.8:
+                    listing[1] = round(listing[1] * rng.uniform(0.8, 1.2), 2)
+                else:
+                    listing[2] = not listing[2]
+
+
+def covered(db, event_id, at):
+    """Listings stored rows stand for at scrape time ``at``"""
+    from sqlalchemy import select, func
+    from models.database import TicketPrice
+    prices = TicketPrice.__table__
+    rows = db.execute(select(prices.c.section, prices.c.row, prices.c.price, prices.c.availability).where(
+        prices.c.event_id == event_id,
+        prices.c.tracked_at <= at,
+        func.coalesce(prices.c.last_seen_at, prices.c.tracked_at) >= at
+    ))
+    return Counter(tuple(r) for r in rows)
+
+
+def section_stats(db, event_id):
+    from sqlalchemy import select
+    from models.database import SectionStats
+    stats = SectionStats.__table__
+    return sorted(tuple(r) for r in db.execute(select(
+        stats.c.section, stats.c.granularity, stats.c.bucket_start, stats.c.scrapes, stats.c.listings,
+        stats.c.available, stats.c.price_counts).where(stats.c.event_id == event_id)))
+
+
+def daily_totals(stats):
+    """Per-section sums of the daily rows, which the two modes' slightly
+    different scrape times cannot split differently"""
+    totals = {}
+    for section, granularity, _, scrapes, listings, available, price_counts in stats:
+        if granularity == 'day':
+            total = totals.setdefault(section, [0, 0, 0, Counter()])
+            total[0] += scrapes
+            total[1] += listings
+            total[2] += available
+            total[3].update(json.loads(price_counts))
+    return totals
+
+
+def check_repeated_listings(db):
+    """Four identical scrapes of two listings under one key store two runs"""
+    from sqlalchemy import func
+    from models.database import Event, TicketPrice
+    from utils.ingestion import ingest_snapshot
+    event = Event(event_name="Benchmark repeat", url='repeat', venue='Toyota Center')
+    db.add(event)
+    db.commit()
+    os.environ["PRICE_STORAGE_MODE"] = 'changes'
+    for _ in range(4):
+        ingest_snapshot(db, event.id, [{'section': '101', 'price': 50.0, 'available': True},
+                                       {'section': '101', 'price': 80.0, 'available': True}])
+    rows = db.query(func.count(TicketPrice.id)).filter(TicketPrice.event_id == event.id).scalar()
+    assert rows == 2, f"identical scrapes of two listings stored {rows} rows"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=2000)
+    parser.add_argument("--scrapes", type=int, default=50)
+    parser.add_argument("--change-rate", type=float, default=0.05)
+    parser.add_argument("--multi-rate", type=float, default=0.2,
+                        help="share of keys with a second listing")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    scratch = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch.name, 'storage.db')}"
+    sys.path.insert(0, os.getcwd())
+    from sqlalchemy import func
+    from models.database import engine, SessionLocal, Event, TicketPrice, CurrentPrice
+    from models.migrations import init_db
+    from utils.ingestion import ingest_snapshot
+    from utils.section_stats import rebuild
+
+    init_db()
+    db = SessionLocal()
+    modes = ('full', 'changes')
+    for mode in modes:
+        db.add(Event(event_name=f"Benchmark {mode}", url=mode, venue='Toyota Center'))
+    db.commit()
+    event_ids = {mode: db.query(Event.id).filter(Event.url == mode).scalar() for mode in modes}
+
+    timings = {mode: 0.0 for mode in modes}
+    for snapshot in scrapes(args.listings, args.scrapes, args.change_rate, args.multi_rate, args.seed):
+        seen = {}
+        for mode in modes:
+            os.environ["PRICE_STORAGE_MODE"] = mode
+            start = time.perf_counter()
+            ingest_snapshot(db, event_ids[mode], snapshot)
+            timings[mode] += time.perf_counter() - start
+            seen[mode] = db.query(func.max(CurrentPrice.updated_at)).filter(
+                CurrentPrice.event_id == event_ids[mode]).scalar()
+        assert covered(db, event_ids['changes'], seen['changes']) == covered(db, event_ids['full'], seen['full']), \
+            "change-only runs do not cover the scraped listings"
+
+    check_repeated_listings(db)
+    stored = {mode: section_stats(db, event_ids[mode]) for mode in modes}
+    assert daily_totals(stored['full']) == daily_totals(stored['changes']), \
+        "section_stats listing counts depend on the storage mode"
+    with engine.begin() as conn:
+        rebuild(conn)
+    for mode in modes:
+        assert section_stats(db, event_ids[mode]) == stored[mode], f"{mode} section_stats disagree with a rebuild"
+
+    print(f"{'mode':>8} {'rows':>9} {'ingest':>10}")
+    for mode in modes:
+        rows = db.query(func.count(TicketPrice.id)).filter(TicketPrice.event_id == event_ids[mode]).scalar()
+        print(f"{mode:>8} {rows:>9} {timings[mode] * 1000 / args.scrapes:8.2f}ms")
+    db.close()
+    scratch.cleanup()
+
+
+if __name__ == "__main__":
+    main()
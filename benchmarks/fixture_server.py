@@ -0,0 +1,52 @@
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from contextlib import contextmanager
+from functools import partial
+import threading
+import random
+import time
+import os
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static handler that keeps benchmark output free of access logs.
+
+    Every response is held back ``delay`` seconds, plus up to ``jitter``
+    more, to stand in for the venue sites' latency. Paths without an
+    extension are served from the matching .html file, so ``/events``
+    works like the live listing page.
+    """
+    def __init__(self, *args, delay=0.0, jitter=0.0, **kwargs):
+        self.delay = delay
+        self.jitter = jitter
+        super().__init__(*args, **kwargs)
+
+    def translate_path(self, path):
+        translated = super().translate_path(path)
+        if not os.path.exists(translated) and os.path.exists(translated + '.html'):
+            return translated + '.html'
+        return translated
+
+    def send_head(self):
+        if self.delay or self.jitter:
+            time.sleep(self.delay + random.uniform(0, self.jitter))
+        return super().send_head()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def serve_fixtures(directory=FIXTURES_DIR, delay=0.0, jitter=0.0):
+    """Serve saved pages on a free localhost port and yield the base URL"""
+    handler = partial(QuietHandler, directory=directory, delay=delay, jitter=jitter)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
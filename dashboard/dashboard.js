@@ -1,8 +1,13 @@
 // Dashboard functionality
 const API_BASE = 'http://localhost:8000';
+const DROP_WINDOW_MS = 24 * 60 * 60 * 1000;
+const STREAM_FALLBACK_POLL_MS = 2 * 60 * 1000;
 let autoRefreshInterval = null;
+let eventStream = null;
 let priceChart = null;
 let currentEventData = null;
+let priceDrops = [];
+let monitoredEvents = [];
 
 // Initialize dashboard
 document.addEventListener('DOMContentLoaded', function() {
@@ -57,25 +62,17 @@ async function refreshDashboard() {
         
         // Fetch events
         const eventsResponse = await fetch(`${API_BASE}/events`);
-        const events = await eventsResponse.json();
-        document.getElementById('activeEvents').textContent = events.length;
+        monitoredEvents = await eventsResponse.json();
         
         // Fetch price drops
         const dropsResponse = await fetch(`${API_BASE}/price-drops?hours=24`);
-        const drops = await dropsResponse.json();
-        document.getElementById('priceDrops').textContent = drops.length;
+        priceDrops = await dropsResponse.json();
         
         // Update price drops list
-        updatePriceDropsList(drops);
+        updatePriceDrops();
         
         // Update monitored events
-        updateMonitoredEvents(events);
-        
-        // Find lowest price from recent data
-        if (drops.length > 0) {
-            const lowestDrop = Math.min(...drops.map(d => d.new_price));
-            document.getElementById('lowestPrice').textContent = `$${lowestDrop.toFixed(2)}`;
-        }
+        updateMonitoredEvents(monitoredEvents);
         
     } catch (error) {
         console.error('Error refreshing dashboard:', error);
@@ -190,6 +187,30 @@ function updatePriceChart(data) {
     priceChart.update();
 }
 
+// Timestamps from the API are UTC without an offset
+function parseUtc(timestamp) {
+    return new Date(/[zZ]|[+-]\d\d:\d\d$/.test(timestamp) ? timestamp : `${timestamp}Z`);
+}
+
+// Keep the same 24-hour window as the initial /price-drops?hours=24 load
+function pruneOldDrops() {
+    const cutoff = Date.now() - DROP_WINDOW_MS;
+    priceDrops = priceDrops.filter(d => parseUtc(d.detected_at).getTime() >= cutoff);
+}
+
+// Update price drop count, lowest price and list from priceDrops
+function updatePriceDrops() {
+    document.getElementById('priceDrops').textContent = priceDrops.length;
+    
+    // Find lowest price from recent data
+    if (priceDrops.length > 0) {
+        const lowestDrop = Math.min(...priceDrops.map(d => d.new_price));
+        document.getElementById('lowestPrice').textContent = `$${lowestDrop.toFixed(2)}`;
+    }
+    
+    updatePriceDropsList(priceDrops);
+}
+
 // Update price drops list
 function updatePriceDropsList(drops) {
     const container = document.getElementById('priceDropsList');
@@ -220,6 +241,7 @@ function updatePriceDropsList(drops) {
 // Update monitored events list
 function updateMonitoredEvents(events) {
     const container = document.getElementById('monitoredEvents');
+    document.getElementById('activeEvents').textContent = events.length;
     
     if (events.length === 0) {
         container.innerHTML = '<p class="text-gray-500">No events being monitored.</p>';
@@ -258,17 +280,68 @@ async function checkEventPrices(eventName) {
     }
 }
 
-// Toggle auto-refresh
+// Replace the listings of each changed (section, row) of the event being shown
+function applyPriceChanges(update) {
+    document.getElementById('lastCheck').textContent = new Date().toLocaleTimeString();
+    
+    if (!currentEventData || !currentEventData.event_info || currentEventData.event_info.name !== update.event) {
+        return;
+    }
+    
+    let tickets = currentEventData.tickets || [];
+    update.keys.forEach(changed => {
+        tickets = tickets.filter(t => !(t.section === changed.section && (t.row || '') === changed.row));
+        changed.tickets.forEach(t => tickets.push({ ...t, section: changed.section, row: changed.row }));
+    });
+    currentEventData.tickets = tickets;
+    updateCurrentPrices(currentEventData);
+}
+
+// Subscribe to server-pushed changes instead of re-fetching full lists
+function openEventStream() {
+    eventStream = new EventSource(`${API_BASE}/stream`);
+    
+    eventStream.addEventListener('prices', e => applyPriceChanges(JSON.parse(e.data)));
+    
+    eventStream.addEventListener('drop', e => {
+        priceDrops.unshift(JSON.parse(e.data));
+        pruneOldDrops();
+        updatePriceDrops();
+    });
+    
+    eventStream.addEventListener('event', e => {
+        monitoredEvents.push(JSON.parse(e.data));
+        updateMonitoredEvents(monitoredEvents);
+    });
+    
+    // Sent when this tab missed updates, e.g. after a long disconnect
+    eventStream.addEventListener('resync', () => refreshDashboard());
+    
+    eventStream.onerror = error => console.error('Live update stream error:', error);
+}
+
+// Toggle live updates
 function toggleAutoRefresh() {
     const button = document.getElementById('autoRefreshText');
     
-    if (autoRefreshInterval) {
+    if (eventStream || autoRefreshInterval) {
+        if (eventStream) {
+            eventStream.close();
+            eventStream = null;
+        }
         clearInterval(autoRefreshInterval);
         autoRefreshInterval = null;
         button.textContent = 'Enable Auto-Refresh';
     } else {
-        autoRefreshInterval = setInterval(refreshDashboard, 30000); // Refresh every 30 seconds
+        refreshDashboard(); // Full load, then apply deltas
+        if (window.EventSource) {
+            openEventStream();
+            // The stream only carries changes committed in the API process, not
+            // those of standalone workers, so keep a slow poll alongside it
+            autoRefreshInterval = setInterval(refreshDashboard, STREAM_FALLBACK_POLL_MS);
+        } else {
+            autoRefreshInterval = setInterval(refreshDashboard, 30000); // Refresh every 30 seconds
+        }
         button.textContent = 'Disable Auto-Refresh';
-        refreshDashboard(); // Immediate refresh
     }
-}
\ No newline at end of file
+}
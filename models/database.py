@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, Index, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql, sqlite
 from datetime import datetime
 import os
 
@@ -27,6 +28,12 @@ class Event(Base):
 
 class TicketPrice(Base):
     __tablename__ = "ticket_prices"
+    __table_args__ = (
+        Index('ix_ticket_prices_event_section_tracked', 'event_id', 'section', 'tracked_at'),
+        Index('ix_ticket_prices_event_source_tracked', 'event_id', 'source', 'tracked_at'),
+        Index('ix_ticket_prices_event_tracked', 'event_id', 'tracked_at'),
+        Index('ix_ticket_prices_event_last_seen', 'event_id', 'last_seen_at'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, index=True)
@@ -36,9 +43,16 @@ class TicketPrice(Base):
     availability = Column(Boolean, default=True)
     source = Column(String)
     tracked_at = Column(DateTime, default=datetime.utcnow)
+    # In change-only storage a row stands for every scrape from tracked_at
+    # until last_seen_at that saw the same price and availability
+    last_seen_at = Column(DateTime, nullable=True)
     
 class PriceDrop(Base):
     __tablename__ = "price_drops"
+    __table_args__ = (
+        Index('ix_price_drops_detected_at', 'detected_at'),
+        Index('ix_price_drops_event_detected', 'event_id', 'detected_at'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, index=True)
@@ -48,4 +62,118 @@ class PriceDrop(Base):
     drop_percentage = Column(Float)
     detected_at = Column(DateTime, default=datetime.utcnow)
 
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+# Every listing of an event's latest scrape, each pointing at the
+# ticket_prices row (run) that holds its price
+class CurrentPrice(Base):
+    __tablename__ = "current_prices"
+    
+    event_id = Column(Integer, primary_key=True)
+    price_id = Column(Integer, primary_key=True)
+    section = Column(String)
+    row = Column(String, default='')
+    price = Column(Float)
+    availability = Column(Boolean, default=True)
+    source = Column(String)
+    # Latest scrape that saw the listing
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    tracked_at = Column(DateTime)
+
+# Hourly and daily aggregates of ticket_prices per (event, section)
+class PriceRollup(Base):
+    __tablename__ = "price_rollups"
+    
+    event_id = Column(Integer, primary_key=True)
+    section = Column(String, primary_key=True)
+    granularity = Column(String, primary_key=True)  # 'hour' or 'day'
+    bucket_start = Column(DateTime, primary_key=True)
+    min_price = Column(Float)
+    max_price = Column(Float)
+    open_price = Column(Float)
+    close_price = Column(Float)
+    count = Column(Integer)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+# Hourly and daily per-section listing counts and available-price histograms,
+# counting every listing of every scrape
+class SectionStats(Base):
+    __tablename__ = "section_stats"
+    __table_args__ = (
+        Index('ix_section_stats_event_bucket', 'event_id', 'granularity', 'bucket_start'),
+    )
+    
+    event_id = Column(Integer, primary_key=True)
+    section = Column(String, primary_key=True)
+    granularity = Column(String, primary_key=True)  # 'hour' or 'day'
+    bucket_start = Column(DateTime, primary_key=True)
+    # Scrapes in the bucket that listed the section, and the listings (and
+    # available listings) they saw between them
+    scrapes = Column(Integer, default=0)
+    listings = Column(Integer, default=0)
+    available = Column(Integer, default=0)
+    min_available_price = Column(Float)
+    # JSON {price in cents: count} of the available listings
+    price_counts = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+# Adaptive polling state: when each event is next due and why
+class PollSchedule(Base):
+    __tablename__ = "poll_schedule"
+    
+    event_id = Column(Integer, primary_key=True)
+    next_check_at = Column(DateTime, index=True)
+    interval_seconds = Column(Integer)
+    reason = Column(String)
+    last_checked_at = Column(DateTime)
+    last_ok = Column(Boolean)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+# Which worker currently owns scraping an event, until leased_until
+class EventLease(Base):
+    __tablename__ = "event_leases"
+    
+    event_id = Column(Integer, primary_key=True)
+    worker_id = Column(String, nullable=True)
+    leased_until = Column(DateTime, nullable=True, index=True)
+    claimed_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+
+# Named leases shared by all workers: scrape budget slots and periodic jobs
+class TaskLease(Base):
+    __tablename__ = "task_leases"
+    
+    name = Column(String, primary_key=True)
+    worker_id = Column(String, nullable=True)
+    leased_until = Column(DateTime, nullable=True, index=True)
+    claimed_at = Column(DateTime, nullable=True)
+
+
+def upsert(db, model, rows, update=()):
+    """Insert ``rows`` into ``model``'s table in one statement, overwriting the
+    ``update`` columns of rows whose primary key already exists, or leaving
+    those rows alone when ``update`` is empty.
+
+    ``db`` is a Session, or a Connection on PostgreSQL and SQLite.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    keys = [column.name for column in table.primary_key]
+    dialect = db.dialect.name if hasattr(db, 'dialect') else db.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(table)
+        if update:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=keys,
+                set_={column: stmt.excluded[column] for column in update}
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=keys)
+        db.execute(stmt, rows)
+    elif update:
+        for row in rows:
+            db.merge(model(**row))
+    else:
+        for row in rows:
+            if db.get(model, tuple(row[key] for key in keys)) is None:
+                db.add(model(**row))
@@ -0,0 +1,258 @@
+"""
+Versioned schema migrations.
+
+Replaces the old import-time ``Base.metadata.create_all``, which only ever
+creates missing tables and cannot add indexes or columns to a database that
+already exists. Each migration runs once, in its own transaction, and is
+recorded in the schema_migrations table.
+
+    python -m models.migrations upgrade
+    python -m models.migrations status
+"""
+
+import sys
+sys.path.append('..')
+
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, inspect, select, update, delete, bindparam, text, func
+from models.database import engine, Event, TicketPrice, PriceDrop, CurrentPrice, PriceRollup, PollSchedule, EventLease, SectionStats, TaskLease
+from datetime import datetime, timedelta
+
+# Rows of one scrape written before scrapes shared a tracked_at are
+# milliseconds apart, while scrapes of one event are minutes apart
+SCRAPE_GAP = timedelta(seconds=5)
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+
+def create_tables(conn, *models):
+    for model in models:
+        model.__table__.create(conn, checkfirst=True)
+
+
+def create_indexes(conn, model):
+    """Create every index declared on the model that the database lacks.
+
+    Indexes on columns a later migration adds are left for that migration.
+    """
+    existing = {ix['name'] for ix in inspect(conn).get_indexes(model.__tablename__)}
+    columns = {c['name'] for c in inspect(conn).get_columns(model.__tablename__)}
+    for index in model.__table__.indexes:
+        if index.name not in existing and {c.name for c in index.columns} <= columns:
+            index.create(conn)
+
+
+def add_column(conn, model, column_name):
+    """Add a declared column to an existing table if it is missing"""
+    table = model.__tablename__
+    if column_name in {c['name'] for c in inspect(conn).get_columns(table)}:
+        return
+    column = model.__table__.c[column_name]
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(text(f'ALTER TABLE {table} ADD COLUMN "{column_name}" {column_type}'))
+
+
+def _initial_tables(conn):
+    create_tables(conn, Event, TicketPrice, PriceDrop, CurrentPrice)
+
+
+def _composite_indexes(conn):
+    create_indexes(conn, TicketPrice)
+    create_indexes(conn, PriceDrop)
+
+
+def _change_only_columns(conn):
+    add_column(conn, TicketPrice, 'last_seen_at')
+    add_column(conn, CurrentPrice, 'tracked_at')
+    current = CurrentPrice.__table__
+    conn.execute(update(current).where(current.c.tracked_at.is_(None)).values(tracked_at=current.c.updated_at))
+
+
+def _compact_history(conn, chunk=500):
+    """Collapse runs of identical prices into one row per run.
+
+    Works one event at a time. Rows are grouped into scrapes by SCRAPE_GAP,
+    since each row used to get its own tracked_at. A row identical (key,
+    price and availability) to a listing of the previous scrape is deleted
+    and folded into that listing's run as its last_seen_at; duplicate
+    listings within a scrape each keep a run. Migration 10 then rebuilds
+    current_prices from the surviving runs.
+    """
+    prices = TicketPrice.__table__
+    extend_seen = update(prices).where(prices.c.id == bindparam('b_id')).values(last_seen_at=bindparam('b_seen'))
+
+    removed = 0
+    event_ids = conn.execute(select(prices.c.event_id).distinct()).scalars().all()
+    for event_id in event_ids:
+        rows = conn.execute(
+            select(prices.c.id, prices.c.section, prices.c.row, prices.c.price,
+                   prices.c.availability, prices.c.tracked_at, prices.c.last_seen_at)
+            .where(prices.c.event_id == event_id)
+            .order_by(prices.c.tracked_at, prices.c.id)
+        ).all()
+
+        doomed, seen = [], {}
+        runs, scrape, last_at = {}, {}, None
+        for r in rows:
+            if last_at is not None and r.tracked_at - last_at > SCRAPE_GAP:
+                # A new scrape: only the runs the last one saw can continue
+                runs, scrape = scrape, {}
+            last_at = r.tracked_at
+            # NULL and '' rows are the same key
+            listing = (r.section or 'General', r.row or '', r.price, r.availability)
+            open_runs = runs.get(listing)
+            if open_runs:
+                run = open_runs.pop()
+                doomed.append(r.id)
+                seen[run.id] = r.last_seen_at or r.tracked_at
+            else:
+                run = r
+            scrape.setdefault(listing, []).append(run)
+
+        for start in range(0, len(doomed), chunk):
+            conn.execute(delete(prices).where(prices.c.id.in_(doomed[start:start + chunk])))
+        if seen:
+            conn.execute(extend_seen, [{'b_id': i, 'b_seen': at} for i, at in seen.items()])
+        removed += len(doomed)
+    print(f"Compacted ticket_prices: removed {removed} repeated rows")
+
+
+def _price_rollups(conn):
+    create_tables(conn, PriceRollup)
+    create_indexes(conn, TicketPrice)
+
+
+def _poll_schedule(conn):
+    create_tables(conn, PollSchedule)
+
+
+def _event_leases(conn):
+    create_tables(conn, EventLease)
+
+
+def _section_stats(conn):
+    create_tables(conn, SectionStats)
+
+
+def _task_leases(conn):
+    create_tables(conn, TaskLease)
+
+
+def _latest_scrape_start(conn, event_id, at):
+    """Earliest time of the scrape that ended at ``at``, chaining back
+    through times at most SCRAPE_GAP apart"""
+    prices = TicketPrice.__table__
+    seen = func.coalesce(prices.c.last_seen_at, prices.c.tracked_at)
+    start = at
+    for time in conn.execute(select(seen).distinct().where(prices.c.event_id == event_id, seen < at)
+                             .order_by(seen.desc())).scalars():
+        if start - time > SCRAPE_GAP:
+            break
+        start = time
+    return start
+
+
+def rebuild_current_prices(conn):
+    """Fill current_prices with the ticket_prices runs that cover each
+    event's latest scrape, one row per listing"""
+    prices = TicketPrice.__table__
+    current = CurrentPrice.__table__
+    seen = func.coalesce(prices.c.last_seen_at, prices.c.tracked_at)
+    conn.execute(delete(current))
+    latest = conn.execute(select(prices.c.event_id, func.max(seen)).group_by(prices.c.event_id)).all()
+    for event_id, at in latest:
+        start = _latest_scrape_start(conn, event_id, at)
+        conn.execute(current.insert().from_select(
+            ['event_id', 'price_id', 'section', 'row', 'price', 'availability', 'source', 'updated_at', 'tracked_at'],
+            select(
+                prices.c.event_id, prices.c.id, func.coalesce(prices.c.section, 'General'),
+                func.coalesce(prices.c.row, ''), prices.c.price, prices.c.availability, prices.c.source,
+                bindparam('b_seen', at, type_=DateTime), prices.c.tracked_at
+            ).where(prices.c.event_id == event_id, prices.c.tracked_at <= at, seen >= start)
+        ))
+    return conn.execute(select(func.count()).select_from(current)).scalar()
+
+
+def _current_listings(conn):
+    # One row per listing instead of per (section, row); rebuilt from history
+    conn.execute(text("DROP TABLE IF EXISTS current_prices"))
+    create_tables(conn, CurrentPrice)
+    print(f"Rebuilt current_prices: {rebuild_current_prices(conn)} listings")
+
+
+def _section_stats_scrapes(conn):
+    # Rows counted price runs until now; python -m utils.section_stats
+    # backfill recounts them per scrape
+    add_column(conn, SectionStats, 'scrapes')
+    conn.execute(delete(SectionStats.__table__))
+
+
+# (version, name, function) in the order they must be applied
+MIGRATIONS = [
+    (1, "initial tables", _initial_tables),
+    (2, "composite indexes on ticket_prices and price_drops", _composite_indexes),
+    (3, "change-only storage columns", _change_only_columns),
+    (4, "compact repeated ticket_prices history", _compact_history),
+    (5, "price_rollups table and last_seen_at index", _price_rollups),
+    (6, "poll_schedule table", _poll_schedule),
+    (7, "event_leases table", _event_leases),
+    (8, "section_stats table", _section_stats),
+    (9, "task_leases table", _task_leases),
+    (10, "current_prices row per listing", _current_listings),
+    (11, "section_stats counted per scrape", _section_stats_scrapes),
+]
+
+
+def applied_versions(conn):
+    schema_migrations.create(conn, checkfirst=True)
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def upgrade(bind=None, target=None):
+    """Apply pending migrations up to ``target`` (default: all of them)"""
+    bind = bind or engine
+    applied = []
+    for version, name, migrate in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        with bind.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                # Serialize replicas that boot at the same time
+                conn.execute(text("SELECT pg_advisory_xact_lock(727001)"))
+            if version in applied_versions(conn):
+                continue
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+            applied.append(version)
+            print(f"Applied migration {version}: {name}")
+    return applied
+
+
+def init_db():
+    """Bring the configured database up to the latest schema"""
+    return upgrade(engine)
+
+
+def status(bind=None):
+    bind = bind or engine
+    with bind.begin() as conn:
+        done = applied_versions(conn)
+    for version, name, _ in MIGRATIONS:
+        print(f"{'applied' if version in done else 'pending':8} {version:3}  {name}")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "upgrade":
+        upgrade()
+    elif command == "status":
+        status()
+    else:
+        print("Usage: python -m models.migrations [upgrade|status]")
+        sys.exit(1)
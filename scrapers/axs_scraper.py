@@ -1,166 +1,210 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.action_chains import ActionChains
 import undetected_chromedriver as uc
+from scrapers.fetcher import get_default_fetcher
+from scrapers.readiness import wait_for_listings, JitterPolicy
+from scrapers.extraction import extract_listing_records
+from scrapers.snapshot import TicketSnapshot
+from scrapers.diff import diff_snapshots
+from utils.metrics import scrape_phase_seconds, scrape_failures, driver_starts
+from utils.profiling import profiler, trace_webdriver
 import time
 import re
+import os
 from datetime import datetime
-import random
+
+LISTING_SELECTOR = '[class*="ticket"], [class*="seat"], [class*="listing"], [class*="inventory"]'
+SOURCE = 'axs'
+
+def undetected_chrome():
+    """Undetected Chrome driver to bypass AXS anti-bot measures"""
+    options = uc.ChromeOptions()
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-setuid-sandbox')
+    options.add_argument('--disable-accelerated-2d-canvas')
+    options.add_argument('--disable-gpu')
+    
+    # Use undetected-chromedriver to bypass detection
+    driver = uc.Chrome(options=options)
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    return driver
 
 class AXSScraper:
-    def __init__(self):
-        self.setup_driver()
+    def __init__(self, fetcher=None, driver_pool=None):
+        # Without a pool the scraper owns one browser, started the first time
+        # a page needs it; such a scraper must not be shared between threads.
+        # With a DriverPool every page leases its own browser.
+        self.driver = None
+        self.driver_pool = driver_pool
+        self.fetcher = fetcher or get_default_fetcher(SOURCE)
+        self.jitter = JitterPolicy.from_env("AXS")
+        self.page_deadline = float(os.getenv("AXS_PAGE_DEADLINE", "20"))
         
     def setup_driver(self):
         """Setup undetected Chrome driver to bypass AXS anti-bot measures"""
-        options = uc.ChromeOptions()
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-setuid-sandbox')
-        options.add_argument('--disable-accelerated-2d-canvas')
-        options.add_argument('--disable-gpu')
-        
-        # Use undetected-chromedriver to bypass detection
-        self.driver = uc.Chrome(options=options)
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        with scrape_phase_seconds.time(source=SOURCE, phase='driver_start'):
+            self.driver = trace_webdriver(undetected_chrome())
+        driver_starts.inc(pool='axs-owned')
         
     def get_ticket_info(self, url):
-        """Scrape ticket information from AXS event page"""
-        try:
-            self.driver.get(url)
-            
-            # Random delay to appear more human
-            time.sleep(random.uniform(3, 5))
-            
-            # Wait for page to load
-            wait = WebDriverWait(self.driver, 20)
-            
+        """Scrape ticket information from AXS event page, escalating to the
+        browser only when the page's embedded JSON has no listings"""
+        with profiler.capture(SOURCE, url):
+            ticket_data, tier = self.fetcher.fetch(url, self.get_ticket_info_with_browser)
+        
+        if tier == 'http':
+            tickets = TicketSnapshot.from_dicts(ticket_data['tickets'])
             ticket_data = {
-                'event_info': {},
-                'tickets': [],
-                'price_range': {'min': None, 'max': None}
+                'event_info': {
+                    'name': ticket_data['event_info'].get('name', 'Unknown Event'),
+                    'date': ticket_data['event_info'].get('date', 'Date TBD')
+                },
+                'tickets': tickets,
+                'price_range': tickets.price_range(),
+                'status': f"Found {len(tickets)} ticket options"
             }
+        
+        ticket_data['tier'] = tier
+        return ticket_data
+    
+    def get_ticket_info_with_browser(self, url):
+        """Scrape ticket information from AXS event page with the browser"""
+        try:
+            if self.driver_pool is not None:
+                with self.driver_pool.lease() as driver:
+                    return self.scrape_event_page(driver, url)
             
-            # Try to get event info
-            try:
-                event_name = wait.until(EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, '[class*="event-name"], [class*="event-title"], h1')
-                )).text
-                ticket_data['event_info']['name'] = event_name
-            except:
-                ticket_data['event_info']['name'] = "Unknown Event"
-            
-            # Try to get date/time
-            try:
-                date_element = self.driver.find_element(
-                    By.CSS_SELECTOR, '[class*="event-date"], [class*="date-time"], time'
-                )
-                ticket_data['event_info']['date'] = date_element.text
-            except:
-                ticket_data['event_info']['date'] = "Date TBD"
-            
-            # Scroll to load all sections
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            time.sleep(2)
-            
-            # Look for ticket listings
-            ticket_sections = self.driver.find_elements(
-                By.CSS_SELECTOR, '[class*="ticket"], [class*="seat"], [class*="listing"], [class*="inventory"]'
-            )
-            
-            prices = []
-            
-            for section in ticket_sections:
-                try:
-                    text = section.text
-                    
-                    # Extract price
-                    price_match = re.search(r'\$(\d+(?:,\d{3})*(?:\.\d{2})?)', text)
-                    if price_match:
-                        price = float(price_match.group(1).replace(',', ''))
-                        prices.append(price)
-                        
-                        # Extract section info
-                        section_info = {
-                            'price': price,
-                            'section': 'General',
-                            'available': 'sold out' not in text.lower(),
-                            'fees_included': 'fees' in text.lower()
-                        }
-                        
-                        # Try to extract section name
-                        section_match = re.search(r'(?:section|sec|level)\s*(\w+)', text, re.IGNORECASE)
-                        if section_match:
-                            section_info['section'] = section_match.group(1)
-                        
-                        # Check for row info
-                        row_match = re.search(r'(?:row|rw)\s*(\w+)', text, re.IGNORECASE)
-                        if row_match:
-                            section_info['row'] = row_match.group(1)
-                        
-                        ticket_data['tickets'].append(section_info)
-                except Exception as e:
-                    continue
-            
-            # Calculate price range
-            if prices:
-                ticket_data['price_range']['min'] = min(prices)
-                ticket_data['price_range']['max'] = max(prices)
-            
-            # Check if tickets are available
-            if not ticket_data['tickets']:
-                # Look for "no tickets available" message
-                no_tickets = self.driver.find_elements(
-                    By.CSS_SELECTOR, '[class*="no-ticket"], [class*="sold-out"], [class*="unavailable"]'
-                )
-                if no_tickets:
-                    ticket_data['status'] = "Sold Out or No Tickets Available"
-                else:
-                    ticket_data['status'] = "Tickets may be available - check manually"
-            else:
-                ticket_data['status'] = f"Found {len(ticket_data['tickets'])} ticket options"
-            
-            return ticket_data
+            if self.driver is None:
+                self.setup_driver()
+            return self.scrape_event_page(self.driver, url)
             
         except Exception as e:
+            scrape_failures.inc(source=SOURCE, stage='browser')
             print(f"Error scraping AXS: {e}")
             return {
                 'error': str(e),
                 'event_info': {},
-                'tickets': [],
+                'tickets': TicketSnapshot(),
                 'status': 'Error accessing ticket page'
             }
     
+    def scrape_event_page(self, driver, url):
+        """Load an AXS event page in ``driver`` and read its event info and listings"""
+        with scrape_phase_seconds.time(source=SOURCE, phase='page_load'):
+            driver.get(url)
+        page_deadline = time.monotonic() + self.page_deadline
+        
+        # Optional human-like pause, off unless AXS_JITTER_MAX is set
+        self.jitter.pause()
+        
+        # Wait for the listings to render and settle
+        wait_start = time.perf_counter()
+        wait_for_listings(driver, LISTING_SELECTOR, deadline=max(0.5, page_deadline - time.monotonic()))
+        wait = WebDriverWait(driver, max(1, page_deadline - time.monotonic()))
+        
+        ticket_data = {
+            'event_info': {},
+            'tickets': TicketSnapshot(),
+            'price_range': {'min': None, 'max': None}
+        }
+        
+        # Try to get event info
+        try:
+            event_name = wait.until(EC.presence_of_element_located(
+                (By.CSS_SELECTOR, '[class*="event-name"], [class*="event-title"], h1')
+            )).text
+            ticket_data['event_info']['name'] = event_name
+        except:
+            ticket_data['event_info']['name'] = "Unknown Event"
+        
+        # Try to get date/time
+        try:
+            date_element = driver.find_element(
+                By.CSS_SELECTOR, '[class*="event-date"], [class*="date-time"], time'
+            )
+            ticket_data['event_info']['date'] = date_element.text
+        except:
+            ticket_data['event_info']['date'] = "Date TBD"
+        
+        # Scroll to load all sections
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
+        wait_for_listings(driver, LISTING_SELECTOR, deadline=max(0.5, page_deadline - time.monotonic()),
+                          empty_grace=0)
+        scrape_phase_seconds.observe(time.perf_counter() - wait_start, source=SOURCE, phase='wait')
+        
+        # Look for ticket listings
+        with scrape_phase_seconds.time(source=SOURCE, phase='extract'):
+            records = extract_listing_records(driver, LISTING_SELECTOR)
+        with scrape_phase_seconds.time(source=SOURCE, phase='parse'):
+            ticket_data['tickets'] = self.parse_listing_records(records)
+        
+        # Calculate price range
+        ticket_data['price_range'] = ticket_data['tickets'].price_range()
+        
+        # Check if tickets are available
+        if not ticket_data['tickets']:
+            # Look for "no tickets available" message
+            no_tickets = driver.find_elements(
+                By.CSS_SELECTOR, '[class*="no-ticket"], [class*="sold-out"], [class*="unavailable"]'
+            )
+            if no_tickets:
+                ticket_data['status'] = "Sold Out or No Tickets Available"
+            else:
+                ticket_data['status'] = "Tickets may be available - check manually"
+        else:
+            ticket_data['status'] = f"Found {len(ticket_data['tickets'])} ticket options"
+        
+        return ticket_data
+    
+    def parse_listing_records(self, records):
+        """Turn extracted listing records into a TicketSnapshot"""
+        tickets = TicketSnapshot()
+        
+        for record in records:
+            text = record['text']
+            
+            # Extract price
+            price_match = re.search(r'\$(\d+(?:,\d{3})*(?:\.\d{2})?)', text)
+            if price_match:
+                price = float(price_match.group(1).replace(',', ''))
+                
+                # Try to extract section name
+                section_match = re.search(r'(?:section|sec|level)\s*(\w+)', text, re.IGNORECASE)
+                section = section_match.group(1) if section_match else 'General'
+                
+                # Check for row info
+                row_match = re.search(r'(?:row|rw)\s*(\w+)', text, re.IGNORECASE)
+                row = row_match.group(1) if row_match else None
+                
+                tickets.append(section, price, 'sold out' not in text.lower(), row,
+                               fees_included='fees' in text.lower())
+        
+        return tickets
+    
     def monitor_prices(self, url, check_interval=300):
         """Monitor ticket prices for changes"""
-        previous_prices = {}
+        previous_tickets = None
         
         while True:
             current_data = self.get_ticket_info(url)
             
             if current_data.get('tickets'):
-                for ticket in current_data['tickets']:
-                    key = f"{ticket.get('section', 'General')}_{ticket.get('row', 'Any')}"
-                    current_price = ticket['price']
-                    
-                    if key in previous_prices:
-                        if current_price < previous_prices[key]:
-                            drop = previous_prices[key] - current_price
-                            drop_pct = (drop / previous_prices[key]) * 100
-                            
-                            print(f"🎉 PRICE DROP DETECTED!")
-                            print(f"Section: {ticket.get('section', 'General')}")
-                            print(f"Previous: ${previous_prices[key]:.2f}")
-                            print(f"Current: ${current_price:.2f}")
-                            print(f"Savings: ${drop:.2f} ({drop_pct:.1f}% off)")
-                            print("-" * 40)
-                    
-                    previous_prices[key] = current_price
+                if previous_tickets:
+                    for drop in diff_snapshots(previous_tickets, current_data['tickets']).drops():
+                        savings = drop['old_price'] - drop['new_price']
+                        
+                        print(f"🎉 PRICE DROP DETECTED!")
+                        print(f"Section: {drop['section']}")
+                        print(f"Previous: ${drop['old_price']:.2f}")
+                        print(f"Current: ${drop['new_price']:.2f}")
+                        print(f"Savings: ${savings:.2f} ({drop['drop_percentage']:.1f}% off)")
+                        print("-" * 40)
+                
+                previous_tickets = current_data['tickets']
             
             print(f"Checked at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             print(f"Next check in {check_interval} seconds...")
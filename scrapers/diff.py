@@ -0,0 +1,202 @@
+"""
+Vectorized comparison of two TicketSnapshots of the same event.
+
+Listings are keyed by (section, row), with a missing row treated like '',
+as in current_prices. A key may hold several listings, so listings are
+paired one to one: identical listings (same key, price and availability)
+first, then the rest of each key's listings in price order. A paired
+listing whose price or availability differs is a change, and unpaired ones
+are new or removed. Key codes are built from each snapshot's interned
+string tables, so the only Python-level loops run over distinct section and
+row names; the pairing is done with sorts and binary searches on NumPy
+arrays.
+
+    diff = diff_snapshots(previous, current)
+    diff.drops()         # [{'section', 'row', 'old_price', 'new_price', 'drop_percentage'}]
+    diff.summary()       # counts of each kind of change
+"""
+
+import numpy as np
+
+from scrapers.snapshot import TicketSnapshot
+
+
+def _column(values, dtype):
+    """View of an ``array`` column; NumPy shares the array module's typecodes"""
+    if not len(values):
+        return np.zeros(0, dtype=dtype)
+    return np.frombuffer(values, dtype=np.dtype(values.typecode)).astype(dtype, copy=False)
+
+
+def _code_maps(snapshot, sections, rows):
+    """Per-snapshot code -> shared id lookups, adding new names to ``sections``/``rows``"""
+    section_map = np.array([sections.setdefault(name, len(sections)) for name in snapshot.section_names],
+                           dtype=np.int64)
+    row_map = np.array([rows.setdefault(name or '', len(rows)) for name in snapshot.row_names], dtype=np.int64)
+    return section_map, row_map
+
+
+def _listings(snapshot, section_map, row_map, row_count):
+    """Key code, price and availability of every listing, in snapshot order"""
+    if not len(snapshot):
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0, dtype=bool)
+    keys = section_map[_column(snapshot.sections, np.int64)] * row_count + row_map[_column(snapshot.rows, np.int64)]
+    prices = _column(snapshot.prices, np.float64)
+    available = _column(snapshot.available, np.int8) == 1
+    return keys, prices, available
+
+
+def _pair(old, new, group=1):
+    """Pair listings whose codes agree after integer division by ``group``.
+
+    Within such a group each side is taken in code order and the n-th old
+    listing pairs with the n-th new one. Negative codes never pair. Returns
+    the paired (old positions, new positions).
+    """
+    old_order = np.argsort(old, kind='stable')
+    new_order = np.argsort(new, kind='stable')
+    old_groups = old[old_order] // group
+    new_groups = new[new_order] // group
+    # Sorted, so each listing's rank in its group is its distance from the group's first
+    rank = np.arange(len(new_groups)) - np.searchsorted(new_groups, new_groups)
+    target = np.searchsorted(old_groups, new_groups) + rank
+    paired = (target < np.searchsorted(old_groups, new_groups, side='right')) & (new_groups >= 0)
+    return old_order[target[paired]], new_order[paired]
+
+
+class SnapshotDiff:
+    """Changes between two snapshots; results are decoded to dicts on demand"""
+    def __init__(self, section_names, row_names, row_count, matched, old_index, new_index, old_prices,
+                 new_prices, old_available, new_available, added, added_index, added_prices, added_available,
+                 removed, removed_prices):
+        self.section_names = section_names
+        self.row_names = row_names
+        self.row_count = row_count
+        # One entry per paired listing; the indexes are positions in the
+        # previous and current snapshots
+        self.matched = matched
+        self.old_index = old_index
+        self.new_index = new_index
+        self.old_prices = old_prices
+        self.new_prices = new_prices
+        self.old_available = old_available
+        self.new_available = new_available
+        self.added = added
+        self.added_index = added_index
+        self.added_prices = added_prices
+        self.added_available = added_available
+        self.removed = removed
+        self.removed_prices = removed_prices
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.change_percentage = (new_prices - old_prices) / old_prices * 100
+        priced = old_prices > 0
+        self.dropped = priced & (new_prices < old_prices)
+        self.increased = priced & (new_prices > old_prices)
+        self.went_sold_out = old_available & ~new_available
+        self.restocked = ~old_available & new_available
+        # NaN (no previous price) never equals anything, so it counts as changed
+        self.changed = (new_prices != old_prices) | (old_available != new_available)
+
+    def keys(self, codes):
+        """Decode an array of key codes to (section, row) tuples"""
+        sections, rows = self.section_names, self.row_names
+        return [(sections[s], rows[r]) for s, r in zip((codes // self.row_count).tolist(),
+                                                      (codes % self.row_count).tolist())]
+
+    def _matched_rows(self, mask):
+        positions = np.flatnonzero(mask)
+        for i, (section, row) in zip(positions.tolist(), self.keys(self.matched[positions])):
+            yield i, section, row
+
+    def drops(self):
+        return [{'section': section, 'row': row, 'old_price': float(self.old_prices[i]),
+                 'new_price': float(self.new_prices[i]), 'drop_percentage': float(-self.change_percentage[i])}
+                for i, section, row in self._matched_rows(self.dropped)]
+
+    def increases(self):
+        return [{'section': section, 'row': row, 'old_price': float(self.old_prices[i]),
+                 'new_price': float(self.new_prices[i]), 'increase_percentage': float(self.change_percentage[i])}
+                for i, section, row in self._matched_rows(self.increased)]
+
+    def sold_out(self):
+        return [{'section': section, 'row': row, 'price': float(self.new_prices[i])}
+                for i, section, row in self._matched_rows(self.went_sold_out)]
+
+    def back_in_stock(self):
+        return [{'section': section, 'row': row, 'price': float(self.new_prices[i])}
+                for i, section, row in self._matched_rows(self.restocked)]
+
+    def new_listings(self):
+        return [{'section': section, 'row': row, 'price': price, 'available': available}
+                for (section, row), price, available in zip(self.keys(self.added), self.added_prices.tolist(),
+                                                            self.added_available.tolist())]
+
+    def removed_listings(self):
+        return [{'section': section, 'row': row, 'price': price}
+                for (section, row), price in zip(self.keys(self.removed), self.removed_prices.tolist())]
+
+    def changed_keys(self):
+        """(section, row) keys with a listing that moved, appeared or went away"""
+        return (set(self.keys(self.matched[self.changed])) | set(self.keys(self.added))
+                | set(self.keys(self.removed)))
+
+    def unchanged_keys(self):
+        """Current keys whose listings are all identical to the previous ones"""
+        return set(self.keys(self.matched)) - self.changed_keys()
+
+    def summary(self):
+        return {
+            'matched': int(len(self.matched)),
+            'drops': int(self.dropped.sum()),
+            'increases': int(self.increased.sum()),
+            'sold_out': int(self.went_sold_out.sum()),
+            'back_in_stock': int(self.restocked.sum()),
+            'new': int(len(self.added)),
+            'removed': int(len(self.removed)),
+        }
+
+
+def diff_snapshots(previous, current):
+    """Compare two snapshots (or lists of ticket dicts) of one event"""
+    previous = TicketSnapshot.from_dicts(previous or [])
+    current = TicketSnapshot.from_dicts(current or [])
+
+    sections, rows = {}, {}
+    previous_maps = _code_maps(previous, sections, rows)
+    current_maps = _code_maps(current, sections, rows)
+    row_count = max(1, len(rows))
+    old_keys, old_prices, old_available = _listings(previous, *previous_maps, row_count)
+    new_keys, new_prices, new_available = _listings(current, *current_maps, row_count)
+
+    # Prices become ranks so one int64 orders (key, availability, price);
+    # a missing price ranks last and is never identical to anything
+    distinct, price_codes = np.unique(np.concatenate([old_prices, new_prices]), return_inverse=True)
+    price_codes = price_codes.reshape(-1).astype(np.int64)
+    price_count = len(distinct) + 1
+    price_codes[np.isnan(np.concatenate([old_prices, new_prices]))] = price_count - 1
+    old_codes, new_codes = price_codes[:len(old_keys)], price_codes[len(old_keys):]
+
+    old_identity = (old_keys * 2 + old_available) * price_count + old_codes
+    new_identity = (new_keys * 2 + new_available) * price_count + new_codes
+    old_identity[old_codes == price_count - 1] = -1
+    new_identity[new_codes == price_count - 1] = -1
+    old_index, new_index = _pair(old_identity, new_identity)
+    old_rest = np.setdiff1d(np.arange(len(old_keys)), old_index, assume_unique=True)
+    new_rest = np.setdiff1d(np.arange(len(new_keys)), new_index, assume_unique=True)
+    # What is left of each key pairs up cheapest first
+    moved_old, moved_new = _pair(old_keys[old_rest] * price_count + old_codes[old_rest],
+                                 new_keys[new_rest] * price_count + new_codes[new_rest], price_count)
+    old_index = np.concatenate([old_index, old_rest[moved_old]])
+    new_index = np.concatenate([new_index, new_rest[moved_new]])
+    by_position = np.argsort(new_index, kind='stable')
+    old_index, new_index = old_index[by_position], new_index[by_position]
+    added = np.setdiff1d(new_rest, new_rest[moved_new], assume_unique=True)
+    removed = np.setdiff1d(old_rest, old_rest[moved_old], assume_unique=True)
+
+    return SnapshotDiff(
+        list(sections), list(rows), row_count, new_keys[new_index], old_index, new_index,
+        old_prices[old_index], new_prices[new_index], old_available[old_index], new_available[new_index],
+        new_keys[added], added, new_prices[added], new_available[added],
+        old_keys[removed], old_prices[removed],
+    )
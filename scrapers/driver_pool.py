@@ -0,0 +1,173 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+from contextlib import contextmanager
+from utils.metrics import driver_acquire_seconds, driver_starts, gauge
+from utils.profiling import trace_webdriver
+import threading
+import weakref
+import atexit
+import time
+import os
+
+
+def headless_chrome():
+    """Build the headless Chrome used for Toyota Center pages"""
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    return webdriver.Chrome(options=chrome_options)
+
+
+class PooledDriver:
+    """A browser owned by the pool plus the bookkeeping used to recycle it"""
+    def __init__(self, driver):
+        self.driver = driver
+        self.created_at = time.monotonic()
+        self.pages = 0
+
+    def age(self):
+        return time.monotonic() - self.created_at
+
+
+class DriverPool:
+    """Leases warm browsers to callers instead of starting one per page.
+
+    Browsers are started lazily up to ``max_size``, health-checked before
+    every lease and recycled after ``max_pages`` page loads or once they are
+    older than ``max_age`` seconds. ``name`` labels the pool's metrics.
+    """
+    def __init__(self, factory=headless_chrome, max_size=2, max_pages=50,
+                 max_age=1800, lease_timeout=120, name='default'):
+        self.factory = factory
+        self.name = name
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.max_age = max_age
+        self.lease_timeout = lease_timeout
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self._lock = threading.Condition()
+        _pools.add(self)
+
+    @contextmanager
+    def lease(self):
+        """Borrow a driver for the duration of the ``with`` block"""
+        with driver_acquire_seconds.time(pool=self.name):
+            pooled = self._acquire()
+        broken = False
+        try:
+            yield pooled.driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            pooled.pages += 1
+            self._release(pooled, broken)
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.lease_timeout
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._total < self.max_size:
+                    self._total += 1
+                    pooled = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No browser available after {self.lease_timeout}s")
+                self._lock.wait(remaining)
+
+        # Health checks and browser startup happen outside the lock so other
+        # callers can keep leasing while a slow Chrome boots.
+        if pooled is not None and self._is_healthy(pooled):
+            return pooled
+        if pooled is not None:
+            self._quit(pooled)
+        try:
+            pooled = PooledDriver(trace_webdriver(self.factory()))
+            driver_starts.inc(pool=self.name)
+            return pooled
+        except Exception:
+            with self._lock:
+                self._total -= 1
+                self._lock.notify()
+            raise
+
+    def _release(self, pooled, broken=False):
+        expired = pooled.pages >= self.max_pages or pooled.age() >= self.max_age
+        with self._lock:
+            if not (broken or expired or self._closed):
+                self._idle.append(pooled)
+                self._lock.notify()
+                return
+            self._total -= 1
+            self._lock.notify()
+        self._quit(pooled)
+
+    def _is_healthy(self, pooled):
+        if pooled.pages >= self.max_pages or pooled.age() >= self.max_age:
+            return False
+        try:
+            pooled.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {'total': self._total, 'idle': len(self._idle), 'max_size': self.max_size}
+
+    def close(self):
+        """Quit every idle browser; leased ones are quit when returned"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._lock.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+_pools = weakref.WeakSet()
+
+
+def _pool_sizes():
+    sizes = {}
+    for pool in list(_pools):
+        stats = pool.stats()
+        sizes[(pool.name, 'idle')] = stats['idle']
+        sizes[(pool.name, 'leased')] = stats['total'] - stats['idle']
+    return sizes
+
+
+gauge('driver_pool_browsers', 'Browsers held by each pool, idle or leased', ('pool', 'state'), fn=_pool_sizes)
+
+
+def get_default_pool():
+    """Process-wide pool shared by the API handlers and the scheduler"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = DriverPool(
+                max_size=int(os.getenv("DRIVER_POOL_SIZE", "2")),
+                max_pages=int(os.getenv("DRIVER_MAX_PAGES", "50")),
+                max_age=int(os.getenv("DRIVER_MAX_AGE", "1800")),
+            )
+            atexit.register(_default_pool.close)
+        return _default_pool
@@ -0,0 +1,26 @@
+# Collects every listing node in one WebDriver round trip. innerText matches
+# what Selenium's element.text returns for rendered elements.
+EXTRACT_SCRIPT = """
+const records = [];
+for (const el of document.querySelectorAll(arguments[0])) {
+    const attributes = {};
+    for (const attr of el.attributes) {
+        attributes[attr.name] = attr.value;
+    }
+    records.push({
+        text: el.innerText || '',
+        parent_text: el.parentElement ? (el.parentElement.innerText || '') : '',
+        attributes: attributes
+    });
+}
+return records;
+"""
+
+
+def extract_listing_records(driver, selector):
+    """Text, parent text and attributes of every node matching selector.
+
+    Replaces a find_elements call followed by one ``.text`` (and one parent
+    lookup) round trip per element with a single injected script.
+    """
+    return driver.execute_script(EXTRACT_SCRIPT, selector) or []
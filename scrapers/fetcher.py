@@ -0,0 +1,238 @@
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+from collections import OrderedDict, Counter
+from utils.metrics import scrape_seconds, scrape_phase_seconds, scrape_failures
+import threading
+import atexit
+import time
+import json
+import re
+import os
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+PRICE_KEYS = ('price', 'lowPrice', 'listPrice', 'displayPrice', 'priceValue', 'amount')
+SECTION_KEYS = ('section', 'sectionName', 'section_name', 'sectionLabel')
+ROW_KEYS = ('row', 'rowName', 'row_name')
+STATE_ASSIGNMENT = re.compile(r'window\.__[A-Z_]+__\s*=\s*')
+
+
+def build_session(pool_size=10):
+    """requests.Session with a keep-alive connection pool"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+def extract_structured_data(html):
+    """All JSON blobs embedded in a page: ld+json, __NEXT_DATA__ and window.__STATE__ assignments"""
+    soup = BeautifulSoup(html, 'html.parser')
+    blobs = []
+    for script in soup.find_all('script'):
+        body = script.string or ''
+        if not body.strip():
+            continue
+        if script.get('type') in ('application/ld+json', 'application/json') or script.get('id') == '__NEXT_DATA__':
+            try:
+                blobs.append(json.loads(body))
+            except ValueError:
+                pass
+            continue
+        for match in STATE_ASSIGNMENT.finditer(body):
+            try:
+                blob, _ = json.JSONDecoder().raw_decode(body, match.end())
+                blobs.append(blob)
+            except ValueError:
+                pass
+    return blobs
+
+
+def parse_price(value):
+    if isinstance(value, dict):
+        for key in ('amount', 'value', 'price'):
+            if key in value:
+                return parse_price(value[key])
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        match = re.search(r'(\d+(?:,\d{3})*(?:\.\d+)?)', value)
+        if match:
+            return float(match.group(1).replace(',', ''))
+    return None
+
+
+def _first(node, keys):
+    for key in keys:
+        if node.get(key) not in (None, ''):
+            return node[key]
+    return None
+
+
+def _is_available(node):
+    if 'available' in node:
+        return bool(node['available'])
+    if 'soldOut' in node:
+        return not node['soldOut']
+    availability = str(node.get('availability') or node.get('status') or '').lower()
+    return 'soldout' not in availability.replace(' ', '').replace('_', '')
+
+
+def _walk(node):
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk(item)
+
+
+def find_ticket_listings(blobs):
+    """Listings found in structured data as scraper ticket dicts.
+
+    A listing is any object with a price plus a section, or a schema.org
+    Offer, whose name/category stands in for the section.
+    """
+    tickets = []
+    for node in (n for blob in blobs for n in _walk(blob)):
+        price = parse_price(_first(node, PRICE_KEYS))
+        if price is None or price <= 0:
+            continue
+        section = _first(node, SECTION_KEYS)
+        if section is None and node.get('@type') == 'Offer':
+            section = node.get('category') or node.get('name')
+        if section is None:
+            continue
+        ticket = {
+            'section': re.sub(r'^(?:section|sec)\s*', '', str(section), flags=re.IGNORECASE) or 'General',
+            'price': price,
+            'available': _is_available(node)
+        }
+        row = _first(node, ROW_KEYS)
+        if row is not None:
+            ticket['row'] = str(row)
+        tickets.append(ticket)
+    return tickets
+
+
+def find_event_info(blobs):
+    """Event name/date from a schema.org Event, or else from an ``event`` object"""
+    nodes = [n for blob in blobs for n in _walk(blob)]
+    for node in nodes:
+        if str(node.get('@type', '')).endswith('Event') and node.get('name'):
+            return {'name': node['name'], 'date': node.get('startDate', 'Date TBD')}
+    for node in nodes:
+        event = node.get('event')
+        if isinstance(event, dict) and event.get('name'):
+            return {'name': event['name'], 'date': event.get('date') or event.get('startDate') or 'Date TBD'}
+    return {}
+
+
+class TieredFetcher:
+    """Tries a plain HTTP fetch plus structured-data extraction before a browser.
+
+    ``fetch(url, browser_fetch)`` returns ``(data, tier)`` where tier is
+    ``'http'`` when embedded JSON was enough and ``'browser'`` when it fell
+    back to ``browser_fetch(url)``. The serving tier of recent URLs is kept
+    in ``tiers`` and totals in ``tier_counts``. Timings are exported under
+    ``source``.
+    """
+    def __init__(self, session=None, timeout=10, enabled=None, history=1000, source='unknown'):
+        self.session = session or build_session()
+        self.source = source
+        self.timeout = timeout
+        self.enabled = os.getenv("FETCH_HTTP_TIER", "1") == "1" if enabled is None else enabled
+        self.history = history
+        self.tiers = OrderedDict()
+        self.tier_counts = Counter()
+        self._lock = threading.Lock()
+
+    def fetch_structured(self, url):
+        """HTTP tier: event info and listings from embedded JSON, or None"""
+        try:
+            with scrape_phase_seconds.time(source=self.source, phase='http_fetch'):
+                response = self.session.get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                scrape_failures.inc(source=self.source, stage='http')
+                return None
+            start = time.perf_counter()
+            if 'json' in response.headers.get('Content-Type', ''):
+                blobs = [response.json()]
+            else:
+                blobs = extract_structured_data(response.text)
+        except Exception as e:
+            scrape_failures.inc(source=self.source, stage='http')
+            print(f"HTTP fetch failed for {url}: {e}")
+            return None
+
+        tickets = find_ticket_listings(blobs)
+        scrape_phase_seconds.observe(time.perf_counter() - start, source=self.source, phase='http_parse')
+        if not tickets:
+            return None
+        return {'event_info': find_event_info(blobs), 'tickets': tickets}
+
+    def fetch(self, url, browser_fetch):
+        start = time.perf_counter()
+        data = self.fetch_structured(url) if self.enabled else None
+        tier = 'http'
+        if data is None:
+            data = browser_fetch(url)
+            tier = 'browser'
+        scrape_seconds.observe(time.perf_counter() - start, source=self.source, tier=tier)
+        if not data.get('tickets'):
+            scrape_failures.inc(source=self.source, stage='empty')
+        self.record(url, tier)
+        return data, tier
+
+    def record(self, url, tier):
+        with self._lock:
+            self.tiers[url] = tier
+            self.tiers.move_to_end(url)
+            while len(self.tiers) > self.history:
+                self.tiers.popitem(last=False)
+            self.tier_counts[tier] += 1
+
+    def tier_for(self, url):
+        return self.tiers.get(url)
+
+    def stats(self):
+        with self._lock:
+            return {'enabled': self.enabled, 'urls': len(self.tiers), 'tier_counts': dict(self.tier_counts)}
+
+
+_default_fetchers = {}
+_default_fetchers_lock = threading.Lock()
+
+
+def get_default_fetcher(source):
+    """Process-wide fetcher for ``source``, so its HTTP session and per-URL
+    tiers outlive any one scraper"""
+    with _default_fetchers_lock:
+        if source not in _default_fetchers:
+            fetcher = TieredFetcher(source=source)
+            atexit.register(fetcher.session.close)
+            _default_fetchers[source] = fetcher
+        return _default_fetchers[source]
+
+
+def tier_for(url):
+    """Tier that last served ``url`` in this process, or None"""
+    for fetcher in list(_default_fetchers.values()):
+        tier = fetcher.tier_for(url)
+        if tier is not None:
+            return tier
+    return None
+
+
+def fetcher_stats():
+    return {source: fetcher.stats() for source, fetcher in list(_default_fetchers.items())}
@@ -0,0 +1,89 @@
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+import random
+import time
+import os
+
+# Records the time of the last DOM mutation so we can tell when the page has
+# stopped rendering, then reports that alongside the listing count.
+PROBE_SCRIPT = """
+const selector = arguments[0];
+if (!window.__readinessProbe) {
+    window.__readinessProbe = {last: performance.now()};
+    new MutationObserver(() => { window.__readinessProbe.last = performance.now(); })
+        .observe(document.documentElement, {childList: true, subtree: true, characterData: true});
+}
+return {
+    count: document.querySelectorAll(selector).length,
+    quiet: performance.now() - window.__readinessProbe.last,
+    state: document.readyState
+};
+"""
+
+
+class ListingsSettled:
+    """Explicit-wait condition: listings present, count stable and DOM quiet"""
+    def __init__(self, selector, quiet_period, empty_grace):
+        self.selector = selector
+        self.quiet_ms = quiet_period * 1000
+        self.empty_grace = empty_grace
+        self.start = time.monotonic()
+        self.last_count = None
+        self.count = 0
+
+    def __call__(self, driver):
+        try:
+            probe = driver.execute_script(PROBE_SCRIPT, self.selector)
+        except Exception:
+            # Navigation still in progress; the document is being replaced
+            return False
+        previous, self.last_count = self.last_count, probe['count']
+        self.count = probe['count']
+        if probe['state'] != 'complete' or probe['quiet'] < self.quiet_ms:
+            return False
+        if probe['count']:
+            return probe['count'] == previous
+        return time.monotonic() - self.start >= self.empty_grace
+
+
+def wait_for_listings(driver, selector, deadline=20, quiet_period=0.5, empty_grace=3, poll=0.1):
+    """Return as soon as the listing containers are present and stable.
+
+    Ready means the document has loaded, ``selector`` matches the same number
+    of nodes on two consecutive polls and the DOM has not mutated for
+    ``quiet_period`` seconds. A page that stays quiet with no listings for
+    ``empty_grace`` seconds (sold out, no inventory) is ready too. Gives up
+    after ``deadline`` seconds and reports ``ready: False``.
+    """
+    condition = ListingsSettled(selector, quiet_period, empty_grace)
+    try:
+        WebDriverWait(driver, deadline, poll_frequency=poll).until(condition)
+        ready = True
+    except TimeoutException:
+        ready = False
+    return {
+        'ready': ready,
+        'listings': condition.count,
+        'elapsed': round(time.monotonic() - condition.start, 3)
+    }
+
+
+class JitterPolicy:
+    """Optional human-like pauses, kept apart from the fetch path.
+
+    Disabled unless a maximum delay is configured, e.g. AXS_JITTER_MAX=5.
+    """
+    def __init__(self, min_delay=0.0, max_delay=0.0):
+        self.min_delay = min_delay
+        self.max_delay = max(max_delay, min_delay)
+
+    @classmethod
+    def from_env(cls, prefix):
+        return cls(
+            float(os.getenv(f"{prefix}_JITTER_MIN", "0")),
+            float(os.getenv(f"{prefix}_JITTER_MAX", "0")),
+        )
+
+    def pause(self):
+        if self.max_delay > 0:
+            time.sleep(random.uniform(self.min_delay, self.max_delay))
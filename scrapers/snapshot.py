@@ -0,0 +1,202 @@
+"""
+Compact, column-oriented container for one scrape's ticket listings.
+
+A list of ticket dicts costs a few hundred bytes per listing. TicketSnapshot
+keeps section and row names interned once per snapshot and stores each
+listing as small integer codes plus a price and availability flag in
+``array`` columns, so a 10,000-listing arena takes a few hundred KB. Sorting,
+min/max and per-section grouping work on the columns directly; sorting and
+reordering go through NumPy views of them.
+
+Iterating a snapshot, or calling ``to_dicts()``, yields the same ticket
+dicts the scrapers used to return, so existing consumers and the API's
+JSON keep working unchanged.
+"""
+
+from array import array
+
+import numpy as np
+
+# Code 0 in the row column means the listing has no row; fees_included uses
+# -1 for unknown
+NO_ROW = 0
+UNKNOWN = -1
+
+
+def _view(column):
+    """NumPy view of an ``array`` column, which shares its typecodes"""
+    if not len(column):
+        return np.zeros(0, dtype=column.typecode)
+    return np.frombuffer(column, dtype=column.typecode)
+
+
+class TicketSnapshot:
+    __slots__ = ('source', 'section_names', 'row_names', '_section_codes', '_row_codes',
+                 'sections', 'rows', 'prices', 'available', 'fees_included')
+
+    def __init__(self, source=None):
+        self.source = source
+        self.section_names = []
+        self.row_names = [None]
+        self._section_codes = {}
+        self._row_codes = {}
+        self.sections = array('I')
+        self.rows = array('I')
+        self.prices = array('d')
+        self.available = array('b')
+        self.fees_included = None
+
+    @classmethod
+    def from_dicts(cls, tickets, source=None):
+        """Build from scraper ticket dicts; ``source`` defaults to the first ticket's"""
+        if isinstance(tickets, cls):
+            return tickets
+        snapshot = cls(source)
+        for ticket in tickets:
+            if snapshot.source is None:
+                snapshot.source = ticket.get('source')
+            snapshot.append(ticket.get('section'), ticket['price'], ticket.get('available', True),
+                            ticket.get('row'), ticket.get('fees_included'))
+        return snapshot
+
+    def _code(self, names, codes, value):
+        code = codes[value] = len(names)
+        names.append(value)
+        return code
+
+    def append(self, section, price, available=True, row=None, fees_included=None):
+        # Called once per scraped listing, so the common case avoids method calls
+        section = section or 'General'
+        code = self._section_codes.get(section)
+        self.sections.append(self._code(self.section_names, self._section_codes, section) if code is None else code)
+        if row is None:
+            self.rows.append(NO_ROW)
+        else:
+            row = str(row)
+            code = self._row_codes.get(row)
+            self.rows.append(self._code(self.row_names, self._row_codes, row) if code is None else code)
+        self.prices.append(float(price))
+        self.available.append(1 if available else 0)
+        if fees_included is not None and self.fees_included is None:
+            self.fees_included = array('b', [UNKNOWN]) * (len(self.prices) - 1)
+        if self.fees_included is not None:
+            self.fees_included.append(UNKNOWN if fees_included is None else int(bool(fees_included)))
+
+    def __len__(self):
+        return len(self.prices)
+
+    def __bool__(self):
+        return len(self.prices) > 0
+
+    def ticket(self, i):
+        """Listing ``i`` as a scraper ticket dict"""
+        data = {'section': self.section_names[self.sections[i]], 'price': self.prices[i],
+                'available': bool(self.available[i])}
+        if self.rows[i] != NO_ROW:
+            data['row'] = self.row_names[self.rows[i]]
+        if self.fees_included is not None and self.fees_included[i] != UNKNOWN:
+            data['fees_included'] = bool(self.fees_included[i])
+        if self.source is not None:
+            data['source'] = self.source
+        return data
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.ticket(j) for j in range(len(self))[i]]
+        return self.ticket(range(len(self))[i])
+
+    def __iter__(self):
+        return iter(self.to_dicts())
+
+    def to_dicts(self):
+        """All listings as scraper ticket dicts"""
+        # Decode each column once (tolist, code -> name lists) rather than per item
+        sections = [self.section_names[s] for s in self.sections.tolist()]
+        rows = self.rows.tolist()
+        row_names = self.row_names
+        prices = self.prices.tolist()
+        flags = (False, True)
+        available = [flags[a] for a in self.available.tolist()]
+        if self.source is None:
+            tickets = [{'section': s, 'price': p, 'available': a} for s, p, a in zip(sections, prices, available)]
+        else:
+            source = self.source
+            tickets = [{'section': s, 'price': p, 'available': a, 'source': source}
+                       for s, p, a in zip(sections, prices, available)]
+        for ticket, r in zip(tickets, rows):
+            if r != NO_ROW:
+                ticket['row'] = row_names[r]
+        if self.fees_included is not None:
+            for ticket, f in zip(tickets, self.fees_included.tolist()):
+                if f != UNKNOWN:
+                    ticket['fees_included'] = f == 1
+        return tickets
+
+    def __eq__(self, other):
+        if isinstance(other, (TicketSnapshot, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"<TicketSnapshot {len(self)} listings, {len(self.section_names)} sections, source={self.source!r}>"
+
+    def records(self):
+        """(section, row, price, available) tuples, row None when missing;
+        cheaper than dicts for bulk consumers"""
+        sections, rows = self.section_names, self.row_names
+        for s, r, price, available in zip(self.sections, self.rows, self.prices, self.available):
+            yield sections[s], rows[r], price, bool(available)
+
+    def take(self, order):
+        """New snapshot with the listings at positions ``order``, sharing the string tables"""
+        snapshot = TicketSnapshot(self.source)
+        snapshot.section_names, snapshot._section_codes = self.section_names, self._section_codes
+        snapshot.row_names, snapshot._row_codes = self.row_names, self._row_codes
+        order = np.asarray(order, dtype=np.intp)
+        for name in ('sections', 'rows', 'prices', 'available', 'fees_included'):
+            column = getattr(self, name)
+            if column is not None:
+                picked = array(column.typecode)
+                picked.frombytes(_view(column)[order].tobytes())
+                setattr(snapshot, name, picked)
+        return snapshot
+
+    def price_order(self, reverse=False):
+        """Listing positions from cheapest to dearest, as a NumPy array; ties
+        keep scrape order either way"""
+        prices = _view(self.prices)
+        return np.argsort(-prices if reverse else prices, kind='stable')
+
+    def sorted_by_price(self, reverse=False):
+        return self.take(self.price_order(reverse))
+
+    def min_price(self, available_only=False):
+        prices = self._prices(available_only)
+        return min(prices) if prices else None
+
+    def max_price(self, available_only=False):
+        prices = self._prices(available_only)
+        return max(prices) if prices else None
+
+    def price_range(self):
+        return {'min': self.min_price(), 'max': self.max_price()}
+
+    def _prices(self, available_only):
+        if not available_only:
+            return self.prices
+        return [p for p, a in zip(self.prices, self.available) if a]
+
+    def by_section(self):
+        """Per-section count, available count and min/max price"""
+        groups = {}
+        for s, price, available in zip(self.sections, self.prices, self.available):
+            g = groups.get(s)
+            if g is None:
+                groups[s] = g = {'count': 0, 'available': 0, 'min': price, 'max': price}
+            g['count'] += 1
+            g['available'] += available
+            if price < g['min']:
+                g['min'] = price
+            elif price > g['max']:
+                g['max'] = price
+        return {self.section_names[s]: g for s, g in groups.items()}
@@ -1,17 +1,26 @@
-import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-import json
-import time
+from scrapers.driver_pool import get_default_pool
+from scrapers.fetcher import get_default_fetcher
+from scrapers.readiness import wait_for_listings
+from scrapers.extraction import extract_listing_records
+from scrapers.snapshot import TicketSnapshot
+from scrapers.diff import diff_snapshots
+from utils.metrics import scrape_phase_seconds, scrape_failures
+from utils.profiling import profiler
 from datetime import datetime
 import re
+import os
+
+LISTING_SELECTOR = '[class*="price"], [class*="ticket"]'
+SOURCE = 'toyota_center'
+SOURCE_NAME = 'Toyota Center'
 
 class ToyotaCenterScraper:
-    def __init__(self):
+    def __init__(self, driver_pool=None, fetcher=None):
+        self.driver_pool = driver_pool
+        self.fetcher = fetcher or get_default_fetcher(SOURCE)
+        self.last_snapshots = {}
+        self.page_deadline = float(os.getenv("TOYOTA_CENTER_PAGE_DEADLINE", "15"))
         self.base_url = "https://www.toyotacenter.com"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
@@ -20,104 +29,120 @@ class ToyotaCenterScraper:
     def get_upcoming_events(self):
         """Scrape upcoming events from Toyota Center website"""
         try:
-            response = requests.get(f"{self.base_url}/events", headers=self.headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            events = []
-            event_elements = soup.find_all('div', class_='event-item') or soup.find_all('article', class_='event')
-            
-            for event in event_elements:
-                event_data = {
-                    'name': event.find('h3', class_='event-title') or event.find('h2'),
-                    'date': event.find('time') or event.find('span', class_='date'),
-                    'url': event.find('a', href=True)
-                }
-                
-                if event_data['name'] and event_data['url']:
-                    events.append({
-                        'name': event_data['name'].text.strip(),
-                        'date': event_data['date'].text.strip() if event_data['date'] else 'TBD',
-                        'url': event_data['url']['href'] if not event_data['url']['href'].startswith('http') 
-                               else event_data['url']['href']
-                    })
-            
-            return events
+            response = self.fetch_events_page()
+            return self.parse_events(response.content)
         except Exception as e:
             print(f"Error scraping events: {e}")
             return []
     
+    def fetch_events_page(self, etag=None, last_modified=None):
+        """GET the events listing over the pooled session, conditionally if validators are given"""
+        headers = dict(self.headers)
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return self.fetcher.session.get(f"{self.base_url}/events", headers=headers, timeout=self.fetcher.timeout)
+    
+    def parse_events(self, html):
+        """Event name/date/url dicts from the events listing page"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        events = []
+        event_elements = soup.find_all('div', class_='event-item') or soup.find_all('article', class_='event')
+        
+        for event in event_elements:
+            event_data = {
+                'name': event.find('h3', class_='event-title') or event.find('h2'),
+                'date': event.find('time') or event.find('span', class_='date'),
+                'url': event.find('a', href=True)
+            }
+            
+            if event_data['name'] and event_data['url']:
+                events.append({
+                    'name': event_data['name'].text.strip(),
+                    'date': event_data['date'].text.strip() if event_data['date'] else 'TBD',
+                    'url': event_data['url']['href'] if not event_data['url']['href'].startswith('http') 
+                           else event_data['url']['href']
+                })
+        
+        return events
+    
     def get_ticket_prices(self, event_url):
+        """Get ticket prices for a specific event, escalating to Selenium only
+        when the page's embedded JSON has no listings"""
+        with profiler.capture(SOURCE, event_url):
+            data, tier = self.fetcher.fetch(event_url, lambda url: {'tickets': self.get_ticket_prices_with_browser(url)})
+        tickets = TicketSnapshot.from_dicts(data['tickets'])
+        tickets.source = SOURCE_NAME
+        return tickets
+    
+    def get_ticket_prices_with_browser(self, event_url):
         """Get ticket prices for a specific event using Selenium"""
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        
-        driver = webdriver.Chrome(options=chrome_options)
+        pool = self.driver_pool or get_default_pool()
         
         try:
-            driver.get(event_url)
-            time.sleep(3)
-            
-            ticket_data = []
-            
-            price_elements = driver.find_elements(By.CSS_SELECTOR, '[class*="price"], [class*="ticket"]')
-            
-            for element in price_elements:
-                text = element.text
-                price_match = re.search(r'\$(\d+(?:\.\d{2})?)', text)
+            with pool.lease() as driver:
+                with scrape_phase_seconds.time(source=SOURCE, phase='page_load'):
+                    driver.get(event_url)
+                with scrape_phase_seconds.time(source=SOURCE, phase='wait'):
+                    wait_for_listings(driver, LISTING_SELECTOR, deadline=self.page_deadline)
                 
-                if price_match:
-                    price = float(price_match.group(1))
-                    section = "General"
-                    
-                    parent = element.find_element(By.XPATH, '..')
-                    section_text = parent.text
-                    
-                    if 'section' in section_text.lower():
-                        section_match = re.search(r'section\s*(\w+)', section_text, re.IGNORECASE)
-                        if section_match:
-                            section = section_match.group(1)
-                    
-                    ticket_data.append({
-                        'section': section,
-                        'price': price,
-                        'available': 'sold out' not in text.lower(),
-                        'source': 'Toyota Center'
-                    })
-            
-            return ticket_data
+                with scrape_phase_seconds.time(source=SOURCE, phase='extract'):
+                    records = extract_listing_records(driver, LISTING_SELECTOR)
+                
+            with scrape_phase_seconds.time(source=SOURCE, phase='parse'):
+                return self.parse_listing_records(records)
             
         except Exception as e:
+            scrape_failures.inc(source=SOURCE, stage='browser')
             print(f"Error getting ticket prices: {e}")
-            return []
-        finally:
-            driver.quit()
+            return TicketSnapshot(SOURCE_NAME)
+    
+    def parse_listing_records(self, records):
+        """Turn extracted listing records into a TicketSnapshot"""
+        ticket_data = TicketSnapshot(SOURCE_NAME)
+        
+        for record in records:
+            text = record['text']
+            price_match = re.search(r'\$(\d+(?:\.\d{2})?)', text)
+            
+            if price_match:
+                price = float(price_match.group(1))
+                section = "General"
+                
+                section_text = record['parent_text']
+                
+                if 'section' in section_text.lower():
+                    section_match = re.search(r'section\s*(\w+)', section_text, re.IGNORECASE)
+                    if section_match:
+                        section = section_match.group(1)
+                
+                ticket_data.append(section, price, 'sold out' not in text.lower())
+        
+        return ticket_data
     
     def monitor_price_drops(self, events_to_monitor):
-        """Monitor multiple events for price drops"""
+        """Monitor multiple events for price drops since the previous call"""
         price_drops = []
         
         for event in events_to_monitor:
             current_prices = self.get_ticket_prices(event['url'])
+            previous_prices = self.last_snapshots.get(event['url'])
+            if current_prices:
+                self.last_snapshots[event['url']] = current_prices
+            if not previous_prices or not current_prices:
+                continue
             
-            for ticket in current_prices:
-                historical_price = self.get_historical_price(event['name'], ticket['section'])
-                
-                if historical_price and ticket['price'] < historical_price:
-                    drop_percentage = ((historical_price - ticket['price']) / historical_price) * 100
-                    
-                    price_drops.append({
-                        'event': event['name'],
-                        'section': ticket['section'],
-                        'old_price': historical_price,
-                        'new_price': ticket['price'],
-                        'drop_percentage': round(drop_percentage, 2),
-                        'detected_at': datetime.now()
-                    })
+            detected_at = datetime.now()
+            for drop in diff_snapshots(previous_prices, current_prices).drops():
+                price_drops.append({
+                    'event': event['name'],
+                    'section': drop['section'],
+                    'old_price': drop['old_price'],
+                    'new_price': drop['new_price'],
+                    'drop_percentage': round(drop['drop_percentage'], 2),
+                    'detected_at': detected_at
+                })
         
-        return price_drops
-    
-    def get_historical_price(self, event_name, section):
-        """Mock function to get historical price - should query database"""
-        return None
\ No newline at end of file
+        return price_drops
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+In-process fan-out of price changes to dashboard subscribers.
+
+Writers call ``publish_after_commit(db, kind, data)``; the message is held on
+the session and only broadcast once that session commits, so subscribers
+never see data that was rolled back. Each subscriber gets a bounded asyncio
+queue on its own event loop, fed thread-safely from scraper threads. A
+subscriber that falls too far behind is sent a single 'resync' message and
+should reload full lists. The last ``history`` messages are kept so a
+reconnecting client can catch up from its Last-Event-ID.
+"""
+
+import sys
+sys.path.append('..')
+
+from sqlalchemy import event
+from models.database import SessionLocal
+from collections import deque
+import asyncio
+import itertools
+import threading
+import os
+
+
+class Subscriber:
+    def __init__(self, loop, size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=size)
+        self.lagging = False
+
+    def offer(self, message):
+        """Runs on the subscriber's loop"""
+        if self.lagging:
+            if not self.queue.empty():
+                return
+            # The client has drained the resync message and is reloading
+            self.lagging = False
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Drop everything queued and tell the client to reload
+            self.lagging = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'id': message['id'], 'kind': 'resync', 'data': {}})
+
+
+class Broadcaster:
+    def __init__(self, queue_size=None, history=None):
+        self.queue_size = queue_size or int(os.getenv("STREAM_QUEUE_SIZE", "100"))
+        self.history = deque(maxlen=history or int(os.getenv("STREAM_HISTORY", "256")))
+        self.subscribers = set()
+        self.published = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def has_subscribers(self):
+        return bool(self.subscribers)
+
+    def subscribe(self, last_event_id=None):
+        """Register the calling event loop; replays missed messages when possible"""
+        subscriber = Subscriber(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            backlog = list(self.history)
+            self.subscribers.add(subscriber)
+        if last_event_id is None:
+            return subscriber
+        latest = backlog[-1]['id'] if backlog else 0
+        if last_event_id > latest or (backlog and backlog[0]['id'] > last_event_id + 1):
+            # The server restarted or the gap is older than the history
+            subscriber.offer({'id': latest, 'kind': 'resync', 'data': {}})
+        else:
+            for message in backlog:
+                if message['id'] > last_event_id:
+                    subscriber.offer(message)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, kind, data):
+        """Safe to call from any thread"""
+        with self._lock:
+            message = {'id': next(self._ids), 'kind': kind, 'data': data}
+            self.history.append(message)
+            self.published += 1
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, message)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                self.unsubscribe(subscriber)
+        return message
+
+    def stats(self):
+        return {
+            'subscribers': len(self.subscribers),
+            'published': self.published,
+            'lagging': sum(1 for s in list(self.subscribers) if s.lagging),
+        }
+
+
+broadcaster = Broadcaster()
+
+
+def publish_after_commit(db, kind, data):
+    """Queue a message on the session, to be broadcast when it commits"""
+    db.info.setdefault('broadcasts', []).append((kind, data))
+
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _publish_pending(session):
+    for kind, data in session.info.pop('broadcasts', []):
+        broadcaster.publish(kind, data)
+
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop('broadcasts', None)
@@ -0,0 +1,62 @@
+"""
+Maintains the current_prices snapshot table.
+
+It holds every listing of each event's latest scrape, pointing at the
+ticket_prices run that holds its price, so drop detection and change-only
+storage read one event's snapshot in a single query instead of searching
+ticket_prices.
+
+Rebuild the table from existing history with:
+    python -m utils.current_prices backfill
+"""
+
+import sys
+sys.path.append('..')
+
+from models.database import engine, CurrentPrice
+from models.migrations import init_db, rebuild_current_prices
+from sqlalchemy import update, delete, bindparam
+
+
+def price_key(section, row=None):
+    return (section or 'General', row or '')
+
+
+def load_current_prices(db, event_id):
+    """Read an event's whole snapshot in one query, one row per listing"""
+    return db.query(CurrentPrice).filter(CurrentPrice.event_id == event_id).order_by(CurrentPrice.price_id).all()
+
+
+def update_current_prices(db, event_id, ended, added, now):
+    """Apply one scrape to an event's snapshot.
+
+    ``ended`` are the price_ids of listings that changed or went away,
+    ``added`` CurrentPrice mappings for the listings that start new runs.
+    Every other listing was seen again at ``now``.
+    """
+    current = CurrentPrice.__table__
+    if ended:
+        db.connection().execute(delete(current).where(
+            current.c.event_id == event_id,
+            current.c.price_id == bindparam('b_price_id')
+        ), [{'b_price_id': price_id} for price_id in ended])
+    db.execute(update(current).where(current.c.event_id == event_id).values(updated_at=now))
+    if added:
+        db.execute(current.insert(), added)
+
+
+def backfill():
+    """Rebuild current_prices from the runs covering each event's latest scrape"""
+    with engine.begin() as conn:
+        count = rebuild_current_prices(conn)
+    print(f"Backfilled {count} current prices")
+    return count
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["backfill"]:
+        init_db()
+        backfill()
+    else:
+        print("Usage: python -m utils.current_prices backfill")
+        sys.exit(1)
@@ -0,0 +1,131 @@
+import sys
+sys.path.append('..')
+
+from models.database import SessionLocal, Event
+from utils.broadcast import publish_after_commit
+from datetime import datetime
+import threading
+import time
+import re
+import os
+
+EVENT_DATE_FORMATS = (
+    '%b %d, %Y %I:%M %p', '%B %d, %Y %I:%M %p', '%b %d, %Y', '%B %d, %Y',
+    '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d', '%m/%d/%Y',
+)
+
+
+def parse_event_date(text):
+    """Best-effort datetime for listing dates like 'Sat, Jan 10, 2026 7:00 PM';
+    None when the text is missing or 'TBD'"""
+    if not text:
+        return None
+    # Drop a leading weekday and any time zone suffix
+    cleaned = re.sub(r'^[A-Za-z]{3,9},\s*', '', text.strip())
+    cleaned = re.sub(r'\s+(?!AM$|PM$)[A-Z]{2,4}$', '', cleaned)
+    cleaned = re.sub(r'\s+', ' ', cleaned).replace('.', '')
+    for fmt in EVENT_DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def bulk_upsert_events(db, events):
+    """Insert new events and refresh changed URLs with one lookup query"""
+    names = {e['name'] for e in events}
+    existing = {e.event_name: e for e in db.query(Event).filter(Event.event_name.in_(names)).all()} if names else {}
+    created = 0
+    for event in events:
+        current = existing.get(event['name'])
+        event_date = parse_event_date(event.get('date'))
+        if current is None:
+            current = Event(event_name=event['name'], event_date=event_date, url=event['url'])
+            db.add(current)
+            existing[event['name']] = current
+            created += 1
+            publish_after_commit(db, 'event', {'name': event['name'], 'date': event.get('date', 'TBD'), 'url': event['url']})
+        else:
+            if current.url != event['url']:
+                current.url = event['url']
+            if event_date and current.event_date != event_date:
+                current.event_date = event_date
+    db.commit()
+    return created
+
+
+def events_from_db():
+    """Known events in the /events response shape, used when the venue site is unreachable"""
+    db = SessionLocal()
+    try:
+        return [{
+            'name': e.event_name,
+            'date': e.event_date.strftime('%B %d, %Y') if e.event_date else 'TBD',
+            'url': e.url
+        } for e in db.query(Event).order_by(Event.event_date).all()]
+    finally:
+        db.close()
+
+
+class DiscoveryCache:
+    """Upcoming events cached for ``ttl`` seconds.
+
+    Once stale, the listing is revalidated with If-None-Match /
+    If-Modified-Since, so an unchanged page costs a 304 and no parsing or DB
+    work. Only changed listings are parsed and upserted.
+    """
+    def __init__(self, get_scraper, ttl=None):
+        # Called on the first refresh, so the scraper stack loads only when needed
+        self.get_scraper = get_scraper
+        self.ttl = ttl if ttl is not None else int(os.getenv("DISCOVERY_TTL", "600"))
+        self.events = None
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = 0
+        self.stats = {'hits': 0, 'revalidated': 0, 'refreshed': 0, 'errors': 0}
+        self._lock = threading.Lock()
+
+    def is_fresh(self):
+        return self.events is not None and time.monotonic() - self.fetched_at < self.ttl
+
+    def cached(self):
+        """Events if fresh, without touching the network"""
+        if self.is_fresh():
+            self.stats['hits'] += 1
+            return self.events
+        return None
+
+    def refresh(self):
+        """Revalidate against the venue site; falls back to stale data or the DB"""
+        with self._lock:
+            # Another caller may have refreshed while we waited for the lock
+            if self.is_fresh():
+                self.stats['hits'] += 1
+                return self.events
+            try:
+                scraper = self.get_scraper()
+                response = scraper.fetch_events_page(self.etag, self.last_modified)
+                if response.status_code == 304 and self.events is not None:
+                    self.stats['revalidated'] += 1
+                else:
+                    response.raise_for_status()
+                    events = scraper.parse_events(response.content)
+                    db = SessionLocal()
+                    try:
+                        bulk_upsert_events(db, events)
+                    finally:
+                        db.close()
+                    self.events = events
+                    self.etag = response.headers.get('ETag')
+                    self.last_modified = response.headers.get('Last-Modified')
+                    self.stats['refreshed'] += 1
+                self.fetched_at = time.monotonic()
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Error refreshing events: {e}")
+                if self.events is None:
+                    return events_from_db()
+                # Keep serving stale events and retry in a minute
+                self.fetched_at = time.monotonic() - self.ttl + min(60, self.ttl)
+            return self.events
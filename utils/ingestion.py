@@ -0,0 +1,189 @@
+"""
+Single write path for scraped ticket snapshots.
+
+Every caller that turns a scrape into rows goes through ingest_snapshot, so
+drop detection, the current_prices snapshot and the insert strategy live in
+one place. Drops and changed keys come from one vectorized diff_snapshots
+pass against the event's previous scrape. Prices and drops are written with
+one executemany each, or with COPY on Postgres. PRICE_STORAGE_MODE picks
+full or change-only history. The section_stats aggregates are updated in
+the same transaction. Changed prices and new drops are pushed to live
+subscribers on commit, and the event's cached API responses are invalidated.
+"""
+
+import sys
+sys.path.append('..')
+
+from models.database import Event, TicketPrice, PriceDrop
+from utils.current_prices import price_key, load_current_prices, update_current_prices
+from utils.broadcast import publish_after_commit
+from utils.response_cache import invalidate_after_commit, event_tag
+from utils.section_stats import record_section_stats
+from scrapers.snapshot import TicketSnapshot
+from scrapers.diff import diff_snapshots
+from sqlalchemy import select, update, bindparam
+from datetime import datetime
+import csv
+import io
+import os
+
+PRICE_COLUMNS = ('event_id', 'section', 'row', 'price', 'availability', 'source', 'tracked_at')
+DROP_COLUMNS = ('event_id', 'section', 'old_price', 'new_price', 'drop_percentage', 'detected_at')
+
+
+def _copy_rows(db, table, columns, rows):
+    """Stream rows through COPY ... FROM STDIN on the session's connection"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['\\N' if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def _bulk_insert(db, model, columns, rows):
+    if not rows:
+        return
+    if db.get_bind().dialect.name == 'postgresql':
+        _copy_rows(db, model.__tablename__, columns, rows)
+    else:
+        db.execute(model.__table__.insert(), rows)
+
+
+def storage_mode():
+    """'changes' writes a row only when a key's price or availability moves;
+    'full' writes every scraped ticket as before"""
+    return os.getenv("PRICE_STORAGE_MODE", "changes")
+
+
+def _extend_last_seen(db, rows):
+    """Push last_seen_at forward on the runs the scrape saw again"""
+    if not rows:
+        return
+    prices = TicketPrice.__table__
+    stmt = update(prices).where(prices.c.id == bindparam('b_id')).values(last_seen_at=bindparam('b_seen'))
+    db.connection().execute(stmt, rows)
+
+
+def _new_price_ids(db, event_id, now):
+    """ids of the ticket_prices rows this scrape inserted, in insertion order"""
+    prices = TicketPrice.__table__
+    return db.execute(select(prices.c.id).where(
+        prices.c.event_id == event_id,
+        prices.c.tracked_at == now
+    ).order_by(prices.c.id)).scalars().all()
+
+
+def _previous_snapshot(previous):
+    """current_prices rows as a snapshot; a missing price never compares equal"""
+    snapshot = TicketSnapshot()
+    for last in previous:
+        snapshot.append(last.section, float('nan') if last.price is None else last.price, last.availability, last.row)
+    return snapshot
+
+
+def _publish_changes(db, event_id, listings, changed_keys, drops, now):
+    """Queue every listing of the keys whose listings changed (an empty list
+    for keys that went away), and the new drops, for live subscribers"""
+    by_key = {key: [] for key in changed_keys}
+    for listing in listings:
+        key = price_key(listing['section'], listing['row'])
+        if key in by_key:
+            by_key[key].append({'price': listing['price'], 'available': listing['availability'],
+                                'source': listing['source']})
+    changed = [{'section': section, 'row': row, 'tickets': tickets} for (section, row), tickets in by_key.items()]
+    if not changed and not drops:
+        return
+    event_name = db.query(Event.event_name).filter(Event.id == event_id).scalar()
+    if changed:
+        publish_after_commit(db, 'prices', {
+            'event_id': event_id,
+            'event': event_name,
+            'tracked_at': now.isoformat(),
+            'keys': changed
+        })
+    for drop in drops:
+        publish_after_commit(db, 'drop', {
+            'event': event_name,
+            'section': drop['section'],
+            'old_price': drop['old_price'],
+            'new_price': drop['new_price'],
+            'drop_percentage': drop['drop_percentage'],
+            'detected_at': drop['detected_at'].isoformat()
+        })
+
+
+def ingest_snapshot(db, event_id, tickets, source=None, commit=True):
+    """Store one scrape of an event and return the price drops it revealed.
+
+    ``tickets`` is a TicketSnapshot or a list of scraper ticket dicts.
+
+    Drops are detected against the event's previous scrape, one per listing
+    that got cheaper. Prices, drops and the snapshot update are written in
+    the session's transaction, which is committed unless ``commit`` is False.
+    An empty scrape writes nothing.
+
+    In 'changes' storage mode a listing identical to one of the previous
+    scrape (same key, price and availability) continues that listing's run,
+    which only gets its last_seen_at extended; every other listing starts a
+    run. current_prices points each listing at its run.
+    """
+    now = datetime.utcnow()
+    tickets = TicketSnapshot.from_dicts(tickets)
+    if not len(tickets):
+        return []
+    previous = load_current_prices(db, event_id)
+    ticket_source = source or tickets.source
+    diff = diff_snapshots(_previous_snapshot(previous), tickets)
+
+    drops = [{
+        'event_id': event_id,
+        'section': drop['section'],
+        'old_price': drop['old_price'],
+        'new_price': drop['new_price'],
+        'drop_percentage': drop['drop_percentage'],
+        'detected_at': now
+    } for drop in diff.drops()]
+
+    listings = [{
+        'event_id': event_id,
+        'section': price_key(ticket_section)[0],
+        'row': ticket_row,
+        'price': price,
+        'availability': available,
+        'source': ticket_source,
+        'tracked_at': now
+    } for ticket_section, ticket_row, price, available in tickets.records()]
+
+    # New listing position -> previous listing whose run it continues
+    continued = {}
+    if storage_mode() == 'changes':
+        same = ~diff.changed
+        continued = dict(zip(diff.new_index[same].tolist(), diff.old_index[same].tolist()))
+    prices = [listing for i, listing in enumerate(listings) if i not in continued]
+    _extend_last_seen(db, [{'b_id': previous[j].price_id, 'b_seen': now} for j in continued.values()])
+    _bulk_insert(db, TicketPrice, PRICE_COLUMNS, prices)
+    _bulk_insert(db, PriceDrop, DROP_COLUMNS, drops)
+
+    kept = set(continued.values())
+    update_current_prices(
+        db, event_id,
+        [last.price_id for j, last in enumerate(previous) if j not in kept],
+        [dict(listing, price_id=price_id, row=listing['row'] or '', updated_at=now)
+         for listing, price_id in zip(prices, _new_price_ids(db, event_id, now))],
+        now
+    )
+    record_section_stats(db, event_id, listings, now)
+    _publish_changes(db, event_id, listings, diff.changed_keys(), drops, now)
+    invalidate_after_commit(db, event_tag(event_id), *(['drops'] if drops else []))
+
+    if commit:
+        db.commit()
+    return drops
@@ -0,0 +1,171 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from utils.metrics import gauge
+import threading
+import asyncio
+import uuid
+import os
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class Job:
+    def __init__(self, name):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    def to_dict(self, include_result=True):
+        data = {
+            'job_id': self.id,
+            'name': self.name,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+        if include_result and self.status == 'done':
+            data['result'] = self.result
+        if self.error:
+            data['error'] = self.error
+        return data
+
+
+class JobManager:
+    """Runs blocking scrapes on a thread pool so the event loop stays free.
+
+    At most ``max_pending`` jobs may be queued or running at once; beyond
+    that ``submit`` raises QueueFull so callers can shed load with a 429
+    instead of piling up latency. Finished jobs are kept for ``ttl`` seconds.
+    """
+    def __init__(self, workers=4, max_pending=32, ttl=3600):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._by_key = {}
+        self._pending = 0
+        self.coalesced = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    def _new_job(self, name):
+        """Caller holds the lock"""
+        self._prune()
+        if self._pending >= self.max_pending:
+            raise QueueFull(f"{self._pending} jobs already queued or running")
+        self._pending += 1
+        job = Job(name)
+        self._jobs[job.id] = job
+        return job
+
+    def submit(self, name, fn, *args, **kwargs):
+        with self._lock:
+            job = self._new_job(name)
+        job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+        job.future.add_done_callback(lambda future: self._finished(job, future))
+        return job
+
+    def submit_once(self, key, name, fn, *args, reuse_for=0):
+        """Submit unless a job with the same ``key`` is still queued or running,
+        or finished successfully less than ``reuse_for`` seconds ago; callers
+        then share that job and its result"""
+        with self._lock:
+            job = self._by_key.get(key)
+            if job is not None and job.status in ('queued', 'running'):
+                self.coalesced += 1
+                return job
+            if job is not None and job.status == 'done' and job.finished_at \
+                    and job.finished_at > datetime.utcnow() - timedelta(seconds=reuse_for):
+                self.reused += 1
+                return job
+            job = self._new_job(name)
+            self._by_key[key] = job
+            # Submitted under the lock so joiners never see a job without a future
+            job.future = self._executor.submit(self._run, job, fn, args, {})
+        # Outside the lock: an already finished future runs the callback inline
+        job.future.add_done_callback(lambda future: self._finished(job, future))
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = 'done'
+            return job.result
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+            raise
+        finally:
+            job.finished_at = datetime.utcnow()
+
+    def _finished(self, job, future):
+        """Release the job's slot once its future settles, including a queued
+        job whose future was cancelled before _run ever started"""
+        if future.cancelled():
+            job.status = 'cancelled'
+            job.finished_at = datetime.utcnow()
+        with self._lock:
+            self._pending -= 1
+
+    def _prune(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+        for key in [k for k, job in self._by_key.items() if job.id not in self._jobs]:
+            del self._by_key[key]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    async def wait(self, job, timeout=None):
+        """Wait for a job without blocking the loop; returns True if it finished"""
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), timeout)
+        except asyncio.TimeoutError:
+            return False
+        except Exception:
+            pass
+        return True
+
+    async def run(self, name, fn, *args, **kwargs):
+        """Submit a job and await its result, re-raising its exception.
+
+        If the caller is cancelled while the job is still queued, the job is
+        cancelled too and its slot released; a running job finishes.
+        """
+        job = self.submit(name, fn, *args, **kwargs)
+        return await asyncio.wrap_future(job.future)
+
+    async def run_once(self, key, name, fn, *args, reuse_for=0):
+        """submit_once and await the shared result"""
+        job = self.submit_once(key, name, fn, *args, reuse_for=reuse_for)
+        # Shielded so one caller going away does not cancel the others' job
+        return await asyncio.shield(asyncio.wrap_future(job.future))
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.workers, 'pending': self._pending, 'max_pending': self.max_pending,
+                    'coalesced': self.coalesced, 'reused': self.reused}
+
+
+jobs = JobManager(
+    workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_pending=int(os.getenv("JOB_QUEUE_LIMIT", "32")),
+)
+
+gauge('job_queue_depth', 'API scrape jobs queued or running', fn=lambda: jobs.stats()['pending'])
+gauge('job_queue_capacity', 'Jobs allowed to be queued or running at once', fn=lambda: jobs.max_pending)
@@ -0,0 +1,296 @@
+"""
+Database-backed event leases, so several scraper processes can share one
+database without scraping the same event twice.
+
+A worker claims an event by setting worker_id and leased_until on its
+event_leases row. On Postgres the claim is one UPDATE over rows picked
+with FOR UPDATE SKIP LOCKED, so concurrent workers never wait on each
+other. Elsewhere (SQLite) each row is claimed with a compare-and-set
+UPDATE, relying on SQLite serializing writers. Held leases are renewed by a
+heartbeat thread; a lease whose leased_until has passed belongs to a
+crashed or stalled worker and can be claimed by anyone.
+
+TaskLeases apply the same claims to named rows in task_leases that are held
+for a fixed time and not renewed: the slots of the global scrape budget,
+each used for an hour, and periodic jobs such as rollups that only one
+process should run per interval.
+"""
+
+import sys
+sys.path.append('..')
+
+from models.database import SessionLocal, EventLease, TaskLease, upsert
+from sqlalchemy import select, update, or_, func
+from datetime import datetime, timedelta
+import threading
+import socket
+import os
+
+
+def default_worker_id():
+    return os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _ensure_rows(db, event_ids):
+    """Create missing lease rows so claims only ever UPDATE"""
+    if not event_ids:
+        return
+    upsert(db, EventLease, [{'event_id': event_id} for event_id in event_ids])
+    db.commit()
+
+
+def active_leases():
+    """Unexpired event leases across all workers"""
+    db = SessionLocal()
+    try:
+        rows = db.query(EventLease).filter(EventLease.leased_until >= datetime.utcnow()).all()
+        return [{
+            'event_id': r.event_id,
+            'worker_id': r.worker_id,
+            'leased_until': r.leased_until,
+            'heartbeat_at': r.heartbeat_at
+        } for r in rows]
+    finally:
+        db.close()
+
+
+class EventLeases:
+    """Leases held by one worker process"""
+    def __init__(self, worker_id=None, ttl=None):
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = ttl or int(os.getenv("LEASE_TTL_SECONDS", "120"))
+        self.held = set()
+        self.stats = {'claimed': 0, 'reclaimed': 0, 'lost': 0, 'contended': 0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+    def _claim_skip_locked(self, db, event_ids, now, limit):
+        leases = EventLease.__table__
+        free = select(leases.c.event_id, leases.c.worker_id.label('previous')).where(
+            leases.c.event_id.in_(event_ids),
+            or_(leases.c.leased_until.is_(None), leases.c.leased_until < now)
+        ).limit(limit).with_for_update(skip_locked=True).cte('free')
+        stmt = update(leases).where(leases.c.event_id == free.c.event_id).values(
+            worker_id=self.worker_id,
+            leased_until=now + timedelta(seconds=self.ttl),
+            claimed_at=now,
+            heartbeat_at=now
+        ).returning(leases.c.event_id, free.c.previous)
+        return [(row.event_id, row.previous) for row in db.execute(stmt)]
+
+    def _claim_compare_and_set(self, db, event_ids, now, limit):
+        leases = EventLease.__table__
+        current = dict(db.execute(
+            select(leases.c.event_id, leases.c.worker_id).where(leases.c.event_id.in_(event_ids))
+        ).all())
+        claimed = []
+        for event_id in event_ids:
+            if len(claimed) >= limit:
+                break
+            result = db.execute(update(leases).where(
+                leases.c.event_id == event_id,
+                or_(leases.c.leased_until.is_(None), leases.c.leased_until < now)
+            ).values(
+                worker_id=self.worker_id,
+                leased_until=now + timedelta(seconds=self.ttl),
+                claimed_at=now,
+                heartbeat_at=now
+            ))
+            if result.rowcount == 1:
+                claimed.append((event_id, current.get(event_id)))
+        return claimed
+
+    def claim(self, event_ids, limit=None):
+        """Claim up to ``limit`` of ``event_ids`` that are free or expired,
+        preferring earlier ids in the list; returns the claimed ids"""
+        if not event_ids:
+            return set()
+        limit = limit or len(event_ids)
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            _ensure_rows(db, event_ids)
+            if db.get_bind().dialect.name == 'postgresql':
+                claimed = self._claim_skip_locked(db, event_ids, now, limit)
+            else:
+                claimed = self._claim_compare_and_set(db, event_ids, now, limit)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        ids = {event_id for event_id, _ in claimed}
+        reclaimed = [event_id for event_id, previous in claimed if previous and previous != self.worker_id]
+        with self._lock:
+            self.held |= ids
+            self.stats['claimed'] += len(ids)
+            self.stats['reclaimed'] += len(reclaimed)
+            self.stats['contended'] += min(limit, len(event_ids)) - len(ids)
+        if reclaimed:
+            print(f"Worker {self.worker_id} reclaimed expired leases for events {sorted(reclaimed)}")
+        self.start_heartbeat()
+        return ids
+
+    def renew(self):
+        """Extend every held lease; leases taken over by another worker are dropped"""
+        with self._lock:
+            held = list(self.held)
+        if not held:
+            return set()
+        now = datetime.utcnow()
+        leases = EventLease.__table__
+        db = SessionLocal()
+        try:
+            db.execute(update(leases).where(
+                leases.c.event_id.in_(held),
+                leases.c.worker_id == self.worker_id
+            ).values(
+                leased_until=now + timedelta(seconds=self.ttl),
+                heartbeat_at=now
+            ))
+            renewed = set(db.execute(select(leases.c.event_id).where(
+                leases.c.event_id.in_(held),
+                leases.c.worker_id == self.worker_id
+            )).scalars())
+            db.commit()
+        finally:
+            db.close()
+        lost = set(held) - renewed
+        if lost:
+            with self._lock:
+                self.held -= lost
+                self.stats['lost'] += len(lost)
+            print(f"Worker {self.worker_id} lost leases for events {sorted(lost)}")
+        return renewed
+
+    def release(self, event_ids=None):
+        """Give leases back so the events can be claimed again right away"""
+        with self._lock:
+            ids = list(self.held if event_ids is None else self.held & set(event_ids))
+            self.held -= set(ids)
+        if not ids:
+            return
+        leases = EventLease.__table__
+        db = SessionLocal()
+        try:
+            db.execute(update(leases).where(
+                leases.c.event_id.in_(ids),
+                leases.c.worker_id == self.worker_id
+            ).values(worker_id=None, leased_until=None))
+            db.commit()
+        finally:
+            db.close()
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                self.renew()
+            except Exception as e:
+                print(f"Lease heartbeat failed: {e}")
+
+    def start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="lease-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def close(self):
+        """Stop heartbeating and release everything still held"""
+        self._stop.set()
+        self.release()
+
+    def active(self):
+        return active_leases()
+
+
+def _ensure_tasks(db, names):
+    """Create missing task rows so claims only ever UPDATE"""
+    upsert(db, TaskLease, [{'name': name} for name in names])
+    db.commit()
+
+
+class TaskLeases:
+    """Fixed-length leases on named tasks, shared by every worker"""
+    def __init__(self, worker_id=None):
+        self.worker_id = worker_id or default_worker_id()
+
+    def _claim_skip_locked(self, db, names, now, until, limit):
+        tasks = TaskLease.__table__
+        free = select(tasks.c.name).where(
+            tasks.c.name.in_(names),
+            or_(tasks.c.leased_until.is_(None), tasks.c.leased_until < now)
+        ).limit(limit).with_for_update(skip_locked=True).cte('free')
+        stmt = update(tasks).where(tasks.c.name == free.c.name).values(
+            worker_id=self.worker_id, leased_until=until, claimed_at=now
+        ).returning(tasks.c.name)
+        return list(db.execute(stmt).scalars())
+
+    def _claim_compare_and_set(self, db, names, now, until, limit):
+        tasks = TaskLease.__table__
+        free = db.execute(select(tasks.c.name).where(
+            tasks.c.name.in_(names),
+            or_(tasks.c.leased_until.is_(None), tasks.c.leased_until < now)
+        )).scalars().all()
+        claimed = []
+        for name in free:
+            if len(claimed) >= limit:
+                break
+            result = db.execute(update(tasks).where(
+                tasks.c.name == name,
+                or_(tasks.c.leased_until.is_(None), tasks.c.leased_until < now)
+            ).values(worker_id=self.worker_id, leased_until=until, claimed_at=now))
+            if result.rowcount == 1:
+                claimed.append(name)
+        return claimed
+
+    def claim(self, names, duration, limit=None):
+        """Claim up to ``limit`` of ``names`` that are free or expired for
+        ``duration``; returns the claimed names"""
+        if not names or limit == 0:
+            return []
+        limit = limit or len(names)
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            _ensure_tasks(db, names)
+            if db.get_bind().dialect.name == 'postgresql':
+                claimed = self._claim_skip_locked(db, names, now, now + duration, limit)
+            else:
+                claimed = self._claim_compare_and_set(db, names, now, now + duration, limit)
+            db.commit()
+            return claimed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def release(self, names):
+        """Hand back tasks claimed but not used"""
+        if not names:
+            return
+        tasks = TaskLease.__table__
+        db = SessionLocal()
+        try:
+            db.execute(update(tasks).where(
+                tasks.c.name.in_(names),
+                tasks.c.worker_id == self.worker_id
+            ).values(worker_id=None, leased_until=None))
+            db.commit()
+        finally:
+            db.close()
+
+    def held(self, names, now=None):
+        """How many of ``names`` are leased by any worker right now"""
+        now = now or datetime.utcnow()
+        db = SessionLocal()
+        try:
+            return db.execute(select(func.count()).select_from(TaskLease).where(
+                TaskLease.name.in_(names),
+                TaskLease.leased_until >= now
+            )).scalar()
+        finally:
+            db.close()
@@ -0,0 +1,90 @@
+"""
+Subsystems loaded on first use, and the readiness state behind /ready.
+
+A Subsystem wraps a loader (an import plus whatever setup it needs) and
+runs it once, under a lock, the first time ``get()`` is called. Its state,
+load time and any error are kept for the readiness report. Required
+subsystems must be ready, or explicitly disabled, before the process is
+reported ready; optional ones (the scrapers) load when a request needs them.
+"""
+
+from datetime import datetime
+import threading
+import time
+
+STARTED_AT = time.monotonic()
+
+
+class Subsystem:
+    def __init__(self, name, loader, required=True):
+        self.name = name
+        self.loader = loader
+        self.required = required
+        self.state = 'idle'  # idle, loading, ready, failed or disabled
+        self.value = None
+        self.error = None
+        self.reason = None
+        self.seconds = None
+        self.ready_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self.state == 'ready'
+
+    def get(self):
+        """Load on the first call and return the loader's result; a failed
+        load is retried on the next call"""
+        if self.state == 'ready':
+            return self.value
+        with self._lock:
+            if self.state == 'ready':
+                return self.value
+            self.state = 'loading'
+            start = time.perf_counter()
+            try:
+                self.value = self.loader()
+            except Exception as e:
+                self.state = 'failed'
+                self.error = str(e)
+                raise
+            finally:
+                self.seconds = round(time.perf_counter() - start, 3)
+            self.state = 'ready'
+            self.error = None
+            self.ready_at = datetime.utcnow()
+            return self.value
+
+    def disable(self, reason):
+        """Mark a required subsystem as intentionally off, e.g. by configuration"""
+        with self._lock:
+            self.state = 'disabled'
+            self.reason = reason
+
+    def status(self):
+        return {
+            'state': self.state,
+            'required': self.required,
+            'seconds': self.seconds,
+            'ready_at': self.ready_at,
+            'error': self.error,
+            'reason': self.reason,
+        }
+
+
+subsystems = {}
+
+
+def subsystem(name, loader, required=True):
+    subsystems[name] = Subsystem(name, loader, required)
+    return subsystems[name]
+
+
+def readiness():
+    """Whether every required subsystem is ready or disabled, with per-subsystem state"""
+    ready = all(s.state in ('ready', 'disabled') for s in subsystems.values() if s.required)
+    return {
+        'ready': ready,
+        'uptime': round(time.monotonic() - STARTED_AT, 3),
+        'subsystems': {name: s.status() for name, s in subsystems.items()},
+    }
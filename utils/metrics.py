@@ -0,0 +1,239 @@
+"""
+Process-wide metrics rendered in the Prometheus text format.
+
+Counters, gauges and histograms are kept in memory per label set and served
+by the API's /metrics endpoint. Gauges can read their value from a callback
+at scrape time, which is how queue depths and pool sizes are exported.
+Standalone workers keep their own registry; the numbers only cover the
+process that serves /metrics.
+
+This module uses only the standard library so scrapers can import it
+without pulling in the database.
+"""
+
+from contextlib import contextmanager
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """(suffix, label values, extra labels, value) tuples for rendering"""
+        with self._lock:
+            return [('', key, (), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, key, extra, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_labels(self.labelnames, key, extra)} {_number(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A settable value, or one read from ``fn`` at scrape time.
+
+    ``fn`` returns a number, or a dict of label-value tuples to numbers.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), fn=None):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        if self.fn is None:
+            return super().samples()
+        try:
+            value = self.fn()
+        except Exception as e:
+            print(f"Error reading gauge {self.name}: {e}")
+            return []
+        if isinstance(value, dict):
+            return [('', tuple(str(v) for v in key), (), v) for key, v in value.items()]
+        return [('', (), (), value)]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the ``with`` block, even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, state in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, state['counts']):
+                    cumulative += count
+                    samples.append(('_bucket', key, (('le', _number(float(bound))),), cumulative))
+                samples.append(('_sum', key, (), state['sum']))
+                samples.append(('_count', key, (), state['count']))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add ``metric``, or return the one already registered under its name"""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                if isinstance(metric, Gauge) and metric.fn is not None:
+                    existing.fn = metric.fn
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+registry = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return registry.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=(), fn=None):
+    return registry.register(Gauge(name, documentation, labelnames, fn))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return registry.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# Scrapers
+scrape_seconds = histogram(
+    'scrape_duration_seconds', 'Time to scrape one event page, by source and serving tier', ('source', 'tier'))
+scrape_phase_seconds = histogram(
+    'scrape_phase_duration_seconds', 'Time spent in each phase of a page scrape', ('source', 'phase'))
+scrape_failures = counter(
+    'scrape_failures_total', 'Scrapes that failed or returned nothing, by source and stage', ('source', 'stage'))
+driver_acquire_seconds = histogram(
+    'driver_acquire_duration_seconds', 'Time to lease a browser, including any startup', ('pool',))
+driver_starts = counter('driver_starts_total', 'Browsers started by each pool', ('pool',))
+
+# Sweeps and polling
+sweep_seconds = histogram(
+    'sweep_duration_seconds', 'Wall time of one sweep or polling tick', ('kind',),
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600))
+sweep_lag_seconds = histogram(
+    'sweep_lag_seconds', 'How long past its next_check_at an event was checked',
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200))
+event_checks = counter('event_checks_total', 'Event checks run by sweeps and ticks', ('result',))
+
+# Database
+db_commit_seconds = histogram(
+    'db_commit_duration_seconds', 'Session flush plus commit time',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+
+# API
+http_request_seconds = histogram(
+    'http_request_duration_seconds', 'API request latency by route', ('method', 'route', 'status'))
+
+
+def instrument_sessions(session_factory):
+    """Time every commit made through ``session_factory``"""
+    from sqlalchemy import event
+
+    if event.contains(session_factory, 'before_commit', _commit_started):
+        return
+
+    event.listen(session_factory, 'before_commit', _commit_started)
+    event.listen(session_factory, 'after_commit', _commit_finished)
+    event.listen(session_factory, 'after_rollback', _commit_abandoned)
+
+
+def _commit_started(session):
+    session.info['commit_started'] = time.perf_counter()
+
+
+def _commit_finished(session):
+    started = session.info.pop('commit_started', None)
+    if started is not None:
+        db_commit_seconds.observe(time.perf_counter() - started)
+
+
+def _commit_abandoned(session):
+    session.info.pop('commit_started', None)
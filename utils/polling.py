@@ -0,0 +1,291 @@
+"""
+Adaptive per-event polling.
+
+Instead of sweeping every event every 30 minutes, each event gets its own
+next_check_at in the poll_schedule table. The interval starts from how close
+the show is and shrinks with the last day's price volatility (relative
+min/max spread in the hourly rollups) and number of price drops. A
+scheduler tick checks whichever events are due, most overdue first, within
+a global scrape budget per hour; events that miss the budget stay due for
+the next tick. The budget is a set of task_leases slots, each held for an
+hour by the scrape that used it, so every process sharing the database
+draws from the same budget. With ``leases`` set, an event is only checked
+by the process that claims its lease, so several schedulers can share one
+database.
+"""
+
+import sys
+sys.path.append('..')
+
+from models.database import SessionLocal, Event, PriceDrop, PriceRollup, PollSchedule
+from utils.sweep import SweepEngine
+from utils.leases import TaskLeases, active_leases
+from utils.metrics import sweep_seconds, sweep_lag_seconds, gauge
+from utils.profiling import profiler
+from sqlalchemy import func
+from collections import deque
+from datetime import datetime, timedelta
+import threading
+import os
+
+# (time until the show, base interval in minutes), first match wins
+PROXIMITY_STEPS = (
+    (timedelta(days=1), 5),
+    (timedelta(days=3), 10),
+    (timedelta(days=7), 15),
+    (timedelta(days=30), 30),
+    (timedelta(days=90), 60),
+)
+FAR_FUTURE_MINUTES = 180
+UNKNOWN_DATE_MINUTES = 30
+
+
+def default_budget():
+    return int(os.getenv("SCRAPE_BUDGET_PER_HOUR", "120"))
+
+
+def budget_slots(budget):
+    """task_leases names of the hourly scrape budget's slots"""
+    return [f'scrape_budget:{slot}' for slot in range(budget)]
+
+
+def schedule_snapshot(budget=None, tasks=None):
+    """Per-event schedule, budget use and active leases as stored in the
+    database, readable from any process whether or not it polls"""
+    now = datetime.utcnow()
+    budget = budget or default_budget()
+    tasks = tasks or TaskLeases()
+    db = SessionLocal()
+    try:
+        rows = db.query(Event, PollSchedule).outerjoin(
+            PollSchedule, PollSchedule.event_id == Event.id
+        ).all()
+    finally:
+        db.close()
+    # Serving tiers are only known where the scraper stack is loaded
+    fetcher = sys.modules.get('scrapers.fetcher')
+    schedule = [{
+        'event_id': event.id,
+        'event_name': event.event_name,
+        'event_date': event.event_date,
+        'next_check_at': s.next_check_at if s else None,
+        'interval_seconds': s.interval_seconds if s else None,
+        'reason': s.reason if s else 'never checked',
+        'last_checked_at': s.last_checked_at if s else None,
+        'last_ok': s.last_ok if s else None,
+        'tier': fetcher.tier_for(event.url) if fetcher else None,
+    } for event, s in rows]
+    schedule.sort(key=lambda r: (r['next_check_at'] is not None, r['next_check_at'] or now))
+    return {
+        'leases': active_leases(),
+        'budget_per_hour': budget,
+        'budget_left': max(0, budget - tasks.held(budget_slots(budget), now)),
+        'schedule': schedule,
+    }
+
+
+class PollingPolicy:
+    """Turns an event's show date and recent price activity into an interval"""
+    def __init__(self, min_interval=None, max_interval=None, volatility_weight=4.0, drop_weight=0.5):
+        self.min_interval = min_interval or int(os.getenv("POLL_MIN_INTERVAL", "300"))
+        self.max_interval = max_interval or int(os.getenv("POLL_MAX_INTERVAL", "21600"))
+        self.volatility_weight = volatility_weight
+        self.drop_weight = drop_weight
+
+    def base_minutes(self, event_date, now):
+        if event_date is None:
+            return UNKNOWN_DATE_MINUTES, 'date unknown'
+        until = event_date - now
+        if until < timedelta(days=-1):
+            return None, 'show is over'
+        for limit, minutes in PROXIMITY_STEPS:
+            if until <= limit:
+                return minutes, f'show within {limit.days}d'
+        return FAR_FUTURE_MINUTES, 'show 90d+ away'
+
+    def interval(self, event_date, volatility=0.0, drops=0, now=None):
+        """Seconds until the next check and a short human-readable reason"""
+        now = now or datetime.utcnow()
+        minutes, reason = self.base_minutes(event_date, now)
+        if minutes is None:
+            return self.max_interval, reason
+        score = 1 + self.volatility_weight * volatility + self.drop_weight * drops
+        seconds = int(max(self.min_interval, min(self.max_interval, minutes * 60 / score)))
+        return seconds, f'{reason}, volatility {volatility:.2f}, {drops} drops/24h'
+
+
+class AdaptivePoller:
+    """Checks due events within ``budget`` scrapes per rolling hour"""
+    def __init__(self, check_event, policy=None, budget=None, workers=None, history=200,
+                 leases=None, batch=None, tasks=None):
+        self.check_event = check_event
+        self.leases = leases
+        self.tasks = tasks or TaskLeases(leases.worker_id if leases else None)
+        # With leases, claim at most this many events per tick so idle workers get the rest
+        self.batch = batch or int(os.getenv("POLL_BATCH", "10"))
+        self.policy = policy or PollingPolicy()
+        self.budget = budget or default_budget()
+        self.workers = workers
+        self.decisions = deque(maxlen=history)
+        self.last_tick = None
+        self._lock = threading.Lock()
+        gauge('poll_due_events', 'Events due at the last polling tick', fn=lambda: self._last('due'))
+        gauge('poll_deferred_events', 'Due events left for later by the scrape budget at the last tick',
+              fn=lambda: self._last('deferred_for_budget'))
+        gauge('poll_budget_left', 'Scrapes left in the rolling hourly budget',
+              fn=lambda: self._budget_left(datetime.utcnow()))
+
+    def _last(self, field):
+        with self._lock:
+            return self.last_tick[field] if self.last_tick else 0
+
+    def _budget_left(self, now):
+        return max(0, self.budget - self.tasks.held(budget_slots(self.budget), now))
+
+    def due_rows(self, db, now):
+        """(event, next_check_at) for events with no schedule yet or a
+        next_check_at in the past, most overdue first"""
+        rows = db.query(Event, PollSchedule.next_check_at).outerjoin(
+            PollSchedule, PollSchedule.event_id == Event.id
+        ).filter(
+            (PollSchedule.next_check_at.is_(None)) | (PollSchedule.next_check_at <= now)
+        ).all()
+        rows.sort(key=lambda r: (r[1] is not None, r[1] or now))
+        return rows
+
+    def due_events(self, db, now):
+        return [event for event, _ in self.due_rows(db, now)]
+
+    def signals(self, db, event_ids, now):
+        """Per-event (volatility, drops) over the last 24 hours"""
+        since = now - timedelta(hours=24)
+        spreads = db.query(
+            PriceRollup.event_id, PriceRollup.section,
+            func.min(PriceRollup.min_price), func.max(PriceRollup.max_price)
+        ).filter(
+            PriceRollup.event_id.in_(event_ids),
+            PriceRollup.granularity == 'hour',
+            PriceRollup.bucket_start >= since
+        ).group_by(PriceRollup.event_id, PriceRollup.section).all()
+        volatility = {}
+        for event_id, _, low, high in spreads:
+            if low and high:
+                volatility.setdefault(event_id, []).append((high - low) / low)
+        drops = dict(db.query(PriceDrop.event_id, func.count(PriceDrop.id)).filter(
+            PriceDrop.event_id.in_(event_ids),
+            PriceDrop.detected_at >= since
+        ).group_by(PriceDrop.event_id).all())
+        result = {}
+        for event_id in event_ids:
+            spread = volatility.get(event_id)
+            result[event_id] = (sum(spread) / len(spread) if spread else 0.0, drops.get(event_id, 0))
+        return result
+
+    def tick(self, now=None):
+        """Check the events that are due and schedule their next checks"""
+        now = now or datetime.utcnow()
+        db = SessionLocal()
+        try:
+            rows = self.due_rows(db, now)
+        finally:
+            db.close()
+        due = [event for event, _ in rows]
+        due_at = {event.id: next_check_at for event, next_check_at in rows}
+
+        # With leases, ask for no more slots than one batch of events can use
+        wanted = due[:self.batch] if self.leases is not None else due
+        slots = self.tasks.claim(budget_slots(self.budget), timedelta(hours=1), limit=len(wanted))
+        within_budget = wanted[:len(slots)]
+        selected = self._claim(within_budget, now)
+        self.tasks.release(slots[len(selected):])
+        deferred = len(due) - len(within_budget) if len(slots) < len(wanted) else 0
+        started = datetime.utcnow()
+        for event in selected:
+            if due_at[event.id] is not None:
+                sweep_lag_seconds.observe((started - due_at[event.id]).total_seconds())
+
+        try:
+            report = None
+            if selected:
+                with profiler.capture('sweep', 'tick', profile=False) as capture:
+                    report = SweepEngine(self.check_event, workers=self.workers).run(selected)
+                    if capture:
+                        capture.add_sweep(report)
+            results = {r['event_id']: r for r in report['events']} if report else {}
+            decisions = self._reschedule(selected, results)
+        finally:
+            if self.leases is not None:
+                self.leases.release([e.id for e in selected])
+
+        tick = {
+            'at': now,
+            'due': len(due),
+            'checked': len(selected),
+            'deferred_for_budget': deferred,
+            'not_claimed': len(due) - len(selected) - deferred,
+            'wall_time': report['wall_time'] if report else 0,
+            'decisions': decisions,
+        }
+        with self._lock:
+            self.decisions.append(tick)
+            self.last_tick = tick
+        if report:
+            sweep_seconds.observe(report['wall_time'], kind='tick')
+        if selected or due:
+            print(f"Polling tick: {len(selected)}/{len(due)} due events checked "
+                  f"({tick['deferred_for_budget']} deferred by budget, "
+                  f"{tick['not_claimed']} left to other workers)")
+        return tick
+
+    def _claim(self, events, now):
+        """Keep the events this process won leases for and that are still due"""
+        if self.leases is None or not events:
+            return events
+        claimed = self.leases.claim([e.id for e in events], limit=self.batch)
+        if not claimed:
+            return []
+        # Another worker may have checked one of these between our read and the claim
+        db = SessionLocal()
+        try:
+            still_due = {e.id for e in self.due_events(db, now)}
+        finally:
+            db.close()
+        self.leases.release(claimed - still_due)
+        return [e for e in events if e.id in claimed and e.id in still_due]
+
+    def _reschedule(self, selected, results):
+        decisions = []
+        db = SessionLocal()
+        try:
+            finished = datetime.utcnow()
+            signals = self.signals(db, [e.id for e in selected], finished) if selected else {}
+            for event in selected:
+                volatility, drops = signals[event.id]
+                seconds, reason = self.policy.interval(event.event_date, volatility, drops, finished)
+                ok = results.get(event.id, {}).get('ok', False)
+                db.merge(PollSchedule(
+                    event_id=event.id,
+                    next_check_at=finished + timedelta(seconds=seconds),
+                    interval_seconds=seconds,
+                    reason=reason,
+                    last_checked_at=finished,
+                    last_ok=ok,
+                    updated_at=finished
+                ))
+                decisions.append({'event_id': event.id, 'event_name': event.event_name,
+                                  'interval_seconds': seconds, 'reason': reason, 'ok': ok})
+            db.commit()
+        finally:
+            db.close()
+        return decisions
+
+    def snapshot(self, recent=20):
+        """Current schedule, budget use and the latest ticks, for the API"""
+        with self._lock:
+            ticks = list(self.decisions)[-recent:]
+        return dict(
+            schedule_snapshot(self.budget, self.tasks),
+            worker_id=self.leases.worker_id if self.leases else None,
+            lease_stats=dict(self.leases.stats) if self.leases else {},
+            recent_ticks=list(reversed(ticks)),
+        )
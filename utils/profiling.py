@@ -0,0 +1,244 @@
+"""
+Opt-in profiling of individual scrapes and sweeps.
+
+A capture is taken when its target (an event URL) has been switched on, or
+for a random PROFILE_SAMPLE_RATE fraction of runs. Scrape captures hold a
+cProfile of the scraping thread plus a timeline of every WebDriver command
+it sent; sweep captures hold a wall-clock timeline of the per-event checks.
+Each capture is written to PROFILE_DIR as <run_id>.json, plus <run_id>.prof
+(loadable with pstats or snakeviz) when it was profiled, and only the newest
+PROFILE_KEEP captures are kept.
+
+Targets switched on through the API only apply to the API process;
+standalone workers read PROFILE_TARGETS and PROFILE_SAMPLE_RATE at start.
+
+Like utils.metrics this uses only the standard library so scrapers can
+import it.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+import cProfile
+import threading
+import pstats
+import random
+import uuid
+import json
+import time
+import os
+
+TOP_FUNCTIONS = 40
+_local = threading.local()
+
+
+class Capture:
+    """One profiled run: metadata, an optional cProfile and a timeline"""
+    def __init__(self, kind, target, reason, profile=True):
+        self.run_id = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{kind}-{uuid.uuid4().hex[:8]}"
+        self.kind = kind
+        self.target = target
+        self.reason = reason
+        self.started_at = datetime.utcnow()
+        self.start = time.perf_counter()
+        self.seconds = None
+        self.error = None
+        self.profile = cProfile.Profile() if profile else None
+        self.timeline = []
+        self._lock = threading.Lock()
+
+    def add_span(self, kind, name, offset, seconds, thread=None, **detail):
+        span = {'kind': kind, 'name': name, 'offset': round(offset, 4), 'seconds': round(seconds, 4),
+                'thread': thread or threading.current_thread().name}
+        span.update(detail)
+        with self._lock:
+            self.timeline.append(span)
+
+    def mark(self, kind, name, seconds, **detail):
+        """Add a span that ended just now and lasted ``seconds``"""
+        self.add_span(kind, name, time.perf_counter() - self.start - seconds, seconds, **detail)
+
+    def add_sweep(self, report):
+        """One span per event check in a SweepEngine report"""
+        for result in report['events']:
+            self.add_span('event', result['event_name'], result['offset'], result['seconds'], result['thread'],
+                          event_id=result['event_id'], ok=result['ok'], tickets=result['tickets'])
+
+    def top_functions(self, limit=TOP_FUNCTIONS):
+        """Functions with the most cumulative time, from the cProfile stats"""
+        if self.profile is None:
+            return []
+        stats = pstats.Stats(self.profile)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        return [{
+            'function': f"{func}",
+            'file': f"{filename}:{line}",
+            'calls': calls,
+            'own_seconds': round(own, 4),
+            'cumulative_seconds': round(cumulative, 4),
+        } for (filename, line, func), (_, calls, own, cumulative, _) in rows]
+
+    def summary(self):
+        return {
+            'run_id': self.run_id,
+            'kind': self.kind,
+            'target': self.target,
+            'reason': self.reason,
+            'started_at': self.started_at.isoformat(),
+            'seconds': self.seconds,
+            'error': self.error,
+            'profiled': self.profile is not None,
+            'webdriver_commands': sum(1 for span in self.timeline if span['kind'] == 'webdriver'),
+        }
+
+    def to_dict(self):
+        data = self.summary()
+        data['timeline'] = sorted(self.timeline, key=lambda span: span['offset'])
+        data['top_functions'] = self.top_functions()
+        return data
+
+
+class Profiler:
+    def __init__(self, directory=None, sample_rate=None, targets=None, keep=None):
+        self.directory = directory or os.getenv("PROFILE_DIR", "profiles")
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        if targets is None:
+            targets = [t.strip() for t in os.getenv("PROFILE_TARGETS", "").split(',') if t.strip()]
+        self.targets = set(targets)
+        self.keep = keep or int(os.getenv("PROFILE_KEEP", "100"))
+        self._lock = threading.Lock()
+
+    def enable(self, target):
+        with self._lock:
+            self.targets.add(target)
+
+    def disable(self, target):
+        with self._lock:
+            self.targets.discard(target)
+
+    def reason_for(self, target):
+        """Why ``target`` should be captured this time, or None to skip it"""
+        with self._lock:
+            if target in self.targets:
+                return 'target'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    @contextmanager
+    def capture(self, kind, target, profile=True, force=False):
+        """Capture the ``with`` block if ``target`` is switched on or sampled.
+
+        Yields the Capture, or None when this run is not captured. Nested
+        captures on the same thread fold into the outer one.
+        """
+        if getattr(_local, 'capture', None) is not None:
+            yield None
+            return
+        reason = 'forced' if force else self.reason_for(target)
+        if reason is None:
+            yield None
+            return
+
+        capture = Capture(kind, target, reason, profile=profile)
+        _local.capture = capture
+        if capture.profile is not None:
+            try:
+                capture.profile.enable()
+            except ValueError:
+                # Python 3.12+ allows one active cProfile per process; keep
+                # the timeline for the concurrent capture
+                capture.profile = None
+        try:
+            yield capture
+        except Exception as e:
+            capture.error = str(e)
+            raise
+        finally:
+            if capture.profile is not None:
+                capture.profile.disable()
+            _local.capture = None
+            capture.seconds = round(time.perf_counter() - capture.start, 4)
+            self.save(capture)
+
+    def save(self, capture):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if capture.profile is not None:
+                capture.profile.dump_stats(self.path(capture.run_id, 'prof'))
+            with open(self.path(capture.run_id, 'json'), 'w') as f:
+                json.dump(capture.to_dict(), f, indent=1, default=str)
+            print(f"Saved profile {capture.run_id} ({capture.seconds:.2f}s, {capture.target})")
+            self.prune()
+        except Exception as e:
+            print(f"Error saving profile {capture.run_id}: {e}")
+
+    def path(self, run_id, extension):
+        return os.path.join(self.directory, f"{os.path.basename(run_id)}.{extension}")
+
+    def prune(self):
+        runs = self.run_ids()
+        for run_id in runs[self.keep:]:
+            for extension in ('json', 'prof'):
+                try:
+                    os.remove(self.path(run_id, extension))
+                except FileNotFoundError:
+                    pass
+
+    def run_ids(self):
+        """Stored captures, newest first"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted((name[:-5] for name in names if name.endswith('.json')), reverse=True)
+
+    def list(self, limit=50):
+        captures = []
+        for run_id in self.run_ids()[:limit]:
+            capture = self.load(run_id)
+            if capture is not None:
+                captures.append({key: value for key, value in capture.items()
+                                 if key not in ('timeline', 'top_functions')})
+        return captures
+
+    def load(self, run_id):
+        try:
+            with open(self.path(run_id, 'json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def config(self):
+        with self._lock:
+            return {'sample_rate': self.sample_rate, 'targets': sorted(self.targets),
+                    'directory': self.directory, 'keep': self.keep}
+
+
+profiler = Profiler()
+
+
+def current_capture():
+    """The capture active on this thread, if any"""
+    return getattr(_local, 'capture', None)
+
+
+def trace_webdriver(driver):
+    """Record every command ``driver`` sends while a capture is active on
+    the calling thread. Costs one thread-local lookup per command otherwise."""
+    if getattr(driver, '_profiling_traced', False):
+        return driver
+    execute = driver.execute
+
+    def traced_execute(command, params=None):
+        capture = current_capture()
+        if capture is None:
+            return execute(command, params)
+        start = time.perf_counter()
+        try:
+            return execute(command, params)
+        finally:
+            capture.mark('webdriver', command, time.perf_counter() - start)
+
+    driver.execute = traced_execute
+    driver._profiling_traced = True
+    return driver
@@ -0,0 +1,134 @@
+"""
+In-process LRU + TTL cache for rendered API responses.
+
+Entries are tagged with what they were computed from ('event:<id>' for one
+event's history, 'drops' for drop listings). Writers call
+``invalidate_after_commit(db, *tags)`` and the tagged entries are dropped
+when that session commits. A response computed while an invalidation was
+in flight is not stored, so a slow query can't put stale data back.
+
+Only this process's commits invalidate entries; writes from standalone
+workers show up once the TTL expires.
+"""
+
+import sys
+sys.path.append('..')
+
+from sqlalchemy import event
+from models.database import SessionLocal
+from collections import OrderedDict, Counter
+import threading
+import time
+import os
+
+MISS = object()
+
+
+def event_tag(event_id):
+    return f'event:{event_id}'
+
+
+class ResponseCache:
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None):
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_ENTRIES", "1000"))
+        self.max_bytes = max_bytes or int(os.getenv("RESPONSE_CACHE_BYTES", str(32 * 1024 * 1024)))
+        self.ttl = ttl if ttl is not None else int(os.getenv("RESPONSE_CACHE_TTL", "60"))
+        self.entries = OrderedDict()  # key -> (expires_at, tags, body, headers)
+        self.tagged = {}  # tag -> keys
+        self.bytes = 0
+        self.invalidations = 0
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached (body, headers) for ``key``, a tuple starting with the endpoint name, or MISS"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits[key[0]] += 1
+                return entry[2], entry[3]
+            if entry is not None:
+                self._remove(key)
+                self.evictions['expired'] += 1
+            self.misses[key[0]] += 1
+            return MISS
+
+    def token(self):
+        """Take before computing a response and pass to set()"""
+        return self.invalidations
+
+    def set(self, key, body, tags, token, headers=None):
+        with self._lock:
+            if token != self.invalidations or len(body) > self.max_bytes:
+                return
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (time.monotonic() + self.ttl, tuple(tags), body, dict(headers or {}))
+            self.bytes += len(body)
+            for tag in tags:
+                self.tagged.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.evictions['size'] += 1
+
+    def _remove(self, key):
+        _, tags, body, _ = self.entries.pop(key)
+        self.bytes -= len(body)
+        for tag in tags:
+            keys = self.tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tagged[tag]
+
+    def invalidate(self, *tags):
+        with self._lock:
+            self.invalidations += 1
+            for tag in tags:
+                for key in list(self.tagged.get(tag, ())):
+                    self._remove(key)
+                    self.evictions['invalidated'] += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += 1
+            self.evictions['invalidated'] += len(self.entries)
+            self.entries.clear()
+            self.tagged.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': dict(self.hits),
+                'misses': dict(self.misses),
+                'evictions': dict(self.evictions),
+            }
+
+
+response_cache = ResponseCache()
+
+
+def invalidate_after_commit(db, *tags):
+    """Drop cached responses with any of ``tags`` once the session commits"""
+    db.info.setdefault('invalidate_tags', set()).update(tags)
+
+
+@event.listens_for(SessionLocal, 'after_commit')
+def _invalidate_pending(session):
+    tags = session.info.pop('invalidate_tags', None)
+    if tags:
+        response_cache.invalidate(*tags)
+
+
+@event.listens_for(SessionLocal, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop('invalidate_tags', None)
@@ -0,0 +1,187 @@
+"""
+Hourly and daily price rollups, plus retention for raw history.
+
+Each rollup bucket holds min, max, open, close and count of the available
+ticket prices seen for one (event, section). A ticket_prices row stands for
+every scrape from tracked_at until last_seen_at, so it counts towards every
+bucket its run overlaps, not only the bucket it was first written in.
+
+Raw rows are deleted only once both granularities have rolled past them and
+they are older than ROLLUP_RAW_RETENTION_DAYS. Runs a current listing
+points at are always kept, since ingestion extends them in place.
+
+    python -m utils.rollups
+"""
+
+import sys
+sys.path.append('..')
+
+from sqlalchemy import select, delete, func, or_, and_, not_, exists
+from models.database import SessionLocal, TicketPrice, CurrentPrice, PriceRollup, SectionStats, upsert
+from models.migrations import init_db
+from utils.response_cache import response_cache, invalidate_after_commit, event_tag
+from datetime import datetime, timedelta
+import os
+
+GRANULARITIES = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+UPSERT_COLUMNS = ('min_price', 'max_price', 'open_price', 'close_price', 'count', 'updated_at')
+
+
+def _env_days(name, default):
+    """Retention in days from the environment; empty or 0 keeps rows forever"""
+    value = os.getenv(name, default)
+    return int(value) if value and int(value) > 0 else None
+
+
+def raw_retention_days():
+    """Days raw ticket_prices rows are kept after being rolled up, or None"""
+    return _env_days("ROLLUP_RAW_RETENTION_DAYS", "14")
+
+
+def bucket_start(at, granularity):
+    if granularity == 'day':
+        return at.replace(hour=0, minute=0, second=0, microsecond=0)
+    return at.replace(minute=0, second=0, microsecond=0)
+
+
+def watermark(db, granularity):
+    """Start of the newest bucket already written, which is re-rolled each run
+    because it may have been partial"""
+    return db.query(func.max(PriceRollup.bucket_start)).filter(
+        PriceRollup.granularity == granularity
+    ).scalar()
+
+
+def _upsert_rollups(db, rows):
+    upsert(db, PriceRollup, rows, UPSERT_COLUMNS)
+
+
+def rollup_event(db, event_id, granularity, since, now):
+    """Aggregate one event's runs that overlap [since, now) into buckets"""
+    step = GRANULARITIES[granularity]
+    prices = TicketPrice.__table__
+    query = select(
+        prices.c.id, prices.c.section, prices.c.price, prices.c.tracked_at, prices.c.last_seen_at
+    ).where(prices.c.event_id == event_id, prices.c.availability.isnot(False))
+    if since is not None:
+        query = query.where(or_(prices.c.tracked_at >= since, prices.c.last_seen_at >= since))
+
+    buckets = {}
+    for r in db.execute(query):
+        if r.price is None:
+            continue
+        first = bucket_start(r.tracked_at, granularity)
+        if since is not None and first < since:
+            first = since
+        last = bucket_start(r.last_seen_at or r.tracked_at, granularity)
+        order = (r.tracked_at, r.id)
+        at = first
+        while at <= last:
+            key = (r.section or 'General', at)
+            b = buckets.get(key)
+            if b is None:
+                buckets[key] = {'min': r.price, 'max': r.price, 'count': 1,
+                                'open': (order, r.price), 'close': (order, r.price)}
+            else:
+                b['min'] = min(b['min'], r.price)
+                b['max'] = max(b['max'], r.price)
+                b['count'] += 1
+                if order < b['open'][0]:
+                    b['open'] = (order, r.price)
+                if order > b['close'][0]:
+                    b['close'] = (order, r.price)
+            at += step
+
+    if buckets:
+        invalidate_after_commit(db, event_tag(event_id))
+    _upsert_rollups(db, [{
+        'event_id': event_id,
+        'section': section,
+        'granularity': granularity,
+        'bucket_start': at,
+        'min_price': b['min'],
+        'max_price': b['max'],
+        'open_price': b['open'][1],
+        'close_price': b['close'][1],
+        'count': b['count'],
+        'updated_at': now
+    } for (section, at), b in buckets.items()])
+    return len(buckets)
+
+
+def rollup(db, granularity, now=None):
+    """Bring one granularity up to date, one event per transaction"""
+    now = now or datetime.utcnow()
+    since = watermark(db, granularity)
+    event_ids = db.execute(select(TicketPrice.event_id).distinct()).scalars().all()
+    written = 0
+    for event_id in event_ids:
+        written += rollup_event(db, event_id, granularity, since, now)
+        db.commit()
+    return written
+
+
+def apply_retention(db, now=None):
+    """Delete raw rows and hourly buckets (rollups and section_stats) that
+    coarser data now covers"""
+    now = now or datetime.utcnow()
+    deleted = {'raw': 0, 'hour': 0}
+    hourly, daily = watermark(db, 'hour'), watermark(db, 'day')
+    if hourly is None or daily is None:
+        return deleted
+
+    raw_days = raw_retention_days()
+    if raw_days:
+        cutoff = min(now - timedelta(days=raw_days), hourly, daily)
+        prices = TicketPrice.__table__
+        current = CurrentPrice.__table__
+        is_current = exists().where(current.c.price_id == prices.c.id)
+        result = db.execute(delete(prices).where(
+            func.coalesce(prices.c.last_seen_at, prices.c.tracked_at) < cutoff,
+            not_(is_current)
+        ))
+        deleted['raw'] = result.rowcount
+
+    hourly_days = _env_days("ROLLUP_HOURLY_RETENTION_DAYS", "90")
+    if hourly_days:
+        cutoff = min(now - timedelta(days=hourly_days), daily)
+        result = db.execute(delete(PriceRollup.__table__).where(and_(
+            PriceRollup.granularity == 'hour',
+            PriceRollup.bucket_start < cutoff
+        )))
+        deleted['hour'] = result.rowcount
+        result = db.execute(delete(SectionStats.__table__).where(and_(
+            SectionStats.granularity == 'hour',
+            SectionStats.bucket_start < cutoff
+        )))
+        deleted['hour'] += result.rowcount
+
+    db.commit()
+    if deleted['raw'] or deleted['hour']:
+        response_cache.clear()
+    return deleted
+
+
+def run_rollups():
+    """Scheduled job: roll up both granularities, then apply retention"""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        written = {g: rollup(db, g, now) for g in GRANULARITIES}
+        deleted = apply_retention(db, now)
+        print(f"Rollups updated: {written['hour']} hourly, {written['day']} daily buckets; "
+              f"deleted {deleted['raw']} raw rows, {deleted['hour']} hourly buckets")
+        return {'written': written, 'deleted': deleted}
+    except Exception as e:
+        db.rollback()
+        print(f"Error rolling up prices: {e}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    init_db()
+    run_rollups()
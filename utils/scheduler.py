@@ -4,69 +4,123 @@ import sys
 sys.path.append('..')
 
 from scrapers.toyota_center_scraper import ToyotaCenterScraper
-from models.database import SessionLocal, Event, TicketPrice, PriceDrop
-from datetime import datetime
+from scrapers.driver_pool import get_default_pool
+from models.database import SessionLocal, Event
+from utils.ingestion import ingest_snapshot
+from utils.sweep import SweepEngine
+from utils.rollups import run_rollups
+from utils.polling import AdaptivePoller
+from utils.leases import EventLeases
+from utils.metrics import sweep_seconds, instrument_sessions
+from utils.profiling import profiler
+from datetime import timedelta
+import threading
+import os
 
 scheduler = BackgroundScheduler()
-scraper = ToyotaCenterScraper()
+instrument_sessions(SessionLocal)
 
-def check_all_events():
+# One scraper, and with it one HTTP session, serves every sweep of this
+# process; each browser page leases its own driver from the pool
+_scraper = None
+_scraper_lock = threading.Lock()
+last_sweep_report = None
+
+def get_worker_scraper():
+    """Scraper shared by every sweep worker thread"""
+    global _scraper
+    with _scraper_lock:
+        if _scraper is None:
+            _scraper = ToyotaCenterScraper(driver_pool=get_default_pool())
+        return _scraper
+
+def check_event(event):
+    """Scrape one event and record its prices in a dedicated session"""
+    current_prices = get_worker_scraper().get_ticket_prices(event.url)
+
+    db = SessionLocal()
+    try:
+        drops = ingest_snapshot(db, event.id, current_prices)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    for drop in drops:
+        print(f"Price drop detected! {event.event_name} - {drop['section']}: "
+              f"${drop['old_price']} -> ${drop['new_price']} ({drop['drop_percentage']:.1f}% off)")
+
+    return len(current_prices)
+
+# Leases keep this process from checking an event another API replica or
+# standalone worker (python -m utils.worker) is already checking
+poller = AdaptivePoller(check_event, leases=EventLeases())
+rollup_interval = int(os.getenv("ROLLUP_INTERVAL_MINUTES", "15"))
+
+def check_all_events(workers=None):
     """Check all events for price changes"""
+    global last_sweep_report
     try:
         db = SessionLocal()
         events = db.query(Event).all()
-        
-        for event in events:
-            current_prices = scraper.get_ticket_prices(event.url)
-            
-            for ticket in current_prices:
-                last_price = db.query(TicketPrice).filter(
-                    TicketPrice.event_id == event.id,
-                    TicketPrice.section == ticket['section']
-                ).order_by(TicketPrice.tracked_at.desc()).first()
-                
-                if last_price and ticket['price'] < last_price.price:
-                    drop_percentage = ((last_price.price - ticket['price']) / last_price.price) * 100
-                    
-                    price_drop = PriceDrop(
-                        event_id=event.id,
-                        section=ticket['section'],
-                        old_price=last_price.price,
-                        new_price=ticket['price'],
-                        drop_percentage=drop_percentage
-                    )
-                    db.add(price_drop)
-                    
-                    print(f"Price drop detected! {event.event_name} - {ticket['section']}: "
-                          f"${last_price.price} -> ${ticket['price']} ({drop_percentage:.1f}% off)")
-                
-                new_price = TicketPrice(
-                    event_id=event.id,
-                    section=ticket['section'],
-                    price=ticket['price'],
-                    availability=ticket['available'],
-                    source=ticket['source']
-                )
-                db.add(new_price)
-        
-        db.commit()
         db.close()
+
+        # Wall-clock timeline only: cProfile would just see this thread waiting
+        with profiler.capture('sweep', 'sweep', profile=False) as capture:
+            report = SweepEngine(check_event, workers=workers).run(events)
+            if capture:
+                capture.add_sweep(report)
+        last_sweep_report = report
+        sweep_seconds.observe(report['wall_time'], kind='sweep')
+
+        print(f"Sweep finished: {len(report['events'])} events in {report['wall_time']:.1f}s "
+              f"with {report['workers']} workers ({report['failed']} failed)")
+        for timing in sorted(report['events'], key=lambda r: r['seconds'], reverse=True):
+            print(f"  {timing['seconds']:7.2f}s  {timing['tickets']:4} tickets  {timing['event_name']}")
+        return report
+    except Exception as e:
+        print(f"Error in scheduled check: {e}")
+
+def roll_up_prices():
+    """Scheduled rollup run, by whichever process claims it for this interval"""
+    try:
+        # Held slightly less than the interval so the claimant's next run finds it free
+        if not poller.tasks.claim(['rollups'], timedelta(minutes=rollup_interval) * 0.9):
+            return
+        run_rollups()
+    except Exception as e:
+        print(f"Error in scheduled rollup: {e}")
+
+def poll_due_events():
+    """Scheduled tick of the adaptive poller"""
+    try:
+        return poller.tick()
     except Exception as e:
         print(f"Error in scheduled check: {e}")
 
 def start_monitoring():
     """Start the background scheduler"""
+    # Each tick checks only the events whose next_check_at has come up
     scheduler.add_job(
-        check_all_events,
-        trigger=IntervalTrigger(minutes=30),
+        poll_due_events,
+        trigger=IntervalTrigger(seconds=int(os.getenv("POLL_TICK_SECONDS", "60"))),
         id='check_prices',
-        name='Check all event prices',
+        name='Check due event prices',
+        replace_existing=True
+    )
+    scheduler.add_job(
+        roll_up_prices,
+        trigger=IntervalTrigger(minutes=rollup_interval),
+        id='rollup_prices',
+        name='Roll up price history',
         replace_existing=True
     )
     scheduler.start()
-    print("Price monitoring scheduler started - checking every 30 minutes")
+    print(f"Price monitoring scheduler started - adaptive polling within {poller.budget} scrapes/hour")
 
 def stop_monitoring():
     """Stop the background scheduler"""
     scheduler.shutdown()
-    print("Price monitoring scheduler stopped")
\ No newline at end of file
+    poller.leases.close()
+    print("Price monitoring scheduler stopped")
@@ -0,0 +1,263 @@
+"""
+Per-section price analytics: listings per scrape, p10, median and p90 of
+available prices and the cheapest available price over the last N hours.
+
+Ingestion counts every listing of every scrape into hourly and daily
+section_stats rows, so counts and percentiles weigh each listing by the
+scrapes that saw it, whatever PRICE_STORAGE_MODE is. A window merges the
+hourly rows of its first, partial day with the daily rows after it and
+starts on the hour.
+
+Rebuild the table from existing history with:
+    python -m utils.section_stats backfill
+"""
+
+import sys
+sys.path.append('..')
+
+from sqlalchemy import select, delete, or_, and_
+from models.database import SessionLocal, TicketPrice, SectionStats, upsert
+from models.migrations import init_db
+from utils.rollups import bucket_start, GRANULARITIES
+from collections import Counter
+from itertools import accumulate
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+import json
+
+PERCENTILES = (('p10', 0.1), ('median', 0.5), ('p90', 0.9))
+UPSERT_COLUMNS = ('scrapes', 'listings', 'available', 'min_available_price', 'price_counts', 'updated_at')
+
+
+def _cents(price):
+    return int(round(price * 100))
+
+
+def _bucket(deltas, section, granularity, at):
+    key = (section or 'General', granularity, bucket_start(at, granularity))
+    bucket = deltas.get(key)
+    if bucket is None:
+        bucket = deltas[key] = {'scrapes': 0, 'listings': 0, 'available': 0, 'min': None, 'prices': Counter()}
+    return bucket
+
+
+def _observe(deltas, section, at, price, available, count=1):
+    """Count a listing seen by ``count`` scrapes in the hour and day of ``at``"""
+    for granularity in GRANULARITIES:
+        bucket = _bucket(deltas, section, granularity, at)
+        bucket['listings'] += count
+        if available is False:
+            continue
+        bucket['available'] += count
+        if price is None:
+            continue
+        bucket['prices'][_cents(price)] += count
+        if bucket['min'] is None or price < bucket['min']:
+            bucket['min'] = price
+
+
+def _scraped(deltas, section, at, count=1):
+    """Count ``count`` scrapes that listed the section in the hour and day of ``at``"""
+    for granularity in GRANULARITIES:
+        _bucket(deltas, section, granularity, at)['scrapes'] += count
+
+
+def _load_counts(text):
+    return Counter({int(cents): count for cents, count in json.loads(text or '{}').items()})
+
+
+def _dump_counts(counts):
+    return json.dumps({cents: count for cents, count in sorted(counts.items()) if count > 0})
+
+
+def _write(db, event_id, deltas, now):
+    """Add ``deltas`` to the stored rows of one event in one upsert"""
+    if not deltas:
+        return
+    stats = SectionStats.__table__
+    existing = {(r.section, r.granularity, r.bucket_start): r for r in db.execute(select(stats).where(
+        stats.c.event_id == event_id,
+        stats.c.section.in_({section for section, _, _ in deltas}),
+        stats.c.bucket_start.in_({at for _, _, at in deltas})
+    ))}
+
+    rows = []
+    for (section, granularity, at), delta in deltas.items():
+        stored = existing.get((section, granularity, at))
+        counts = delta['prices']
+        cheapest = delta['min']
+        scrapes, listings, available = delta['scrapes'], delta['listings'], delta['available']
+        if stored is not None:
+            counts = _load_counts(stored.price_counts)
+            counts.update(delta['prices'])
+            scrapes += stored.scrapes or 0
+            listings += stored.listings or 0
+            available += stored.available or 0
+            if stored.min_available_price is not None and (cheapest is None or stored.min_available_price < cheapest):
+                cheapest = stored.min_available_price
+        rows.append({
+            'event_id': event_id,
+            'section': section,
+            'granularity': granularity,
+            'bucket_start': at,
+            'scrapes': scrapes,
+            'listings': listings,
+            'available': available,
+            'min_available_price': cheapest,
+            'price_counts': _dump_counts(counts),
+            'updated_at': now
+        })
+    upsert(db, SectionStats, rows, UPSERT_COLUMNS)
+
+
+def record_section_stats(db, event_id, listings, now):
+    """Fold one scrape's listings (ticket_prices mappings) into section_stats"""
+    deltas = {}
+    for listing in listings:
+        _observe(deltas, listing['section'], now, listing['price'], listing['availability'])
+    for section in {listing['section'] for listing in listings}:
+        _scraped(deltas, section, now)
+    _write(db, event_id, deltas, now)
+
+
+def _spans(times, lo, hi):
+    """(hour, count) for the scrape times in ``times[lo:hi]``"""
+    while lo < hi:
+        hour = bucket_start(times[lo], 'hour')
+        end = bisect_left(times, hour + GRANULARITIES['hour'], lo, hi)
+        yield hour, end - lo
+        lo = end
+
+
+def rebuild(conn, now=None):
+    """Recompute section_stats from ticket_prices, one event at a time.
+
+    An event's scrapes are taken to be the times its runs start or were last
+    seen, and each run counts once for every scrape it spans. In change-only
+    storage a scrape that changed nothing and ended no run leaves no trace,
+    so its listings are missed.
+    """
+    now = now or datetime.utcnow()
+    prices = TicketPrice.__table__
+    conn.execute(delete(SectionStats.__table__))
+    written = 0
+    event_ids = conn.execute(select(prices.c.event_id).distinct()).scalars().all()
+    for event_id in event_ids:
+        rows = conn.execute(select(
+            prices.c.section, prices.c.price, prices.c.availability, prices.c.tracked_at, prices.c.last_seen_at
+        ).where(prices.c.event_id == event_id)).all()
+        times = sorted({r.tracked_at for r in rows} | {r.last_seen_at for r in rows if r.last_seen_at})
+        deltas, spans = {}, {}
+        for r in rows:
+            section = r.section or 'General'
+            lo = bisect_left(times, r.tracked_at)
+            hi = bisect_right(times, r.last_seen_at or r.tracked_at)
+            spans.setdefault(section, []).append((lo, hi))
+            for hour, count in _spans(times, lo, hi):
+                _observe(deltas, section, hour, r.price, r.availability, count)
+        for section, ranges in spans.items():
+            # Scrapes that listed the section: the union of its runs' spans
+            ranges.sort()
+            start, end = ranges[0]
+            for lo, hi in ranges[1:] + [(len(times) + 1, len(times) + 1)]:
+                if lo > end:
+                    for hour, count in _spans(times, start, end):
+                        _scraped(deltas, section, hour, count)
+                    start = lo
+                end = max(end, hi)
+        _write(conn, event_id, deltas, now)
+        written += len(deltas)
+    print(f"Rebuilt section_stats: {written} hourly and daily buckets")
+    return written
+
+
+def _percentiles(counts):
+    """percentile_cont over a {cents: count} histogram, in dollars"""
+    counts = sorted((int(cents), count) for cents, count in counts.items() if count > 0)
+    values = [cents for cents, _ in counts]
+    cumulative = list(accumulate(count for _, count in counts))
+    total = cumulative[-1] if cumulative else 0
+    result = {}
+    for name, fraction in PERCENTILES:
+        if not total:
+            result[name] = None
+            continue
+        position = fraction * (total - 1)
+        below = int(position)
+        lower = values[bisect_right(cumulative, below)]
+        upper = values[bisect_right(cumulative, min(below + 1, total - 1))]
+        result[name] = round((lower + (upper - lower) * (position - below)) / 100, 2)
+    return result
+
+
+def _next_midnight(at):
+    day = bucket_start(at, 'day')
+    return day if day == at else day + timedelta(days=1)
+
+
+def _merge(merged, section, scrapes, listings, available, cheapest, counts):
+    m = merged.get(section)
+    if m is None:
+        m = merged[section] = {'scrapes': 0, 'listings': 0, 'available': 0, 'cheapest': None, 'prices': Counter()}
+    m['scrapes'] += scrapes or 0
+    m['listings'] += listings or 0
+    m['available'] += available or 0
+    if cheapest is not None and (m['cheapest'] is None or cheapest < m['cheapest']):
+        m['cheapest'] = cheapest
+    m['prices'].update(counts)
+
+
+def _per_scrape(count, scrapes):
+    return round(count / scrapes, 1) if scrapes else None
+
+
+def _summarize(merged):
+    return [dict({'section': name, 'scrapes': m['scrapes'],
+                  'listings': _per_scrape(m['listings'], m['scrapes']),
+                  'available_listings': _per_scrape(m['available'], m['scrapes']),
+                  'cheapest_available': m['cheapest']}, **_percentiles(m['prices']))
+            for name, m in sorted(merged.items())]
+
+
+def section_analytics(db, event_id, hours=None, section=None, now=None):
+    """Per-section stats, by section name, for scrapes in the last ``hours``
+    hours (all history when None). ``listings`` and ``available_listings``
+    are averages per scrape that listed the section."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(hours=hours) if hours else None
+    stats = SectionStats.__table__
+    query = select(stats.c.section, stats.c.scrapes, stats.c.listings, stats.c.available,
+                   stats.c.min_available_price, stats.c.price_counts).where(stats.c.event_id == event_id)
+    if cutoff is None:
+        query = query.where(stats.c.granularity == 'day')
+    else:
+        # Hourly rows up to the first midnight in the window, daily ones after
+        start = bucket_start(cutoff, 'hour')
+        first_day = _next_midnight(start)
+        query = query.where(or_(
+            and_(stats.c.granularity == 'hour', stats.c.bucket_start >= start, stats.c.bucket_start < first_day),
+            and_(stats.c.granularity == 'day', stats.c.bucket_start >= first_day)
+        ))
+    if section:
+        query = query.where(stats.c.section == section)
+
+    merged = {}
+    for r in db.execute(query):
+        # Merged with the JSON's string keys; _percentiles converts once
+        _merge(merged, r.section, r.scrapes, r.listings, r.available, r.min_available_price,
+               json.loads(r.price_counts) if r.price_counts else {})
+    return _summarize(merged)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["backfill"]:
+        init_db()
+        db = SessionLocal()
+        try:
+            rebuild(db.connection())
+            db.commit()
+        finally:
+            db.close()
+    else:
+        print("Usage: python -m utils.section_stats backfill")
+        sys.exit(1)
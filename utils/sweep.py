@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from datetime import datetime
+from utils.metrics import event_checks
+import threading
+import time
+import os
+
+# Hosts we are careful not to hammer; anything else is bounded only by the
+# worker count.
+DEFAULT_HOST_LIMITS = {
+    'toyotacenter.com': int(os.getenv("TOYOTA_CENTER_CONCURRENCY", "2")),
+    'axs.com': int(os.getenv("AXS_CONCURRENCY", "1")),
+}
+
+
+class HostLimiter:
+    """Per-host semaphores keyed by registrable domain suffix"""
+    def __init__(self, limits=None):
+        limits = DEFAULT_HOST_LIMITS if limits is None else limits
+        self._semaphores = {host: threading.BoundedSemaphore(limit) for host, limit in limits.items()}
+
+    def semaphore_for(self, url):
+        host = (urlparse(url or '').hostname or '').lower()
+        for suffix, semaphore in self._semaphores.items():
+            if host == suffix or host.endswith('.' + suffix):
+                return semaphore
+        return None
+
+
+class SweepEngine:
+    """Runs one check per event on a bounded thread pool.
+
+    ``check_event(event)`` does the work for a single event and returns the
+    number of tickets it processed. Each call is timed, and the sweep returns
+    a report with the total wall time and per-event timings.
+    """
+    def __init__(self, check_event, workers=None, host_limits=None):
+        self.check_event = check_event
+        self.workers = workers or int(os.getenv("SWEEP_WORKERS", "2"))
+        self.limiter = HostLimiter(host_limits)
+        self._start = time.perf_counter()
+
+    def _run_one(self, event):
+        semaphore = self.limiter.semaphore_for(event.url)
+        result = {'event_id': event.id, 'event_name': event.event_name, 'ok': True, 'tickets': 0}
+        if semaphore:
+            semaphore.acquire()
+        start = time.perf_counter()
+        result['offset'] = round(start - self._start, 3)
+        result['thread'] = threading.current_thread().name
+        try:
+            result['tickets'] = self.check_event(event) or 0
+        except Exception as e:
+            result['ok'] = False
+            result['error'] = str(e)
+            print(f"Error checking {event.event_name}: {e}")
+        finally:
+            result['seconds'] = round(time.perf_counter() - start, 3)
+            if semaphore:
+                semaphore.release()
+        event_checks.inc(result='ok' if result['ok'] else 'failed')
+        return result
+
+    def run(self, events):
+        started_at = datetime.utcnow()
+        start = self._start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sweep") as executor:
+            results = list(executor.map(self._run_one, events))
+        return {
+            'started_at': started_at,
+            'wall_time': round(time.perf_counter() - start, 3),
+            'workers': self.workers,
+            'events': results,
+            'failed': sum(1 for r in results if not r['ok']),
+        }
@@ -0,0 +1,35 @@
+"""
+Standalone scraper worker.
+
+Runs the same adaptive polling and rollup jobs as the API's background
+scheduler, without the web server. Any number of workers can point at one
+database: each event is checked by whichever process claims its lease.
+
+    python -m utils.worker
+
+Set SCRAPE_IN_API=0 on the API to leave all scraping to workers.
+"""
+
+import sys
+sys.path.append('..')
+
+from models.migrations import init_db
+from utils.scheduler import start_monitoring, stop_monitoring, poller
+import threading
+import signal
+
+
+def main():
+    init_db()
+    stopped = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopped.set())
+
+    start_monitoring()
+    print(f"Worker {poller.leases.worker_id} running; Ctrl+C to stop")
+    stopped.wait()
+    stop_monitoring()
+
+
+if __name__ == "__main__":
+    main()